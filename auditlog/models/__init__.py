@@ -1,8 +1,11 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+from . import ir_model
 from . import rule
 from . import http_session
 from . import http_request
 from . import log
+from . import log_queue
 from . import auditlog_log_line_view
 from . import autovacuum
+from . import partition
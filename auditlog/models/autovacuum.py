@@ -19,10 +19,14 @@ class AuditlogAutovacuum(models.TransientModel):
             - HTTP requests
             - HTTP user sessions
 
+        With partitioned tables, the partitions only storing obsolete logs are
+        dropped first.
+
         Called from a cron.
         """
         days = (days > 0) and int(days) or 0
         deadline = datetime.now() - timedelta(days=days)
+        self.env["auditlog.partition"].drop_partitions(deadline)
         data_models = ("auditlog.log", "auditlog.http.request", "auditlog.http.session")
         for data_model in data_models:
             records = self.env[data_model].search(
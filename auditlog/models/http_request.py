@@ -34,6 +34,12 @@ class AuditlogHTTPRequest(models.Model):
     def name_get(self):
         return [(request.id, request.display_name) for request in self]
 
+    def unlink(self):
+        """Empty the references to the records when the tables are
+        partitioned."""
+        self.env["auditlog.partition"]._unlink_references(self)
+        return super().unlink()
+
     @api.model
     def current_http_request(self):
         """Create a log corresponding to the current HTTP request, and returns
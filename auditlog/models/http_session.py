@@ -30,6 +30,12 @@ class AuditlogtHTTPSession(models.Model):
     def name_get(self):
         return [(session.id, session.display_name) for session in self]
 
+    def unlink(self):
+        """Empty the references to the records when the tables are
+        partitioned."""
+        self.env["auditlog.partition"]._unlink_references(self)
+        return super().unlink()
+
     @api.model
     def current_http_session(self):
         """Create a log corresponding to the current HTTP user session, and
@@ -0,0 +1,17 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+from odoo import api, models
+
+
+class IrModelFields(models.Model):
+    _inherit = "ir.model.fields"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Refresh the fields known by the auditlog rules."""
+        self.env["auditlog.rule"].clear_caches()
+        return super().create(vals_list)
+
+    def unlink(self):
+        """Refresh the fields known by the auditlog rules."""
+        self.env["auditlog.rule"].clear_caches()
+        return super().unlink()
@@ -3,6 +3,55 @@
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
 
+MAGIC_COLUMNS_TEMPLATE = (
+    ("create_uid", "%s"),
+    ("create_date", "(now() at time zone 'UTC')"),
+    ("write_uid", "%s"),
+    ("write_date", "(now() at time zone 'UTC')"),
+)
+
+
+def _bulk_insert(model, vals_list):
+    """Insert ``vals_list`` in the table of ``model`` with one multi-row
+    ``INSERT`` statement and return the new IDs, in the same order.
+
+    Values are converted exactly as ``create()`` would do, but the ORM
+    machinery (defaults, computed fields, constraints) is bypassed: audit
+    logs do not rely on it and it costs one ``INSERT`` per record.
+    """
+    if not vals_list:
+        return []
+    cr = model.env.cr
+    fnames = sorted({fname for vals in vals_list for fname in vals})
+    # magic columns can be given explicitly, e.g. for deferred logs
+    magic_columns = [
+        (column, value)
+        for column, value in MAGIC_COLUMNS_TEMPLATE
+        if column not in fnames
+    ]
+    columns = fnames + [column for column, __ in magic_columns]
+    template = "(%s)" % ", ".join(
+        ["%s"] * len(fnames) + [value for __, value in magic_columns]
+    )
+    rows = []
+    for vals in vals_list:
+        row = [
+            model._fields[fname].convert_to_column(vals[fname], model)
+            if fname in vals
+            else None
+            for fname in fnames
+        ]
+        row += [model.env.uid for __, value in magic_columns if value == "%s"]
+        rows.append(cr.mogrify(template, row).decode("utf-8"))
+    cr.execute(
+        'INSERT INTO "{}" ({}) VALUES {} RETURNING id'.format(
+            model._table,
+            ", ".join('"%s"' % column for column in columns),
+            ", ".join(rows),
+        )
+    )
+    return [row[0] for row in cr.fetchall()]
+
 
 class AuditlogLog(models.Model):
     _name = "auditlog.log"
@@ -28,6 +77,9 @@ class AuditlogLog(models.Model):
     log_type = fields.Selection(
         [("full", "Full log"), ("fast", "Fast log")], string="Type"
     )
+    read_count = fields.Integer(
+        "Reads", help="Number of identical reads counted on this log"
+    )
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -39,6 +91,23 @@ class AuditlogLog(models.Model):
             vals.update({"model_name": model.name, "model_model": model.model})
         return super().create(vals_list)
 
+    @api.model
+    def _bulk_create(self, vals_list):
+        """Same as ``create()`` but with a single ``INSERT`` statement for all
+        the logs. Used by ``auditlog.rule`` to log operations on many records.
+        """
+        for vals in vals_list:
+            if not vals.get("model_id"):
+                raise UserError(_("No model defined to create log."))
+        ir_models = self.env["ir.model"].browse(
+            {vals["model_id"] for vals in vals_list}
+        )
+        ir_models = {model.id: model for model in ir_models}
+        for vals in vals_list:
+            model = ir_models[vals["model_id"]]
+            vals.update({"model_name": model.name, "model_model": model.model})
+        return self.browse(_bulk_insert(self, vals_list))
+
     def write(self, vals):
         """Update model_name and model_model field values to reflect model_id
         changes."""
@@ -49,6 +118,12 @@ class AuditlogLog(models.Model):
             vals.update({"model_name": model.name, "model_model": model.model})
         return super().write(vals)
 
+    def unlink(self):
+        """Empty the references to the records when the tables are
+        partitioned."""
+        self.env["auditlog.partition"]._unlink_references(self)
+        return super().unlink()
+
 
 class AuditlogLogLine(models.Model):
     _name = "auditlog.log.line"
@@ -80,6 +155,25 @@ class AuditlogLogLine(models.Model):
             )
         return super().create(vals_list)
 
+    @api.model
+    def _bulk_create(self, vals_list):
+        """Same as ``create()`` but with a single ``INSERT`` statement for all
+        the lines. Used by ``auditlog.rule`` to log operations on many records.
+        """
+        for vals in vals_list:
+            if not vals.get("field_id"):
+                raise UserError(_("No field defined to create line."))
+        ir_fields = self.env["ir.model.fields"].browse(
+            {vals["field_id"] for vals in vals_list}
+        )
+        ir_fields = {field.id: field for field in ir_fields}
+        for vals in vals_list:
+            field = ir_fields[vals["field_id"]]
+            vals.update(
+                {"field_name": field.name, "field_description": field.field_description}
+            )
+        return self.browse(_bulk_insert(self, vals_list))
+
     def write(self, vals):
         """Ensure field_id is set during write and update field_name and
         field_description values."""
@@ -0,0 +1,117 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import base64
+import json
+import logging
+from datetime import date, datetime
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+def _encode(value):
+    """Make the values captured by auditlog JSON serializable without losing
+    their type (tuples, dates, integer keys...), as the text stored in the
+    log lines is built from their representation.
+    """
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        return {"__dict__": [[_encode(k), _encode(v)] for k, v in value.items()]}
+    if isinstance(value, datetime):
+        return {"__datetime__": fields.Datetime.to_string(value)}
+    if isinstance(value, date):
+        return {"__date__": fields.Date.to_string(value)}
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    return value
+
+
+def _decode_hook(value):
+    if "__tuple__" in value:
+        return tuple(value["__tuple__"])
+    if "__dict__" in value:
+        return {k: v for k, v in value["__dict__"]}
+    if "__datetime__" in value:
+        return fields.Datetime.to_datetime(value["__datetime__"])
+    if "__date__" in value:
+        return fields.Date.to_date(value["__date__"])
+    if "__bytes__" in value:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+def dumps(value):
+    return json.dumps(_encode(value), default=str)
+
+
+def loads(data):
+    return json.loads(data, object_hook=_decode_hook)
+
+
+class AuditlogLogQueue(models.Model):
+    _name = "auditlog.log.queue"
+    _description = "Auditlog - Deferred logs queue"
+    _order = "id"
+
+    res_model = fields.Char("Technical Model Name", required=True)
+    method = fields.Char(required=True)
+    data = fields.Text(required=True)
+
+    @api.model
+    def enqueue(self, entries):
+        """Stage the logs captured by ``auditlog.rule`` in the current
+        transaction, to be created later on by the cron.
+        """
+        return self.create(
+            [
+                {
+                    "res_model": entry["res_model"],
+                    "method": entry["method"],
+                    "data": dumps(entry),
+                }
+                for entry in entries
+            ]
+        )
+
+    @api.model
+    def process_queue(self, limit=None):
+        """Create the logs staged by ``enqueue()``. Called from a cron."""
+        rule_model = (
+            self.env["auditlog.rule"].sudo().with_context(auditlog_disabled=True)
+        )
+        queued = self.search([], limit=limit)
+        processed = self.browse()
+        for item in queued:
+            entry = loads(item.data)
+            additional_log_values = dict(entry["additional_log_values"] or {})
+            # keep the date and author of the operation, not the cron ones
+            additional_log_values.setdefault("create_date", item.create_date)
+            additional_log_values.setdefault("create_uid", entry["uid"])
+            try:
+                with self.env.cr.savepoint():
+                    rule_model.create_logs(
+                        entry["uid"],
+                        entry["res_model"],
+                        entry["res_ids"],
+                        entry["method"],
+                        entry["old_values"],
+                        entry["new_values"],
+                        additional_log_values,
+                        res_names=entry["res_names"],
+                    )
+            except Exception:
+                _logger.exception(
+                    "Unable to create the deferred '%s' logs on '%s'",
+                    item.method,
+                    item.res_model,
+                )
+                continue
+            processed |= item
+        processed.unlink()
+        _logger.info(
+            "AUDITLOG QUEUE - %s deferred log batches processed", len(processed)
+        )
+        return True
@@ -0,0 +1,324 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import logging
+import re
+from datetime import datetime, time
+
+import psycopg2
+from dateutil.relativedelta import relativedelta
+
+from odoo import _, api, fields, models, tools
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Models stored in partitioned tables, in the order their partitions can be
+# dropped (records first, then the records they refer to)
+PARTITIONED_MODELS = (
+    "auditlog.log.line",
+    "auditlog.log",
+    "auditlog.http.request",
+    "auditlog.http.session",
+)
+PARTITION_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+class AuditlogPartition(models.AbstractModel):
+    """Optional storage of the audit logs in tables partitioned by month of
+    creation, so that old logs can be removed by dropping whole partitions.
+
+    PostgreSQL can not enforce foreign keys between such tables, and Odoo does
+    not create foreign keys on tables which are not ordinary ones: the
+    ``ondelete`` behaviour of the many2one fields between the partitioned
+    tables is emulated by ``_unlink_references()``.
+    """
+
+    _name = "auditlog.partition"
+    _description = "Auditlog - Partitioned storage"
+
+    @api.model
+    @tools.ormcache("table")
+    def _is_partitioned(self, table):
+        self.env.cr.execute(
+            """
+            SELECT 1
+            FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s
+              AND c.relnamespace = current_schema()::regnamespace
+            """,
+            (table,),
+        )
+        return bool(self.env.cr.fetchone())
+
+    @api.model
+    def _get_partitions(self, table):
+        """Return the partitions of ``table`` with the upper bound of the
+        creation dates they store (``None`` for the default partition),
+        oldest first.
+        """
+        self.env.cr.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            (table,),
+        )
+        partitions = []
+        for name, bound in self.env.cr.fetchall():
+            match = PARTITION_UPPER_BOUND.search(bound)
+            upper = match and fields.Datetime.to_datetime(match.group(1))
+            partitions.append((name, upper))
+        return sorted(partitions, key=lambda partition: partition[1] or datetime.max)
+
+    @api.model
+    def _get_references(self, model):
+        """Return the many2one fields of the partitioned models which refer
+        to ``model``.
+        """
+        return [
+            field
+            for ref_model in PARTITIONED_MODELS
+            for field in self.env[ref_model]._fields.values()
+            if field.type == "many2one" and field.store and field.comodel_name == model
+        ]
+
+    @api.model
+    def enable_partitioning(self):
+        """Store the audit logs in tables partitioned by month of creation.
+
+        Existing records are not moved: each table is renamed and attached
+        as the ``<table>_legacy`` partition of the new table, holding the
+        records created until the end of the current month. This partition is
+        dropped by the autovacuum once all its records are obsolete.
+        Foreign keys between the partitioned tables are dropped.
+        """
+        cr = self.env.cr
+        cr.execute("SHOW server_version_num")
+        if int(cr.fetchone()[0]) < 120000:
+            raise UserError(_("Partitioned audit logs require PostgreSQL 12 or later."))
+        tables = [self.env[model]._table for model in PARTITIONED_MODELS]
+        to_partition = [table for table in tables if not self._is_partitioned(table)]
+        if not to_partition:
+            return False
+        line_view = self.env["auditlog.log.line.view"]
+        tools.drop_view_if_exists(cr, line_view._table)
+        cr.execute(
+            """
+            SELECT conrelid::regclass::text, conname
+            FROM pg_constraint
+            WHERE contype = 'f' AND conparentid = 0
+              AND confrelid::regclass::text IN %s
+            """,
+            (tuple(tables),),
+        )
+        for table, constraint in cr.fetchall():
+            cr.execute('ALTER TABLE "%s" DROP CONSTRAINT "%s"' % (table, constraint))
+        for table in to_partition:
+            self._partition_table(table)
+        # invalidate _is_partitioned() in all workers
+        self.clear_caches()
+        line_view.init()
+        self.create_partitions()
+        return True
+
+    @api.model
+    def _partition_table(self, table):
+        cr = self.env.cr
+        legacy = "%s_legacy" % table
+        _logger.info("Converting %s into a partitioned table", table)
+        cr.execute('LOCK TABLE "%s" IN ACCESS EXCLUSIVE MODE' % table)
+        cr.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype = 'f'
+            """,
+            (table,),
+        )
+        foreign_keys = cr.fetchall()
+        cr.execute(
+            """
+            SELECT i.relname, pg_get_indexdef(i.oid)
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = %s::regclass AND NOT x.indisprimary
+            """,
+            (table,),
+        )
+        indexes = cr.fetchall()
+        cr.execute(
+            """
+            SELECT conname
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype = 'p'
+            """,
+            (table,),
+        )
+        primary_keys = cr.fetchall()
+        cr.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+        sequence = cr.fetchone()[0]
+        # the partition key can not be empty
+        cr.execute(
+            """
+            UPDATE "%s"
+            SET create_date = COALESCE(write_date, now() at time zone 'UTC')
+            WHERE create_date IS NULL
+            """
+            % table
+        )
+        # the legacy table keeps its indexes, under other names
+        cr.execute('ALTER TABLE "%s" RENAME TO "%s"' % (table, legacy))
+        for (constraint,) in primary_keys:
+            cr.execute(
+                'ALTER TABLE "%s" RENAME CONSTRAINT "%s" TO "%s_pkey"'
+                % (legacy, constraint, legacy)
+            )
+        for index, __ in indexes:
+            cr.execute('ALTER INDEX "%s" RENAME TO "%s_legacy"' % (index, index))
+        # a primary key would have to include the partition key, ``id`` is
+        # only indexed: its values come from the sequence anyway
+        cr.execute(
+            """
+            CREATE TABLE "%s" (LIKE "%s" INCLUDING DEFAULTS INCLUDING COMMENTS)
+            PARTITION BY RANGE (create_date)
+            """
+            % (table, legacy)
+        )
+        cr.execute('CREATE INDEX "%s_id_index" ON "%s" (id)' % (table, table))
+        for __, definition in indexes:
+            cr.execute(definition)
+        # foreign keys to ordinary tables are still supported, and reused by
+        # the legacy partition which already has them
+        for constraint, definition in foreign_keys:
+            cr.execute(
+                'ALTER TABLE "%s" ADD CONSTRAINT "%s" %s'
+                % (table, constraint, definition)
+            )
+        if sequence:
+            cr.execute('ALTER SEQUENCE %s OWNED BY "%s".id' % (sequence, table))
+        cr.execute(
+            """
+            ALTER TABLE "%s" ATTACH PARTITION "%s"
+            FOR VALUES FROM (MINVALUE) TO (%%s)
+            """
+            % (table, legacy),
+            (fields.Datetime.to_string(self._month_start(months=1)),),
+        )
+
+    @api.model
+    def _month_start(self, months=0):
+        today = fields.Date.today().replace(day=1)
+        return datetime.combine(today + relativedelta(months=months), time.min)
+
+    @api.model
+    def create_partitions(self, months=2):
+        """Create the partitions storing the audit logs of the current month
+        and of the next ``months`` ones, and the default partition storing
+        those out of these ranges. Called from a cron.
+        """
+        cr = self.env.cr
+        for model in PARTITIONED_MODELS:
+            table = self.env[model]._table
+            if not self._is_partitioned(table):
+                continue
+            partitions = self._get_partitions(table)
+            names = {name for name, __ in partitions}
+            uppers = [upper for __, upper in partitions if upper]
+            covered = max(uppers) if uppers else datetime.min
+            for month in range(months + 1):
+                lower = self._month_start(months=month)
+                upper = self._month_start(months=month + 1)
+                name = "%s_%s" % (table, lower.strftime("%Y%m"))
+                if name in names or upper <= covered:
+                    continue
+                try:
+                    with cr.savepoint():
+                        cr.execute(
+                            """
+                            CREATE TABLE "%s" PARTITION OF "%s"
+                            FOR VALUES FROM (%%s) TO (%%s)
+                            """
+                            % (name, table),
+                            (
+                                fields.Datetime.to_string(max(lower, covered)),
+                                fields.Datetime.to_string(upper),
+                            ),
+                        )
+                except psycopg2.Error:
+                    # some records of that month are in the default partition
+                    _logger.warning(
+                        "Unable to create partition %s", name, exc_info=True
+                    )
+                    continue
+                covered = upper
+                _logger.info("Partition %s created", name)
+            if "%s_default" % table not in names:
+                cr.execute(
+                    'CREATE TABLE "%s_default" PARTITION OF "%s" DEFAULT'
+                    % (table, table)
+                )
+        return True
+
+    @api.model
+    def drop_partitions(self, deadline):
+        """Drop the partitions of the audit logs which only store records
+        created before ``deadline``. Return the number of dropped partitions.
+        """
+        cr = self.env.cr
+        nb_partitions = 0
+        for model in PARTITIONED_MODELS:
+            table = self.env[model]._table
+            if not self._is_partitioned(table):
+                continue
+            for partition, upper in self._get_partitions(table):
+                if not upper or upper > deadline:
+                    continue
+                for field in self._get_references(model):
+                    # lines are created with their log, so they are stored
+                    # in a partition of the same month, dropped before
+                    if field.ondelete != "set null":
+                        continue
+                    cr.execute(
+                        """
+                        UPDATE "%s" SET "%s" = NULL
+                        WHERE "%s" IN (SELECT id FROM "%s")
+                        """
+                        % (
+                            self.env[field.model_name]._table,
+                            field.name,
+                            field.name,
+                            partition,
+                        )
+                    )
+                cr.execute('DROP TABLE "%s"' % partition)
+                nb_partitions += 1
+                _logger.info("AUTOVACUUM - partition %s dropped", partition)
+        if nb_partitions:
+            for model in PARTITIONED_MODELS:
+                self.env[model].invalidate_cache()
+        return nb_partitions
+
+    @api.model
+    def _unlink_references(self, records):
+        """Apply the ``ondelete`` behaviour of the many2one fields referring
+        to ``records``, as foreign keys can not do it on partitioned tables.
+        """
+        if not records or not self._is_partitioned(records._table):
+            return
+        cr = self.env.cr
+        for field in self._get_references(records._name):
+            ref_table = self.env[field.model_name]._table
+            if field.ondelete == "cascade":
+                cr.execute(
+                    'DELETE FROM "%s" WHERE "%s" IN %%s' % (ref_table, field.name),
+                    (tuple(records.ids),),
+                )
+            else:
+                cr.execute(
+                    'UPDATE "%s" SET "%s" = NULL WHERE "%s" IN %%s'
+                    % (ref_table, field.name, field.name),
+                    (tuple(records.ids),),
+                )
+            self.env[field.model_name].invalidate_cache()
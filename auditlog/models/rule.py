@@ -2,9 +2,14 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 import copy
+import logging
+import time
 
-from odoo import _, api, fields, models, modules
+from odoo import _, api, fields, models, modules, tools
 from odoo.exceptions import UserError
+from odoo.tools.lru import LRU
+
+_logger = logging.getLogger(__name__)
 
 FIELDS_BLACKLIST = [
     "id",
@@ -18,6 +23,9 @@ FIELDS_BLACKLIST = [
 # Used for performance, to avoid a dictionary instanciation when we need an
 # empty dict to simplify algorithms
 EMPTY_DICT = {}
+# Number of recent read logs remembered by each worker to count identical
+# reads (see `AuditlogRule.log_read_window`)
+READ_LOGS_CACHE_SIZE = 8192
 
 
 class DictDiffer(object):
@@ -79,6 +87,16 @@ class AuditlogRule(models.Model):
         ),
         states={"subscribed": [("readonly", True)]},
     )
+    log_read_window = fields.Integer(
+        "Reads Window",
+        help=(
+            "Number of seconds during which the identical reads of a record "
+            "(same user, same fields) are counted on the first read log "
+            "instead of being logged again. Set 0 to log every read.\n"
+            "Only applies to logs written immediately."
+        ),
+        states={"subscribed": [("readonly", True)]},
+    )
     log_write = fields.Boolean(
         "Log Writes",
         default=True,
@@ -120,6 +138,25 @@ class AuditlogRule(models.Model):
         ),
         states={"subscribed": [("readonly", True)]},
     )
+    log_flush = fields.Selection(
+        [
+            ("immediate", "Immediately"),
+            ("commit", "At commit"),
+            ("cron", "In background"),
+        ],
+        string="Write Logs",
+        required=True,
+        default="immediate",
+        help=(
+            "Immediately: logs are written during the logged operation\n"
+            "At commit: captured values are kept in memory and logs are "
+            "written once, when the transaction is committed\n"
+            "In background: captured values are staged when the transaction "
+            "is committed, and logs are written by a scheduled action\n"
+            "In all cases, nothing is logged if the transaction is rolled back."
+        ),
+        states={"subscribed": [("readonly", True)]},
+    )
     # log_action = fields.Boolean(
     #     "Log Action",
     #     help=("Select this if you want to keep track of actions on the "
@@ -170,10 +207,8 @@ class AuditlogRule(models.Model):
     def _register_hook(self):
         """Get all rules and apply them to log method calls."""
         super(AuditlogRule, self)._register_hook()
-        if not hasattr(self.pool, "_auditlog_field_cache"):
-            self.pool._auditlog_field_cache = {}
-        if not hasattr(self.pool, "_auditlog_model_cache"):
-            self.pool._auditlog_model_cache = {}
+        if not hasattr(self.pool, "_auditlog_read_cache"):
+            self.pool._auditlog_read_cache = LRU(READ_LOGS_CACHE_SIZE)
         if not self:
             self = self.search([("state", "=", "subscribed")])
         return self._patch_methods()
@@ -181,14 +216,12 @@ class AuditlogRule(models.Model):
     def _patch_methods(self):
         """Patch ORM methods of models defined in rules to log their calls."""
         updated = False
-        model_cache = self.pool._auditlog_model_cache
         for rule in self:
             if rule.state != "subscribed":
                 continue
             if not self.pool.get(rule.model_id.model or rule.model_model):
                 # ignore rules for models not loadable currently
                 continue
-            model_cache[rule.model_id.model] = rule.model_id.id
             model_model = self.env[rule.model_id.model or rule.model_model]
             # CRUD
             #   -> create
@@ -243,6 +276,7 @@ class AuditlogRule(models.Model):
         model = self.env["ir.model"].browse(vals["model_id"])
         vals.update({"model_name": model.name, "model_model": model.model})
         new_record = super().create(vals)
+        self.clear_caches()
         if not self.env.context.get("install_module") and new_record._register_hook():
             modules.registry.Registry(self.env.cr.dbname).signal_changes()
         if "state" in vals and vals["state"] == "subscribed":
@@ -257,6 +291,7 @@ class AuditlogRule(models.Model):
             model = self.env["ir.model"].browse(vals["model_id"])
             vals.update({"model_name": model.name, "model_model": model.model})
         res = super().write(vals)
+        self.clear_caches()
         if not self.env.context.get("install_module") and self._register_hook():
             modules.registry.Registry(self.env.cr.dbname).signal_changes()
         return res
@@ -264,6 +299,7 @@ class AuditlogRule(models.Model):
     def unlink(self):
         """Unsubscribe rules before removing them."""
         self.unsubscribe()
+        self.clear_caches()
         return super(AuditlogRule, self).unlink()
 
     @api.model
@@ -283,6 +319,7 @@ class AuditlogRule(models.Model):
         """Instanciate a create method that log its calls."""
         self.ensure_one()
         log_type = self.log_type
+        log_flush = self.log_flush
         users_to_exclude = self.mapped("users_to_exclude_ids")
 
         @api.model_create_multi
@@ -307,7 +344,8 @@ class AuditlogRule(models.Model):
                     )
             if self.env.user in users_to_exclude:
                 return new_records
-            rule_model.sudo().create_logs(
+            rule_model.sudo()._create_or_defer_logs(
+                log_flush,
                 self.env.uid,
                 self._name,
                 new_records.ids,
@@ -331,7 +369,8 @@ class AuditlogRule(models.Model):
                 new_values.setdefault(new_record.id, vals)
             if self.env.user in users_to_exclude:
                 return new_records
-            rule_model.sudo().create_logs(
+            rule_model.sudo()._create_or_defer_logs(
+                log_flush,
                 self.env.uid,
                 self._name,
                 new_records.ids,
@@ -348,6 +387,8 @@ class AuditlogRule(models.Model):
         """Instanciate a read method that log its calls."""
         self.ensure_one()
         log_type = self.log_type
+        log_flush = self.log_flush
+        log_read_window = self.log_read_window if log_flush == "immediate" else 0
         users_to_exclude = self.mapped("users_to_exclude_ids")
 
         def read(self, fields=None, load="_classic_read", **kwargs):
@@ -370,15 +411,25 @@ class AuditlogRule(models.Model):
             rule_model = self.env["auditlog.rule"]
             if self.env.user in users_to_exclude:
                 return result
-            rule_model.sudo().create_logs(
+            res_ids = self.ids
+            if log_read_window:
+                res_ids = rule_model.sudo()._count_recent_reads(
+                    self.env.uid, self._name, read_values, log_read_window
+                )
+            logs = rule_model.sudo()._create_or_defer_logs(
+                log_flush,
                 self.env.uid,
                 self._name,
-                self.ids,
+                res_ids,
                 "read",
                 read_values,
                 None,
-                {"log_type": log_type},
+                {"log_type": log_type, "read_count": 1},
             )
+            if log_read_window and logs:
+                rule_model.sudo()._register_recent_reads(
+                    self.env.uid, self._name, read_values, logs, res_ids
+                )
             return result
 
         return read
@@ -387,6 +438,7 @@ class AuditlogRule(models.Model):
         """Instanciate a write method that log its calls."""
         self.ensure_one()
         log_type = self.log_type
+        log_flush = self.log_flush
         users_to_exclude = self.mapped("users_to_exclude_ids")
 
         def write_full(self, vals, **kwargs):
@@ -408,7 +460,8 @@ class AuditlogRule(models.Model):
             }
             if self.env.user in users_to_exclude:
                 return result
-            rule_model.sudo().create_logs(
+            rule_model.sudo()._create_or_defer_logs(
+                log_flush,
                 self.env.uid,
                 self._name,
                 self.ids,
@@ -432,7 +485,8 @@ class AuditlogRule(models.Model):
             result = write_fast.origin(self, vals, **kwargs)
             if self.env.user in users_to_exclude:
                 return result
-            rule_model.sudo().create_logs(
+            rule_model.sudo()._create_or_defer_logs(
+                log_flush,
                 self.env.uid,
                 self._name,
                 self.ids,
@@ -449,6 +503,7 @@ class AuditlogRule(models.Model):
         """Instanciate an unlink method that log its calls."""
         self.ensure_one()
         log_type = self.log_type
+        log_flush = self.log_flush
         users_to_exclude = self.mapped("users_to_exclude_ids")
 
         def unlink_full(self, **kwargs):
@@ -463,7 +518,8 @@ class AuditlogRule(models.Model):
             }
             if self.env.user in users_to_exclude:
                 return unlink_full.origin(self, **kwargs)
-            rule_model.sudo().create_logs(
+            rule_model.sudo()._create_or_defer_logs(
+                log_flush,
                 self.env.uid,
                 self._name,
                 self.ids,
@@ -479,7 +535,8 @@ class AuditlogRule(models.Model):
             rule_model = self.env["auditlog.rule"]
             if self.env.user in users_to_exclude:
                 return unlink_fast.origin(self, **kwargs)
-            rule_model.sudo().create_logs(
+            rule_model.sudo()._create_or_defer_logs(
+                log_flush,
                 self.env.uid,
                 self._name,
                 self.ids,
@@ -492,6 +549,142 @@ class AuditlogRule(models.Model):
 
         return unlink_full if self.log_type == "full" else unlink_fast
 
+    @api.model
+    def _get_read_key(self, uid, res_model, res_id, values):
+        return (self.env.cr.dbname, uid, res_model, res_id, frozenset(values))
+
+    @api.model
+    def _count_recent_reads(self, uid, res_model, read_values, window):
+        """Count the reads of records already logged less than `window`
+        seconds ago on their log, and return the IDs of the other records.
+        """
+        cache = self.pool._auditlog_read_cache
+        now = time.time()
+        recent_logs = {}
+        for res_id, values in read_values.items():
+            recent = cache.get(self._get_read_key(uid, res_model, res_id, values))
+            if recent and now - recent[1] < window:
+                recent_logs[recent[0]] = res_id
+        counted_ids = set()
+        if recent_logs:
+            log_model = self.env["auditlog.log"]
+            # the recent logs may have been rolled back
+            self.env.cr.execute(
+                """
+                UPDATE %s SET read_count = read_count + 1
+                WHERE id IN %%s
+                RETURNING res_id
+                """
+                % log_model._table,
+                (tuple(recent_logs),),
+            )
+            counted_ids = {row[0] for row in self.env.cr.fetchall()}
+            log_model.invalidate_cache(["read_count"], list(recent_logs))
+        return [res_id for res_id in read_values if res_id not in counted_ids]
+
+    @api.model
+    def _register_recent_reads(self, uid, res_model, read_values, logs, res_ids):
+        """Remember the read logs created for `res_ids`, to count the next
+        identical reads on them.
+        """
+        cache = self.pool._auditlog_read_cache
+        now = time.time()
+        for log, res_id in zip(logs, res_ids):
+            key = self._get_read_key(uid, res_model, res_id, read_values[res_id])
+            cache[key] = (log.id, now)
+
+    def _create_or_defer_logs(
+        self,
+        log_flush,
+        uid,
+        res_model,
+        res_ids,
+        method,
+        old_values=None,
+        new_values=None,
+        additional_log_values=None,
+    ):
+        """Create logs now, or keep the captured values in a buffer bound to
+        the transaction according to `log_flush` (see `create_logs()`).
+        The buffer is flushed by a pre-commit hook of the cursor, so it is
+        discarded if the transaction is rolled back.
+        Return the created logs, if any.
+        """
+        if log_flush == "immediate" or not res_ids:
+            return self.create_logs(
+                uid,
+                res_model,
+                res_ids,
+                method,
+                old_values,
+                new_values,
+                additional_log_values,
+            )
+        if method == "read":
+            # read values are the ones returned to the caller, who may alter
+            # them before the buffer is flushed
+            old_values = copy.deepcopy(old_values)
+        res_names = None
+        if method == "unlink":
+            # records are gone once the buffer is flushed
+            res_names = dict(self.env[res_model].browse(res_ids).name_get())
+        precommit = self.env.cr.precommit
+        if "auditlog.deferred" not in precommit.data:
+            precommit.data["auditlog.deferred"] = []
+            precommit.add(self._flush_deferred_logs)
+        precommit.data["auditlog.deferred"].append(
+            {
+                "log_flush": log_flush,
+                "uid": uid,
+                "res_model": res_model,
+                "res_ids": list(res_ids),
+                "method": method,
+                "old_values": old_values,
+                "new_values": new_values,
+                "additional_log_values": additional_log_values,
+                "res_names": res_names,
+            }
+        )
+
+    def _flush_deferred_logs(self):
+        """Create the logs buffered by `_create_or_defer_logs()`, or stage
+        them for the cron.
+        """
+        entries = self.env.cr.precommit.data.pop("auditlog.deferred", [])
+        queued = []
+        for entry in entries:
+            if entry["log_flush"] == "cron":
+                # the HTTP request is not available anymore in the cron
+                additional_log_values = dict(entry["additional_log_values"] or {})
+                additional_log_values.update(
+                    {
+                        "http_request_id": self.env[
+                            "auditlog.http.request"
+                        ].current_http_request(),
+                        "http_session_id": self.env[
+                            "auditlog.http.session"
+                        ].current_http_session(),
+                    }
+                )
+                entry["additional_log_values"] = additional_log_values
+                queued.append(entry)
+                continue
+            self.create_logs(
+                entry["uid"],
+                entry["res_model"],
+                entry["res_ids"],
+                entry["method"],
+                entry["old_values"],
+                entry["new_values"],
+                entry["additional_log_values"],
+                res_names=entry["res_names"],
+            )
+        if queued:
+            self.env["auditlog.log.queue"].enqueue(queued)
+        # this runs just before the commit: flush what the ORM computed for
+        # the records created above (HTTP requests, queue...)
+        self.env["base"].flush()
+
     def create_logs(
         self,
         uid,
@@ -501,88 +694,209 @@ class AuditlogRule(models.Model):
         old_values=None,
         new_values=None,
         additional_log_values=None,
+        res_names=None,
     ):
         """Create logs. `old_values` and `new_values` are dictionaries, e.g:
         {RES_ID: {'FIELD': VALUE, ...}}
+
+        Logs are created in bulk: one `name_get()` for all the records (unless
+        `res_names` already maps their IDs to their names), then one multi-row
+        insert for the logs and another one for their lines.
+        Return the logs, in the order of `res_ids`.
         """
+        if not res_ids:
+            return self.env["auditlog.log"]
         if old_values is None:
             old_values = EMPTY_DICT
         if new_values is None:
             new_values = EMPTY_DICT
         log_model = self.env["auditlog.log"]
+        log_line_model = self.env["auditlog.log.line"]
         http_request_model = self.env["auditlog.http.request"]
         http_session_model = self.env["auditlog.http.session"]
         model_model = self.env[res_model]
-        model_id = self.pool._auditlog_model_cache[res_model]
-        auditlog_rule = self.env["auditlog.rule"].search([("model_id", "=", model_id)])
-        fields_to_exclude = auditlog_rule.fields_to_exclude_ids.mapped("name")
+        rule_data = self._get_auditlog_metadata().get(res_model)
+        if not rule_data:
+            # the rule was unsubscribed before the deferred logs were created
+            _logger.warning(
+                "No subscribed rule on '%s', its '%s' logs are discarded",
+                res_model,
+                method,
+            )
+            return log_model
+        model_id = rule_data["model_id"]
+        fields_to_exclude = rule_data["fields_to_exclude"]
+        if res_names is None:
+            # deferred logs: the records may have been deleted since
+            res_names = dict(model_model.browse(res_ids).exists().name_get())
+        http_request_id = http_request_model.current_http_request()
+        http_session_id = http_session_model.current_http_session()
+        vals_list = []
         for res_id in res_ids:
-            name = model_model.browse(res_id).name_get()
-            res_name = name and name[0] and name[0][1]
             vals = {
-                "name": res_name,
+                "name": res_names.get(res_id, False),
                 "model_id": model_id,
                 "res_id": res_id,
                 "method": method,
                 "user_id": uid,
-                "http_request_id": http_request_model.current_http_request(),
-                "http_session_id": http_session_model.current_http_session(),
+                "http_request_id": http_request_id,
+                "http_session_id": http_session_id,
             }
             vals.update(additional_log_values or {})
-            log = log_model.create(vals)
+            vals_list.append(vals)
+        logs = log_model._bulk_create(vals_list)
+        line_vals_list = []
+
+        def add_log_lines(operation, *args):
+            # the lines of overrides of the former _create_log_line_on_*()
+            # methods are created by them, one by one
+            if operation in legacy_operations:
+                getattr(self, "_create_log_line_on_%s" % operation)(*args)
+            else:
+                getter = getattr(self, "_get_log_lines_vals_on_%s" % operation)
+                line_vals_list.extend(getter(*args))
+
+        legacy_operations = self._get_legacy_log_line_operations()
+        for log, res_id in zip(logs, res_ids):
             diff = DictDiffer(
                 new_values.get(res_id, EMPTY_DICT), old_values.get(res_id, EMPTY_DICT)
             )
             if method == "create":
-                self._create_log_line_on_create(
-                    log, diff.added(), new_values, fields_to_exclude
+                add_log_lines(
+                    "create", log, diff.added(), new_values, fields_to_exclude
                 )
-            elif method == "read":
-                self._create_log_line_on_read(
+            elif method == "read" or (
+                method == "unlink" and rule_data["capture_record"]
+            ):
+                add_log_lines(
+                    "read",
                     log,
                     list(old_values.get(res_id, EMPTY_DICT).keys()),
                     old_values,
                     fields_to_exclude,
                 )
             elif method == "write":
-                self._create_log_line_on_write(
-                    log, diff.changed(), old_values, new_values, fields_to_exclude
-                )
-            elif method == "unlink" and auditlog_rule.capture_record:
-                self._create_log_line_on_read(
+                add_log_lines(
+                    "write",
                     log,
-                    list(old_values.get(res_id, EMPTY_DICT).keys()),
+                    diff.changed(),
                     old_values,
+                    new_values,
                     fields_to_exclude,
                 )
+        log_create_date = (additional_log_values or EMPTY_DICT).get("create_date")
+        if log_create_date:
+            # deferred logs keep the date of the operation: their lines must
+            # have the same one, to be stored in the same partition
+            for line_vals in line_vals_list:
+                line_vals["create_date"] = log_create_date
+        log_line_model._bulk_create(line_vals_list)
+        return logs
 
-    def _get_field(self, model, field_name):
-        cache = self.pool._auditlog_field_cache
-        if field_name not in cache.get(model.model, {}):
-            cache.setdefault(model.model, {})
-            # - we use 'search()' then 'read()' instead of the 'search_read()'
-            #   to take advantage of the 'classic_write' loading
-            # - search the field in the current model and those it inherits
-            field_model = self.env["ir.model.fields"]
-            all_model_ids = [model.id]
-            all_model_ids.extend(model.inherited_model_ids.ids)
-            field = field_model.search(
-                [("model_id", "in", all_model_ids), ("name", "=", field_name)]
+    @api.model
+    @tools.ormcache()
+    def _get_auditlog_metadata(self):
+        """Return the metadata of the subscribed rules used to create logs,
+        by model name: {MODEL: {'model_id': ID, 'capture_record': BOOL,
+        'fields_to_exclude': [NAME, ...], 'fields': {NAME: {'id': ID, ...}}}}
+
+        Fields are searched in the models and those they inherit (by
+        delegation), with a single query. The result is cached in the
+        registry: it is invalidated in all workers when rules are updated.
+        """
+        parents = [
+            (model_name, parent)
+            for model_name, model in self.pool.items()
+            for parent in model._inherits
+        ]
+        exclude_field = self._fields["fields_to_exclude_ids"]
+        self.env.cr.execute(
+            """
+            SELECT m.model, m.id, r.capture_record, f.model, f.id, f.name,
+                f.relation, f.ttype, x.%s IS NOT NULL
+            FROM auditlog_rule r
+            JOIN ir_model m ON m.id = r.model_id
+            JOIN ir_model_fields f ON f.model = m.model OR f.model IN (
+                SELECT parent
+                FROM unnest(%%s::varchar[], %%s::varchar[]) AS chain(model, parent)
+                WHERE chain.model = m.model
             )
-            # The field can be a dummy one, like 'in_group_X' on 'res.users'
-            # As such we can't log it (field_id is required to create a log)
-            if not field:
-                cache[model.model][field_name] = False
-            else:
-                field_data = field.read(load="_classic_write")[0]
-                cache[model.model][field_name] = field_data
-        return cache[model.model][field_name]
+            LEFT JOIN %s x ON x.%s = r.id AND x.%s = f.id
+            WHERE r.state = 'subscribed'
+            """
+            % (
+                exclude_field.column2,
+                exclude_field.relation,
+                exclude_field.column1,
+                exclude_field.column2,
+            ),
+            (
+                [model_name for model_name, __ in parents] or [""],
+                [parent for __, parent in parents] or [""],
+            ),
+        )
+        metadata = {}
+        for row in self.env.cr.fetchall():
+            model, model_id, capture_record, field_model = row[:4]
+            field_id, name, relation, ttype, excluded = row[4:]
+            rule_data = metadata.setdefault(
+                model,
+                {
+                    "model_id": model_id,
+                    "capture_record": capture_record,
+                    "fields_to_exclude": [],
+                    "fields": {},
+                },
+            )
+            if excluded:
+                rule_data["fields_to_exclude"].append(name)
+            # the fields of the model take precedence over the inherited ones
+            if field_model == model or name not in rule_data["fields"]:
+                rule_data["fields"][name] = {
+                    "id": field_id,
+                    "name": name,
+                    "relation": relation,
+                    "ttype": ttype,
+                }
+        return metadata
+
+    def _get_field(self, model, field_name):
+        # The field can be a dummy one, like 'in_group_X' on 'res.users'
+        # As such we can't log it (field_id is required to create a log)
+        rule_data = self._get_auditlog_metadata().get(model.model, EMPTY_DICT)
+        return rule_data.get("fields", EMPTY_DICT).get(field_name, False)
+
+    def _get_legacy_log_line_operations(self):
+        """Return the operations whose _create_log_line_on_*() method is
+        overridden: their lines are still created by the override.
+        """
+        return {
+            operation
+            for operation in ("read", "write", "create")
+            if getattr(type(self), "_create_log_line_on_%s" % operation)
+            is not getattr(AuditlogRule, "_create_log_line_on_%s" % operation)
+        }
 
     def _create_log_line_on_read(
         self, log, fields_list, read_values, fields_to_exclude
     ):
-        """Log field filled on a 'read' operation."""
-        log_line_model = self.env["auditlog.log.line"]
+        """Log field filled on a 'read' operation.
+
+        Kept for compatibility, see _get_log_lines_vals_on_read().
+        """
+        self.env["auditlog.log.line"]._bulk_create(
+            self._get_log_lines_vals_on_read(
+                log, fields_list, read_values, fields_to_exclude
+            )
+        )
+
+    def _get_log_lines_vals_on_read(
+        self, log, fields_list, read_values, fields_to_exclude
+    ):
+        """Return the values of the lines logging the fields filled on a
+        'read' operation.
+        """
+        vals_list = []
         fields_to_exclude = fields_to_exclude + FIELDS_BLACKLIST
         for field_name in fields_list:
             if field_name in fields_to_exclude:
@@ -590,8 +904,10 @@ class AuditlogRule(models.Model):
             field = self._get_field(log.model_id, field_name)
             # not all fields have an ir.models.field entry (ie. related fields)
             if field:
-                log_vals = self._prepare_log_line_vals_on_read(log, field, read_values)
-                log_line_model.create(log_vals)
+                vals_list.append(
+                    self._prepare_log_line_vals_on_read(log, field, read_values)
+                )
+        return vals_list
 
     def _prepare_log_line_vals_on_read(self, log, field, read_values):
         """Prepare the dictionary of values used to create a log line on a
@@ -615,8 +931,23 @@ class AuditlogRule(models.Model):
     def _create_log_line_on_write(
         self, log, fields_list, old_values, new_values, fields_to_exclude
     ):
-        """Log field updated on a 'write' operation."""
-        log_line_model = self.env["auditlog.log.line"]
+        """Log field updated on a 'write' operation.
+
+        Kept for compatibility, see _get_log_lines_vals_on_write().
+        """
+        self.env["auditlog.log.line"]._bulk_create(
+            self._get_log_lines_vals_on_write(
+                log, fields_list, old_values, new_values, fields_to_exclude
+            )
+        )
+
+    def _get_log_lines_vals_on_write(
+        self, log, fields_list, old_values, new_values, fields_to_exclude
+    ):
+        """Return the values of the lines logging the fields updated on a
+        'write' operation.
+        """
+        vals_list = []
         fields_to_exclude = fields_to_exclude + FIELDS_BLACKLIST
         for field_name in fields_list:
             if field_name in fields_to_exclude:
@@ -624,10 +955,12 @@ class AuditlogRule(models.Model):
             field = self._get_field(log.model_id, field_name)
             # not all fields have an ir.models.field entry (ie. related fields)
             if field:
-                log_vals = self._prepare_log_line_vals_on_write(
-                    log, field, old_values, new_values
+                vals_list.append(
+                    self._prepare_log_line_vals_on_write(
+                        log, field, old_values, new_values
+                    )
                 )
-                log_line_model.create(log_vals)
+        return vals_list
 
     def _prepare_log_line_vals_on_write(self, log, field, old_values, new_values):
         """Prepare the dictionary of values used to create a log line on a
@@ -667,8 +1000,23 @@ class AuditlogRule(models.Model):
     def _create_log_line_on_create(
         self, log, fields_list, new_values, fields_to_exclude
     ):
-        """Log field filled on a 'create' operation."""
-        log_line_model = self.env["auditlog.log.line"]
+        """Log field filled on a 'create' operation.
+
+        Kept for compatibility, see _get_log_lines_vals_on_create().
+        """
+        self.env["auditlog.log.line"]._bulk_create(
+            self._get_log_lines_vals_on_create(
+                log, fields_list, new_values, fields_to_exclude
+            )
+        )
+
+    def _get_log_lines_vals_on_create(
+        self, log, fields_list, new_values, fields_to_exclude
+    ):
+        """Return the values of the lines logging the fields filled on a
+        'create' operation.
+        """
+        vals_list = []
         fields_to_exclude = fields_to_exclude + FIELDS_BLACKLIST
         for field_name in fields_list:
             if field_name in fields_to_exclude:
@@ -676,8 +1024,10 @@ class AuditlogRule(models.Model):
             field = self._get_field(log.model_id, field_name)
             # not all fields have an ir.models.field entry (ie. related fields)
             if field:
-                log_vals = self._prepare_log_line_vals_on_create(log, field, new_values)
-                log_line_model.create(log_vals)
+                vals_list.append(
+                    self._prepare_log_line_vals_on_create(log, field, new_values)
+                )
+        return vals_list
 
     def _prepare_log_line_vals_on_create(self, log, field, new_values):
         """Prepare the dictionary of values used to create a log line on a
@@ -2,3 +2,7 @@
 from . import test_auditlog
 from . import test_autovacuum
 from . import test_auditrule
+from . import test_auditlog_bulk
+from . import test_auditlog_deferred
+from . import test_partition
+from . import test_read_window
@@ -0,0 +1,120 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import logging
+from unittest import mock
+
+from odoo.tests.common import TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+
+class TestAuditlogBulk(TransactionCase):
+    def setUp(self):
+        super(TestAuditlogBulk, self).setUp()
+        self.groups_model_id = self.env.ref("base.model_res_groups").id
+        self.groups_rule = self.env["auditlog.rule"].create(
+            {
+                "name": "testrule for groups",
+                "model_id": self.groups_model_id,
+                "log_read": False,
+                "log_create": True,
+                "log_write": True,
+                "log_unlink": True,
+                "log_type": "full",
+            }
+        )
+        self.groups_rule.subscribe()
+
+    def tearDown(self):
+        self.groups_rule.unlink()
+        super(TestAuditlogBulk, self).tearDown()
+
+    def _create_groups(self, nb_records):
+        return self.env["res.groups"].create(
+            [{"name": "bulk group %s" % i} for i in range(nb_records)]
+        )
+
+    def _count_write_statements(self, groups, vals):
+        groups.flush()
+        count = self.cr.sql_log_count
+        groups.write(vals)
+        groups.flush()
+        return self.cr.sql_log_count - count
+
+    def test_bulk_create_lines(self):
+        groups = self._create_groups(5)
+        logs = self.env["auditlog.log"].search(
+            [
+                ("model_id", "=", self.groups_model_id),
+                ("method", "=", "create"),
+                ("res_id", "in", groups.ids),
+            ]
+        )
+        self.assertEqual(len(logs), len(groups))
+        for log in logs:
+            group = groups.browse(log.res_id)
+            self.assertEqual(log.name, group.display_name)
+            self.assertEqual(log.model_model, "res.groups")
+            line = log.line_ids.filtered(lambda x: x.field_name == "name")
+            self.assertEqual(line.new_value, group.name)
+            self.assertEqual(line.field_description, "Name")
+
+    def test_bulk_write_lines(self):
+        groups = self._create_groups(5)
+        groups.write({"comment": "bulk comment"})
+        logs = self.env["auditlog.log"].search(
+            [
+                ("model_id", "=", self.groups_model_id),
+                ("method", "=", "write"),
+                ("res_id", "in", groups.ids),
+            ]
+        )
+        self.assertEqual(sorted(logs.mapped("res_id")), sorted(groups.ids))
+        for log in logs:
+            self.assertEqual(log.line_ids.mapped("field_name"), ["comment"])
+            self.assertFalse(log.line_ids.old_value)
+            self.assertEqual(log.line_ids.new_value, "bulk comment")
+            self.assertEqual(log.log_type, "full")
+            self.assertEqual(log.user_id, self.env.user)
+
+    def test_legacy_log_line_override(self):
+        """Overrides of the former _create_log_line_on_*() methods are still
+        called, and create the lines.
+        """
+        groups = self._create_groups(2)
+        rule_class = type(self.env["auditlog.rule"])
+        with mock.patch.object(
+            rule_class,
+            "_create_log_line_on_write",
+            autospec=True,
+            side_effect=rule_class._create_log_line_on_write,
+        ) as create_log_line:
+            groups.write({"comment": "legacy comment"})
+        self.assertEqual(create_log_line.call_count, len(groups))
+        logs = self.env["auditlog.log"].search(
+            [
+                ("model_id", "=", self.groups_model_id),
+                ("method", "=", "write"),
+                ("res_id", "in", groups.ids),
+            ]
+        )
+        self.assertEqual(logs.line_ids.mapped("new_value"), ["legacy comment"] * 2)
+
+    def test_benchmark_write_statements(self):
+        """The number of statements of an audited write does not depend on
+        the number of records written.
+        """
+        counts = {}
+        for nb_records in (1, 10, 100, 1000):
+            groups = self._create_groups(nb_records)
+            counts[nb_records] = self._count_write_statements(
+                groups, {"comment": "benchmark %s" % nb_records}
+            )
+        _logger.info(
+            "Statements per audited write: %s",
+            ", ".join(
+                "%s records: %s" % (nb_records, count)
+                for nb_records, count in counts.items()
+            ),
+        )
+        self.assertEqual(counts[10], counts[100])
+        self.assertEqual(counts[100], counts[1000])
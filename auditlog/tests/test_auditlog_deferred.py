@@ -0,0 +1,146 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+from datetime import date, datetime
+
+from odoo.tests.common import TransactionCase
+
+from ..models.log_queue import dumps, loads
+
+
+class TestAuditlogDeferred(TransactionCase):
+    def setUp(self):
+        super(TestAuditlogDeferred, self).setUp()
+        self.groups_model_id = self.env.ref("base.model_res_groups").id
+        self.log_model = self.env["auditlog.log"]
+
+    def _subscribe(self, log_flush):
+        rule = self.env["auditlog.rule"].create(
+            {
+                "name": "testrule for groups",
+                "model_id": self.groups_model_id,
+                "log_create": True,
+                "log_write": True,
+                "log_unlink": True,
+                "log_type": "full",
+                "log_flush": log_flush,
+                "capture_record": True,
+            }
+        )
+        rule.subscribe()
+        self.addCleanup(rule.unlink)
+        return rule
+
+    def _search_logs(self, group, method):
+        return self.log_model.search(
+            [
+                ("model_id", "=", self.groups_model_id),
+                ("method", "=", method),
+                ("res_id", "=", group.id),
+            ]
+        )
+
+    def test_flush_at_commit(self):
+        self._subscribe("commit")
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        group.write({"comment": "deferred"})
+        self.assertFalse(self._search_logs(group, "create"))
+        self.assertFalse(self._search_logs(group, "write"))
+        self.env.cr.precommit.run()
+        self.assertEqual(len(self._search_logs(group, "create")), 1)
+        log = self._search_logs(group, "write")
+        self.assertEqual(log.line_ids.mapped("field_name"), ["comment"])
+        self.assertEqual(log.line_ids.new_value, "deferred")
+
+    def test_flush_unlink_at_commit(self):
+        self._subscribe("commit")
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        group.unlink()
+        self.env.cr.precommit.run()
+        log = self._search_logs(group, "unlink")
+        self.assertEqual(log.name, "testgroup1")
+        self.assertTrue(log.line_ids)
+
+    def test_flush_create_unlink_at_commit(self):
+        self._subscribe("commit")
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        group.write({"comment": "deferred"})
+        group.unlink()
+        self.env.cr.precommit.run()
+        self.assertEqual(len(self._search_logs(group, "create")), 1)
+        self.assertEqual(len(self._search_logs(group, "write")), 1)
+        self.assertEqual(self._search_logs(group, "unlink").name, "testgroup1")
+
+    def test_flush_in_background_lines_date(self):
+        self._subscribe("cron")
+        queue_model = self.env["auditlog.log.queue"]
+        queue_model.search([]).unlink()
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        self.env.cr.precommit.run()
+        # the cron runs on the next month
+        self.env.cr.execute(
+            "UPDATE auditlog_log_queue SET create_date = create_date - interval '40 days'"
+        )
+        queue_model.invalidate_cache()
+        queue_model.process_queue()
+        log = self._search_logs(group, "create")
+        self.assertTrue(log.line_ids)
+        self.assertEqual(set(log.line_ids.mapped("create_date")), {log.create_date})
+
+    def test_flush_create_unlink_in_background(self):
+        self._subscribe("cron")
+        queue_model = self.env["auditlog.log.queue"]
+        queue_model.search([]).unlink()
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        group.write({"comment": "deferred"})
+        group.unlink()
+        self.env.cr.precommit.run()
+        queue_model.process_queue()
+        self.assertFalse(queue_model.search_count([]))
+        self.assertEqual(len(self._search_logs(group, "create")), 1)
+        self.assertEqual(len(self._search_logs(group, "write")), 1)
+        self.assertEqual(self._search_logs(group, "unlink").name, "testgroup1")
+
+    def test_flush_in_background_unsubscribed(self):
+        rule = self._subscribe("cron")
+        queue_model = self.env["auditlog.log.queue"]
+        queue_model.search([]).unlink()
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        self.env.cr.precommit.run()
+        rule.unsubscribe()
+        queue_model.process_queue()
+        self.assertFalse(queue_model.search_count([]))
+        self.assertFalse(self._search_logs(group, "create"))
+
+    def test_discard_on_rollback(self):
+        self._subscribe("commit")
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        self.env.cr.precommit.clear()
+        self.env.cr.precommit.run()
+        self.assertFalse(self._search_logs(group, "create"))
+
+    def test_flush_in_background(self):
+        self._subscribe("cron")
+        queue_model = self.env["auditlog.log.queue"]
+        queue_model.search([]).unlink()
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        self.env.cr.precommit.run()
+        self.assertFalse(self._search_logs(group, "create"))
+        self.assertEqual(queue_model.search_count([]), 1)
+        queue_model.process_queue()
+        log = self._search_logs(group, "create")
+        self.assertEqual(len(log), 1)
+        self.assertEqual(log.user_id, self.env.user)
+        self.assertIn("name", log.line_ids.mapped("field_name"))
+        self.assertFalse(queue_model.search_count([]))
+
+    def test_queue_encoding(self):
+        values = {
+            1: {
+                "name": "test",
+                "partner_id": (3, "Partner"),
+                "tag_ids": [1, 2],
+                "date": date(2021, 1, 1),
+                "datetime": datetime(2021, 1, 1, 12, 30),
+                "active": False,
+            }
+        }
+        self.assertEqual(loads(dumps(values)), values)
@@ -39,3 +39,38 @@ class TestAuditlogRule(TransactionCase):
         action_id = groups_rule.action_id
         groups_rule.subscribe()
         self.assertEqual(groups_rule.action_id, action_id)
+
+    def test_metadata_cache(self):
+        """Rules and fields metadata are loaded at once, and refreshed when
+        rules are updated"""
+        rule_model = self.env["auditlog.rule"]
+        users_rule = rule_model.create(
+            {
+                "name": "testrule for users",
+                "model_id": self.env.ref("base.model_res_users").id,
+                "log_type": "full",
+            }
+        )
+        users_rule.subscribe()
+        phone_ids = (
+            self.env["ir.model.fields"]
+            .search(
+                [("model", "in", ["res.users", "res.partner"]), ("name", "=", "phone")]
+            )
+            .ids
+        )
+        metadata = rule_model._get_auditlog_metadata()["res.users"]
+        self.assertEqual(metadata["fields_to_exclude"], [])
+        self.assertFalse(metadata["capture_record"])
+        # fields inherited by delegation are found
+        self.assertIn(metadata["fields"]["phone"]["id"], phone_ids)
+        self.assertEqual(metadata["fields"]["partner_id"]["relation"], "res.partner")
+        users_login = self.env.ref("base.field_res_users__login")
+        users_rule.write(
+            {"fields_to_exclude_ids": [(4, users_login.id)], "capture_record": True}
+        )
+        metadata = rule_model._get_auditlog_metadata()["res.users"]
+        self.assertEqual(metadata["fields_to_exclude"], ["login"])
+        self.assertTrue(metadata["capture_record"])
+        users_rule.unlink()
+        self.assertNotIn("res.users", rule_model._get_auditlog_metadata())
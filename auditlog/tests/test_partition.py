@@ -0,0 +1,114 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import logging
+import time
+from datetime import datetime, timedelta
+
+from odoo.tests.common import TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+
+class TestAuditlogPartition(TransactionCase):
+    def setUp(self):
+        super(TestAuditlogPartition, self).setUp()
+        self.env.cr.execute("SHOW server_version_num")
+        if int(self.env.cr.fetchone()[0]) < 120000:
+            self.skipTest("Partitioned tables require PostgreSQL 12")
+        self.partition_model = self.env["auditlog.partition"]
+        self.groups_model_id = self.env.ref("base.model_res_groups").id
+        self.groups_rule = self.env["auditlog.rule"].create(
+            {
+                "name": "testrule for groups",
+                "model_id": self.groups_model_id,
+                "log_create": True,
+                "log_write": True,
+                "log_unlink": True,
+                "log_type": "full",
+            }
+        )
+        self.groups_rule.subscribe()
+        # the tables are partitioned within the rolled back transaction
+        self.addCleanup(self.partition_model.clear_caches)
+
+    def tearDown(self):
+        self.groups_rule.unlink()
+        super(TestAuditlogPartition, self).tearDown()
+
+    def _search_logs(self, groups):
+        return self.env["auditlog.log"].search(
+            [("model_id", "=", self.groups_model_id), ("res_id", "in", groups.ids)]
+        )
+
+    def _create_logs(self, nb_records):
+        groups = self.env["res.groups"].create(
+            [{"name": "partitioned group %s" % i} for i in range(nb_records)]
+        )
+        groups.write({"comment": "partitioned"})
+        return groups
+
+    def test_enable_partitioning(self):
+        group = self._create_logs(1)
+        logs = self._search_logs(group)
+        self.assertTrue(self.partition_model.enable_partitioning())
+        self.assertFalse(self.partition_model.enable_partitioning())
+        for model in ("auditlog.log", "auditlog.log.line"):
+            table = self.env[model]._table
+            self.assertTrue(self.partition_model._is_partitioned(table))
+            names = [name for name, __ in self.partition_model._get_partitions(table)]
+            self.assertEqual(names[0], "%s_legacy" % table)
+            self.assertEqual(names[-1], "%s_default" % table)
+        # existing logs are kept, new ones are stored in the new partitions
+        self.env["base"].invalidate_cache()
+        self.assertEqual(self._search_logs(group), logs)
+        group.write({"comment": "partitioned again"})
+        self.assertEqual(len(self._search_logs(group)), len(logs) + 1)
+        self.assertTrue(
+            self.env["auditlog.log.line.view"].search(
+                [("res_id", "=", group.id), ("new_value", "=", "partitioned again")]
+            )
+        )
+        # lines are removed with their log without foreign key
+        line_ids = logs.line_ids.ids
+        logs.unlink()
+        self.assertFalse(self.env["auditlog.log.line"].search([("id", "in", line_ids)]))
+
+    def test_drop_partitions(self):
+        group = self._create_logs(1)
+        self.partition_model.enable_partitioning()
+        self.assertEqual(
+            self.partition_model.drop_partitions(datetime.now() - timedelta(days=1)),
+            0,
+        )
+        self.assertTrue(self._search_logs(group))
+        deadline = self.partition_model._month_start(months=4)
+        self.assertTrue(self.partition_model.drop_partitions(deadline))
+        self.assertFalse(self._search_logs(group))
+        # the default partitions are kept
+        self.partition_model.create_partitions()
+        group.write({"comment": "after vacuum"})
+        self.assertTrue(self._search_logs(group))
+
+    def test_benchmark_vacuum(self):
+        """Compare the time spent by the autovacuum to delete logs with and
+        without partitioned tables.
+        """
+        nb_records = 500
+        self._create_logs(nb_records)
+        # Milliseconds are ignored by autovacuum
+        time.sleep(1)
+        start = time.time()
+        self.env["auditlog.autovacuum"].autovacuum(days=0)
+        unlink_duration = time.time() - start
+        groups = self._create_logs(nb_records)
+        self.partition_model.enable_partitioning()
+        start = time.time()
+        self.partition_model.drop_partitions(self.partition_model._month_start(4))
+        drop_duration = time.time() - start
+        self.assertFalse(self._search_logs(groups))
+        _logger.info(
+            "Autovacuum of %s created and updated records: "
+            "%.3fs by deleting logs, %.3fs by dropping partitions",
+            nb_records,
+            unlink_duration,
+            drop_duration,
+        )
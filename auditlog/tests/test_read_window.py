@@ -0,0 +1,64 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+from odoo.tests.common import TransactionCase
+
+
+class TestAuditlogReadWindow(TransactionCase):
+    def setUp(self):
+        super(TestAuditlogReadWindow, self).setUp()
+        self.groups_model_id = self.env.ref("base.model_res_groups").id
+        self.groups = self.env["res.groups"].create(
+            [{"name": "testgroup1"}, {"name": "testgroup2"}]
+        )
+
+    def _subscribe(self, log_read_window):
+        rule = self.env["auditlog.rule"].create(
+            {
+                "name": "testrule for groups",
+                "model_id": self.groups_model_id,
+                "log_read": True,
+                "log_create": False,
+                "log_write": False,
+                "log_unlink": False,
+                "log_read_window": log_read_window,
+            }
+        )
+        rule.subscribe()
+        self.addCleanup(rule.unlink)
+        return rule
+
+    def _search_read_logs(self):
+        return self.env["auditlog.log"].search(
+            [
+                ("model_id", "=", self.groups_model_id),
+                ("method", "=", "read"),
+                ("res_id", "in", self.groups.ids),
+            ]
+        )
+
+    def test_count_identical_reads(self):
+        self._subscribe(3600)
+        for __ in range(5):
+            self.groups.read(["name"])
+        logs = self._search_read_logs()
+        self.assertEqual(len(logs), 2)
+        self.assertEqual(logs.mapped("read_count"), [5, 5])
+        # reading other fields is logged again
+        self.groups[0].read(["name", "comment"])
+        self.assertEqual(len(self._search_read_logs()), 3)
+
+    def test_count_rolled_back_reads(self):
+        self._subscribe(3600)
+        self.groups.read(["name"])
+        self._search_read_logs().unlink()
+        self.groups.read(["name"])
+        logs = self._search_read_logs()
+        self.assertEqual(len(logs), 2)
+        self.assertEqual(logs.mapped("read_count"), [1, 1])
+
+    def test_log_every_read(self):
+        self._subscribe(0)
+        for __ in range(3):
+            self.groups.read(["name"])
+        logs = self._search_read_logs()
+        self.assertEqual(len(logs), 6)
+        self.assertEqual(set(logs.mapped("read_count")), {1})
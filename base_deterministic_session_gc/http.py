@@ -6,11 +6,19 @@ import os
 import time
 from datetime import datetime
 
+from werkzeug.contrib.sessions import FilesystemSessionStore
+
 from odoo import http
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT, config
+from odoo.tools.func import lazy_property
 
 _logger = logging.getLogger(__name__)
 
+# Length of the prefix of the session ids naming the subdirectories of the
+# session files
+SHARD_LENGTH = 2
+SHARDS = ["%02x" % i for i in range(16**SHARD_LENGTH)]
+
 
 old_session_gc = http.session_gc
 
@@ -19,24 +27,145 @@ def session_gc(session_store):
     return
 
 
-def deterministic_session_gc(session_store, session_expiry_delay=None):
+class ShardedFilesystemSessionStore(FilesystemSessionStore):
+    """Filesystem session store keeping the file of each session in the
+    subdirectory named after the first characters of its id, so that the
+    garbage collection can process the sessions one subdirectory at a time.
+
+    The files stored directly in the directory by the standard store are
+    moved to their subdirectory when their session is read.
+    """
+
+    def get_session_filename(self, sid):
+        return os.path.join(self.path, sid[:SHARD_LENGTH], self.filename_template % sid)
+
+    def save(self, session):
+        # the standard store silently drops the session if the directory of
+        # its file does not exist
+        os.makedirs(
+            os.path.dirname(self.get_session_filename(session.sid)), exist_ok=True
+        )
+        return super().save(session)
+
+    def get(self, sid):
+        if self.is_valid_key(sid):
+            self._move_unsharded_session(sid)
+        return super().get(sid)
+
+    def _move_unsharded_session(self, sid):
+        path = os.path.join(self.path, self.filename_template % sid)
+        new_path = self.get_session_filename(sid)
+        try:
+            os.makedirs(os.path.dirname(new_path), exist_ok=True)
+            os.replace(path, new_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            _logger.debug(e)
+
+    def list(self):
+        before, after = self.filename_template.split("%s", 1)
+        sids = []
+        for directory in SHARDS + ["."]:
+            try:
+                names = os.listdir(os.path.join(self.path, directory))
+            except FileNotFoundError:
+                continue
+            sids += [
+                name[len(before) : len(name) - len(after)]
+                for name in names
+                if name.startswith(before) and name.endswith(after)
+            ]
+        return sids
+
+
+def _gc_directory(path, expired_time):
+    """Delete the files of ``path`` not modified since ``expired_time``, while
+    listing the directory. Return the number of deleted files.
+    """
+    count = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if (
+                        entry.is_file(follow_symlinks=False)
+                        and entry.stat(follow_symlinks=False).st_mtime < expired_time
+                    ):
+                        os.unlink(entry.path)
+                        count += 1
+                except OSError as e:
+                    _logger.debug(e)
+    except FileNotFoundError:
+        pass
+    return count
+
+
+def deterministic_session_gc(
+    session_store, session_expiry_delay=None, max_duration=None, resume_from=None
+):
+    """Delete the sessions inactive for ``session_expiry_delay`` seconds.
+
+    The subdirectories of a ``ShardedFilesystemSessionStore`` are processed
+    one after the other, from ``resume_from``, then the files stored directly
+    in the directory. No other subdirectory is started once ``max_duration``
+    seconds have elapsed, so that each call makes progress. Return the number of deleted sessions and the
+    subdirectory to resume from on the next call, or ``None`` when all of
+    them have been processed.
+    """
     if session_expiry_delay is None:
         session_expiry_delay = config.get("session_expiry_delay", 60 * 60 * 24 * 7)
-    expired_time = time.time() - int(session_expiry_delay)
+    if hasattr(session_store, "gc"):
+        # sessions not stored on the filesystem, like with session_db
+        return session_store.gc(session_expiry_delay=int(session_expiry_delay)), None
+    start = time.time()
+    expired_time = start - int(session_expiry_delay)
     _logger.debug(
         "Deleting all sessions inactive since %s",
         datetime.fromtimestamp(expired_time).strftime(DEFAULT_SERVER_DATETIME_FORMAT),
     )
-    for fname in os.listdir(session_store.path):
-        path = os.path.join(session_store.path, fname)
-        try:
-            if os.path.getmtime(path) < expired_time:
-                os.unlink(path)
-        except OSError as e:
-            _logger.debug(e)
+    directories = ["."]
+    if isinstance(session_store, ShardedFilesystemSessionStore):
+        directories = SHARDS + directories
+    if resume_from in directories:
+        directories = directories[directories.index(resume_from) :]
+    count = 0
+    next_directory = None
+    for index, directory in enumerate(directories):
+        count += _gc_directory(
+            os.path.join(session_store.path, directory), expired_time
+        )
+        if max_duration and time.time() - start > max_duration:
+            next_directory = (directories[index + 1 :] or [None])[0]
+            break
+    _logger.info(
+        "%s expired sessions deleted in %.3fs%s",
+        count,
+        time.time() - start,
+        next_directory and ", to be resumed from %s" % next_directory or "",
+    )
+    return count, next_directory
+
+
+_original_session_store = http.root.__class__.session_store
+
+
+@lazy_property
+def session_store(self):
+    store = _original_session_store.__get__(self, self.__class__)
+    if type(store) is FilesystemSessionStore:
+        store = ShardedFilesystemSessionStore(
+            store.path,
+            session_class=store.session_class,
+            renew_missing=store.renew_missing,
+        )
+    return store
 
 
 if "base_deterministic_session_gc" in config.get("server_wide_modules"):
     _logger.debug("Disabling default session_gc")
     http.session_gc = session_gc
     http.deterministic_session_gc = deterministic_session_gc
+    http.root.__class__.session_store = session_store
+    # Reset the lazy property cache
+    vars(http.root).pop("session_store", None)
@@ -0,0 +1,11 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    # the garbage collection now resumes from a subdirectory, not a file
+    cr.execute(
+        "DELETE FROM ir_config_parameter WHERE key = %s",
+        ("base_deterministic_session_gc.resume_after",),
+    )
@@ -3,6 +3,9 @@
 
 from odoo import api, http, models
 from odoo.exceptions import AccessDenied
+from odoo.tools import config
+
+GC_RESUME_PARAM = "base_deterministic_session_gc.resume_from"
 
 
 class AutoVacuum(models.AbstractModel):
@@ -20,6 +23,16 @@ class AutoVacuum(models.AbstractModel):
         if not self.env.user._is_admin():
             raise AccessDenied()
 
-        http.deterministic_session_gc(http.root.session_store, session_expiry_delay)
+        params = self.env["ir.config_parameter"].sudo()
+        resume_from = params.get_param(GC_RESUME_PARAM) or None
+        __, next_directory = http.deterministic_session_gc(
+            http.root.session_store,
+            session_expiry_delay,
+            max_duration=int(config.get("session_gc_max_duration", 0)),
+            resume_from=resume_from,
+        )
+        if next_directory or resume_from:
+            # resume where this run stopped on the next one
+            params.set_param(GC_RESUME_PARAM, next_directory or False)
 
         return True
@@ -5,7 +5,7 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
 {
     "name": "Exception Rule",
-    "version": "14.0.2.1.0",
+    "version": "14.0.2.4.4",
     "category": "Generic Modules",
     "summary": """
     This module provide an abstract model to manage customizable
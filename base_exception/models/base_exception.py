@@ -7,13 +7,58 @@
 import html
 import logging
 
-from odoo import _, api, fields, models
-from odoo.exceptions import UserError, ValidationError
+from psycopg2 import OperationalError
+from werkzeug.exceptions import HTTPException
+
+from odoo import _, api, fields, models, tools
+from odoo.exceptions import RedirectWarning, UserError, ValidationError
+from odoo.http import AuthenticationError
 from odoo.osv import expression
-from odoo.tools.safe_eval import safe_eval
+from odoo.tools.lru import LRU
+from odoo.tools.safe_eval import (
+    _BUILTINS,
+    _SAFE_OPCODES,
+    check_values,
+    safe_eval,
+    test_expr,
+    unsafe_eval,
+)
 
 _logger = logging.getLogger(__name__)
 
+# Results of the rules with dependencies, for the values of their
+# dependencies on each record:
+# {(dbname, model, uid, su, company ids, rule key, id): (values, failed)}
+RULE_RESULTS = LRU(65536)
+
+
+# Exceptions raised as is by safe_eval, which raises the others as ValueError
+SAFE_EVAL_RAISED = (
+    UserError,
+    RedirectWarning,
+    HTTPException,
+    AuthenticationError,
+    OperationalError,
+    ZeroDivisionError,
+)
+
+
+def _safe_eval_compiled(expr, code, context):
+    """Evaluate ``code``, the python code ``expr`` compiled by ``test_expr``.
+
+    This deliberately mirrors ``safe_eval(expr, context, mode="exec",
+    nocopy=True)``, with the same checks of the context and the same
+    exceptions, but without checking and compiling ``expr`` again.
+    """
+    check_values(context)
+    context["__builtins__"] = _BUILTINS
+    try:
+        unsafe_eval(code, context)
+    except SAFE_EVAL_RAISED:
+        raise
+    except Exception as e:
+        raise ValueError('%s: "%s" while evaluating\n%r' % (type(e), e, expr))
+
 
 class ExceptionRule(models.Model):
     _name = "exception.rule"
@@ -31,12 +76,16 @@ class ExceptionRule(models.Model):
         selection=[
             ("by_domain", "By domain"),
             ("by_py_code", "By python code"),
+            ("by_py_code_batch", "By python code on all records"),
             ("by_method", "By method"),
         ],
         string="Exception Type",
         required=True,
         default="by_py_code",
         help="By python code: allow to define any arbitrary check\n"
+        "By python code on all records: same as by python code, but the\n"
+        "           code is evaluated once with all the checked records\n"
+        "           and sets failed to the records in exception\n"
         "By domain: limited to a selection by an odoo domain:\n"
         "           performance can be better when exceptions"
         "           are evaluated with several records\n"
@@ -54,12 +103,22 @@ class ExceptionRule(models.Model):
         string="Is blocking",
         help="When checked the exception can not be ignored",
     )
+    depends_on = fields.Char(
+        string="Depends On",
+        help="Comma-separated fields read by the rule, as paths from the "
+        "checked records (e.g. partner_id.zip, line_ids.amount). When set, "
+        "the rule is only evaluated again on the records whose values of "
+        "these fields changed. Inferred from the domain of domain rules.",
+    )
 
-    @api.constrains("exception_type", "domain", "code", "model")
+    @api.constrains("exception_type", "domain", "code", "model", "depends_on")
     def check_exception_type_consistency(self):
         for rule in self:
             if (
-                (rule.exception_type == "by_py_code" and not rule.code)
+                (
+                    rule.exception_type in ("by_py_code", "by_py_code_batch")
+                    and not rule.code
+                )
                 or (rule.exception_type == "by_domain" and not rule.domain)
                 or (rule.exception_type == "by_method" and not rule.method)
             ):
@@ -70,12 +129,64 @@ class ExceptionRule(models.Model):
                         "type."
                     )
                 )
+            if rule.depends_on:
+                for path in rule._get_depends():
+                    model = self.env[rule.model]
+                    for name in path.split("."):
+                        field = model._fields.get(name)
+                        if not field:
+                            raise ValidationError(
+                                _(
+                                    "The field %s of the dependency %s of the "
+                                    "exception rule %s does not exist on %s.",
+                                    name,
+                                    path,
+                                    rule.name,
+                                    model._name,
+                                )
+                            )
+                        if field.relational:
+                            model = self.env[field.comodel_name]
 
     def _get_domain(self):
         """override me to customize domains according exceptions cases"""
         self.ensure_one()
         return safe_eval(self.domain)
 
+    def _get_depends(self):
+        """Return the paths of the fields read by the rule, or an empty
+        list if they are unknown and the rule must always be evaluated.
+        """
+        self.ensure_one()
+        if self.depends_on:
+            return [path.strip() for path in self.depends_on.split(",")]
+        if self.exception_type == "by_domain":
+            return [
+                term[0]
+                for term in self._get_domain()
+                if expression.is_leaf(term) and isinstance(term[0], str)
+            ]
+        return []
+
+    def _get_results_key(self):
+        """Return the key of the results of this version of the rule"""
+        self.ensure_one()
+        return (
+            self.id,
+            self.exception_type,
+            self.code,
+            self.method,
+            self.depends_on,
+            str(self._get_domain()) if self.exception_type == "by_domain" else "",
+        )
+
+    @tools.ormcache("self.code")
+    def _get_compiled_code(self):
+        """Return the python code of the rule checked and compiled as
+        safe_eval does, once per version of the code.
+        """
+        return test_expr(self.code, _SAFE_OPCODES, mode="exec")
+
 
 class BaseExceptionMethod(models.AbstractModel):
     _name = "base.exception.method"
@@ -105,44 +216,80 @@ class BaseExceptionMethod(models.AbstractModel):
         Exception ids are also written on records
         """
         rules = self.env["exception.rule"].sudo().search(self._rule_domain())
+        main_records = self._get_main_records()
+        # the domain rules on this model are all checked within one query,
+        # unless the exceptions are written on other records: the results of
+        # _detect_exceptions() are then mapped to them by an override
+        domain_rules = rules.browse()
+        if main_records._name == self._name:
+            domain_rules = rules.filtered(
+                lambda r: r.exception_type == "by_domain" and r.model == self._name
+            )
+        domain_results = self._detect_exceptions_by_domains(domain_rules)
         all_exception_ids = []
-        rules_to_remove = {}
-        rules_to_add = {}
+        to_remove = []
+        to_add = []
         for rule in rules:
-            records_with_exception = self._detect_exceptions(rule)
-            reverse_field = self._reverse_field()
-            main_records = self._get_main_records()
-            commons = main_records & rule[reverse_field]
-            to_remove = commons - records_with_exception
-            to_add = records_with_exception - commons
+            if rule in domain_rules:
+                records_with_exception = domain_results[rule.id]
+            else:
+                records_with_exception = self._detect_exceptions_with_depends(rule)
             # we expect to always work on the same model type
-            if rule.id not in rules_to_remove:
-                rules_to_remove[rule.id] = main_records.browse()
-            rules_to_remove[rule.id] |= to_remove
-            if rule.id not in rules_to_add:
-                rules_to_add[rule.id] = main_records.browse()
-            rules_to_add[rule.id] |= to_add
+            commons = main_records.filtered(lambda r: rule in r.exception_ids)
+            to_remove += [(rec.id, rule.id) for rec in commons - records_with_exception]
+            to_add += [(rec.id, rule.id) for rec in records_with_exception - commons]
             if records_with_exception:
                 all_exception_ids.append(rule.id)
-        # Cumulate all the records to attach to the rule
-        # before linking. We don't want to call "rule.write()"
-        # which would:
+        # Cumulate all the records to attach to the rules before linking
+        # them with one DELETE and one INSERT on the relation table. We don't
+        # want to call "rule.write()" which would:
         # * write on write_date so lock the exception.rule
         # * trigger the recomputation of "main_exception_id" on
         #   all the sale orders related to the rule, locking them all
         #   and preventing concurrent writes
-        # Reversing the write by writing on SaleOrder instead of
-        # ExceptionRule fixes the 2 kinds of unexpected locks.
-        # It should not result in more queries than writing on ExceptionRule:
-        # the "to remove" part generates one DELETE per rule on the relation
-        # table
-        # and the "to add" part generates one INSERT (with unnest) per rule.
-        for rule_id, records in rules_to_remove.items():
-            records.write({"exception_ids": [(3, rule_id)]})
-        for rule_id, records in rules_to_add.items():
-            records.write({"exception_ids": [(4, rule_id)]})
+        main_records._update_exception_ids(to_remove, to_add)
         return all_exception_ids
 
+    def _update_exception_ids(self, to_remove, to_add):
+        """Unlink and link the exceptions rules of the records, given as
+        lists of (record id, rule id), with one query each.
+        """
+        if not (to_remove or to_add):
+            return
+        field = self._fields["exception_ids"]
+        self.flush([field.name])
+        self.env["exception.rule"].flush([self._reverse_field()])
+        cr = self.env.cr
+        if to_remove:
+            record_ids, rule_ids = zip(*to_remove)
+            cr.execute(
+                """
+                DELETE FROM "{0}" AS rel
+                USING unnest(%s::int[], %s::int[]) AS pair(record_id, rule_id)
+                WHERE rel."{1}" = pair.record_id AND rel."{2}" = pair.rule_id
+                """.format(
+                    field.relation, field.column1, field.column2
+                ),
+                (list(record_ids), list(rule_ids)),
+            )
+        if to_add:
+            record_ids, rule_ids = zip(*to_add)
+            cr.execute(
+                """
+                INSERT INTO "{0}" ("{1}", "{2}")
+                SELECT * FROM unnest(%s::int[], %s::int[])
+                ON CONFLICT DO NOTHING
+                """.format(
+                    field.relation, field.column1, field.column2
+                ),
+                (list(record_ids), list(rule_ids)),
+            )
+        records = self.browse({record_id for record_id, __ in to_remove + to_add})
+        records.invalidate_cache([field.name], records.ids)
+        self.env["exception.rule"].invalidate_cache([self._reverse_field()])
+        # recompute the fields depending on the exceptions
+        records.modified([field.name])
+
     @api.model
     def _exception_rule_eval_context(self, rec):
         return {
@@ -153,12 +300,9 @@ class BaseExceptionMethod(models.AbstractModel):
 
     @api.model
     def _rule_eval(self, rule, rec):
-        expr = rule.code
         space = self._exception_rule_eval_context(rec)
         try:
-            safe_eval(
-                expr, space, mode="exec", nocopy=True
-            )  # nocopy allows to return 'result'
+            _safe_eval_compiled(rule.code, rule._get_compiled_code(), space)
         except Exception as e:
             _logger.exception(e)
             raise UserError(
@@ -170,9 +314,86 @@ class BaseExceptionMethod(models.AbstractModel):
             )
         return space.get("failed", False)
 
+    def _get_depends_values(self, depends):
+        self.ensure_one()
+        values = []
+        for path in depends:
+            value = self.mapped(path)
+            values.append(value.ids if isinstance(value, models.BaseModel) else value)
+        return values
+
+    def _get_depends_results_key(self, rule):
+        """Return the key of the results of @rule on the records, for the
+        user and the companies the record rules applied with.
+        """
+        return (
+            self.env.cr.dbname,
+            self._name,
+            self.env.uid,
+            self.env.su,
+            tuple(self.env.companies.ids),
+            rule._get_results_key(),
+        )
+
+    def _get_depends_results(self, rule):
+        """Return the values of the dependencies of @rule on the records, by
+        record id, and the records on which they did not change since the
+        last evaluation of the rule, with those of them in exception.
+        """
+        depends = rule._get_depends()
+        if not depends:
+            return {}, self.browse(), self.browse()
+        # the records checked also depend on the base domain
+        depends += [
+            term[0]
+            for term in self._get_base_domain()
+            if expression.is_leaf(term) and term[0] != "id"
+        ]
+        key = self._get_depends_results_key(rule)
+        values = {rec.id: rec._get_depends_values(depends) for rec in self}
+        results = {rec.id: RULE_RESULTS.get(key + (rec.id,)) for rec in self}
+        unchanged = self.filtered(
+            lambda rec: results[rec.id] and results[rec.id][0] == values[rec.id]
+        )
+        cached = unchanged.filtered(lambda rec: results[rec.id][1])
+        return values, unchanged, cached
+
+    def _set_depends_results(self, rule, values, records_with_exception):
+        """Keep the result of @rule on the records, for the @values of its
+        dependencies returned by _get_depends_results().
+        """
+        if not values:
+            return
+        key = self._get_depends_results_key(rule)
+        for rec in self:
+            RULE_RESULTS[key + (rec.id,)] = (
+                values[rec.id],
+                rec in records_with_exception,
+            )
+
+    def _detect_exceptions_with_depends(self, rule):
+        """
+        Find exceptions found on self, evaluating the rule only on the
+        records whose values of its dependencies changed since its last
+        evaluation. The previous result is reused on the others.
+        """
+        values, unchanged, cached = self._get_depends_results(rule)
+        changed = self - unchanged
+        records_with_exception = changed._detect_exceptions(rule)
+        if records_with_exception._name != self._name:
+            # the rule finds exceptions on other records, such as the main
+            # records: its results can not be kept
+            if unchanged:
+                return self._detect_exceptions(rule)
+            return records_with_exception
+        changed._set_depends_results(rule, values, records_with_exception)
+        return records_with_exception | cached
+
     def _detect_exceptions(self, rule):
         if rule.exception_type == "by_py_code":
             return self._detect_exceptions_by_py_code(rule)
+        elif rule.exception_type == "by_py_code_batch":
+            return self._detect_exceptions_by_py_code_batch(rule)
         elif rule.exception_type == "by_domain":
             return self._detect_exceptions_by_domain(rule)
         elif rule.exception_type == "by_method":
@@ -193,6 +414,30 @@ class BaseExceptionMethod(models.AbstractModel):
                 records_with_exception |= record
         return records_with_exception
 
+    def _detect_exceptions_by_py_code_batch(self, rule):
+        """
+        Find exceptions found on self, evaluating the code of the rule once
+        with all the records.
+        """
+        domain = self._get_base_domain()
+        records = self.search(domain)
+        if not records:
+            return records
+        failed = self._rule_eval(rule, records)
+        if not failed:
+            return records.browse()
+        if not isinstance(failed, models.BaseModel) or failed._name != self._name:
+            raise UserError(
+                _(
+                    "The exception rule %s must set 'failed' to the %s records "
+                    "in exception, not to %r.",
+                    rule.name,
+                    self._name,
+                    failed,
+                )
+            )
+        return records & failed
+
     def _detect_exceptions_by_domain(self, rule):
         """
         Find exceptions found on self.
@@ -202,6 +447,46 @@ class BaseExceptionMethod(models.AbstractModel):
         domain = expression.AND([base_domain, rule_domain])
         return self.search(domain)
 
+    def _detect_exceptions_by_domains(self, rules):
+        """
+        Find exceptions found on self for all the domain @rules, within one
+        query. Return the records in exception by rule id.
+        """
+        results = {}
+        to_check = {}
+        base_domain = self._get_base_domain()
+        subqueries = []
+        params = []
+        for rule in rules:
+            values, unchanged, cached = self._get_depends_results(rule)
+            results[rule.id] = cached
+            records = self - unchanged
+            if not records:
+                continue
+            to_check[rule] = (records, values)
+            domain = expression.AND(
+                [base_domain, [("id", "in", records.ids)], rule._get_domain()]
+            )
+            self._flush_search(domain)
+            query = self._where_calc(domain)
+            self._apply_ir_rules(query, "read")
+            query_str, query_params = query.select(
+                '"%s".id' % self._table, "%d" % rule.id
+            )
+            subqueries.append(query_str)
+            params += query_params
+        if not subqueries:
+            return results
+        self.env.cr.execute(" UNION ALL ".join(subqueries), params)
+        found = {rule.id: [] for rule in rules}
+        for record_id, rule_id in self.env.cr.fetchall():
+            found[rule_id].append(record_id)
+        for rule, (records, values) in to_check.items():
+            records_with_exception = self.browse(found[rule.id])
+            records._set_depends_results(rule, values, records_with_exception)
+            results[rule.id] |= records_with_exception
+        return results
+
     def _detect_exceptions_by_method(self, rule):
         """
         Find exceptions found on self.
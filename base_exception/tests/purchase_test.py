@@ -12,8 +12,14 @@ class ExceptionRule(models.Model):
         selection_add=[("exception_method_no_zip", "Purchase exception no zip")]
     )
     model = fields.Selection(
-        selection_add=[("base.exception.test.purchase", "Purchase Test")],
-        ondelete={"base.exception.test.purchase": "cascade"},
+        selection_add=[
+            ("base.exception.test.purchase", "Purchase Test"),
+            ("base.exception.test.purchase.line", "Purchase Line Test"),
+        ],
+        ondelete={
+            "base.exception.test.purchase": "cascade",
+            "base.exception.test.purchase.line": "cascade",
+        },
     )
     test_purchase_ids = fields.Many2many("base.exception.test.purchase")
 
@@ -81,6 +87,7 @@ class PurchaseTest(models.Model):
 
 
 class LineTest(models.Model):
+    _inherit = "base.exception.method"
     _name = "base.exception.test.purchase.line"
     _description = "Base Exception Test Model Line"
 
@@ -88,3 +95,16 @@ class LineTest(models.Model):
     lead_id = fields.Many2one("base.exception.test.purchase", ondelete="cascade")
     qty = fields.Float()
     amount = fields.Float()
+
+    def _get_main_records(self):
+        return self.mapped("lead_id")
+
+    def _reverse_field(self):
+        return "test_purchase_ids"
+
+    def _get_base_domain(self):
+        return [("lead_id.ignore_exception", "=", False), ("id", "in", self.ids)]
+
+    def _detect_exceptions(self, rule):
+        records = super()._detect_exceptions(rule)
+        return records.mapped("lead_id")
@@ -2,6 +2,7 @@
 # Copyright 2020 Hibou Corp.
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
 
+from unittest import mock
 
 from odoo_test_helper import FakeModelLoader
 
@@ -55,6 +56,52 @@ class TestBaseException(SavepointCase):
             self.po.button_confirm()
         self.assertTrue(self.po.exception_ids)
 
+    def test_fail_by_py_batch(self):
+        self.exception_rule.write(
+            {
+                "code": "failed = self.filtered(lambda r: not r.partner_id.zip)",
+                "exception_type": "by_py_code_batch",
+            }
+        )
+        with self.assertRaises(ValidationError):
+            self.po.button_confirm()
+        self.assertTrue(self.po.exception_ids)
+        self.partner.zip = "1000"
+        self.po.button_confirm()
+        self.assertFalse(self.po.exception_ids)
+
+    def test_fail_by_py_batch_not_records(self):
+        self.exception_rule.write(
+            {"code": "failed = True", "exception_type": "by_py_code_batch"}
+        )
+        with self.assertRaises(UserError):
+            self.po.button_confirm()
+
+    def test_py_code_changed(self):
+        with self.assertRaises(ValidationError):
+            self.po.button_confirm()
+        # the code compiled for the previous version of the rule is not used
+        self.exception_rule.code = "failed = False"
+        self.po.button_confirm()
+        self.assertFalse(self.po.exception_ids)
+
+    def test_depends_on(self):
+        self.exception_rule.depends_on = "partner_id.zip"
+        self.po.detect_exceptions()
+        self.assertTrue(self.po.exception_ids)
+        # the rule is not evaluated again while the zip code did not change
+        with mock.patch.object(type(self.po), "_rule_eval", side_effect=AssertionError):
+            self.po.name = "Renamed"
+            self.po.detect_exceptions()
+        self.assertTrue(self.po.exception_ids)
+        self.partner.zip = "1000"
+        self.po.detect_exceptions()
+        self.assertFalse(self.po.exception_ids)
+
+    def test_depends_on_invalid(self):
+        with self.assertRaises(ValidationError):
+            self.exception_rule.depends_on = "partner_id.no_such_field"
+
     def test_fail_by_domain(self):
         self.exception_rule.write(
             {
@@ -66,6 +113,57 @@ class TestBaseException(SavepointCase):
             self.po.button_confirm()
         self.assertTrue(self.po.exception_ids)
 
+    def test_fail_by_domains(self):
+        self.exception_rule.write(
+            {
+                "domain": "[('partner_id.zip', '=', False)]",
+                "exception_type": "by_domain",
+            }
+        )
+        rule2 = self.env["exception.rule"].create(
+            {
+                "name": "No responsible",
+                "sequence": 20,
+                "model": "base.exception.test.purchase",
+                "domain": "[('user_id', '=', False)]",
+                "exception_type": "by_domain",
+            }
+        )
+        po2 = self.po.copy({"user_id": self.env.user.id})
+        pos = self.po | po2
+        self.assertEqual(
+            set(pos.detect_exceptions()), {self.exception_rule.id, rule2.id}
+        )
+        self.assertEqual(self.po.exception_ids, self.exception_rule | rule2)
+        self.assertEqual(po2.exception_ids, self.exception_rule)
+        self.assertEqual(self.po.main_exception_id, self.exception_rule)
+        self.partner.zip = "1000"
+        self.assertEqual(pos.detect_exceptions(), [rule2.id])
+        self.assertEqual(self.po.exception_ids, rule2)
+        self.assertFalse(po2.exception_ids)
+        self.assertEqual(self.po.main_exception_id, rule2)
+
+    def test_fail_by_domain_on_lines(self):
+        self.exception_rule.active = False
+        rule = self.env["exception.rule"].create(
+            {
+                "name": "No quantity",
+                "sequence": 20,
+                "model": "base.exception.test.purchase.line",
+                "domain": "[('qty', '=', 0)]",
+                "exception_type": "by_domain",
+            }
+        )
+        lines = self.po.line_ids
+        self.assertEqual(lines.detect_exceptions(), [])
+        lines.qty = 0
+        # the exceptions found on the lines are written on their purchase
+        self.assertEqual(lines.detect_exceptions(), [rule.id])
+        self.assertEqual(self.po.exception_ids, rule)
+        lines.qty = 1
+        self.assertEqual(lines.detect_exceptions(), [])
+        self.assertFalse(self.po.exception_ids)
+
     def test_fail_by_method(self):
         self.exception_rule.write(
             {
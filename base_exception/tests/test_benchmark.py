@@ -0,0 +1,92 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
+
+import logging
+import time
+
+from odoo_test_helper import FakeModelLoader
+
+from odoo.tests import SavepointCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("-standard", "base_exception_benchmark")
+class TestBaseExceptionBenchmark(SavepointCase):
+    """Time the detection of exceptions on many records against many rules.
+
+    Not run by default, run with ``--test-tags base_exception_benchmark``.
+    """
+
+    nb_records = 2000
+    nb_rules = 40
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.loader = FakeModelLoader(cls.env, cls.__module__)
+        cls.loader.backup_registry()
+        from .purchase_test import ExceptionRule, LineTest, PurchaseTest
+
+        cls.loader.update_registry((ExceptionRule, LineTest, PurchaseTest))
+
+        partners = cls.env["res.partner"].create(
+            [{"name": "Foo", "zip": "1000"}, {"name": "Bar"}]
+        )
+        cls.records = cls.env["base.exception.test.purchase"].create(
+            [
+                {
+                    "name": "Purchase %s" % index,
+                    "partner_id": partners[index % 2].id,
+                    "line_ids": [(0, 0, {"name": "line", "amount": index, "qty": 1})],
+                }
+                for index in range(cls.nb_records)
+            ]
+        )
+        cls.rules = cls.env["exception.rule"].create(
+            [
+                {
+                    "name": "Rule %s" % index,
+                    "model": "base.exception.test.purchase",
+                    "exception_type": "by_py_code",
+                    "code": "failed = not self.partner_id.zip "
+                    "and self.amount_total > %s" % index,
+                }
+                for index in range(cls.nb_rules)
+            ]
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loader.restore_registry()
+        super().tearDownClass()
+
+    def _detect_exceptions(self):
+        self.env["base"].invalidate_cache()
+        start = time.time()
+        self.records.detect_exceptions()
+        duration = time.time() - start
+        return self.records.mapped(lambda r: len(r.exception_ids)), duration
+
+    def test_benchmark_detect_exceptions(self):
+        expected, by_record_time = self._detect_exceptions()
+        self.rules.write(
+            {
+                "exception_type": "by_py_code_batch",
+                "code": "failed = self.filtered(lambda self: "
+                "not self.partner_id.zip and self.amount_total > %s)",
+            }
+        )
+        for index, rule in enumerate(self.rules):
+            rule.code = rule.code % index
+        self.records.write({"exception_ids": [(5,)]})
+        result, batch_time = self._detect_exceptions()
+        _logger.info(
+            "Detect exceptions on %s records against %s rules: "
+            "%.2fs by record, %.2fs by batch",
+            len(self.records),
+            len(self.rules),
+            by_record_time,
+            batch_time,
+        )
+        self.assertEqual(result, expected)
@@ -3,7 +3,7 @@
 {
     "name": "Improved Name Search",
     "summary": "Friendlier search when typing in relation fields",
-    "version": "14.0.1.1.0",
+    "version": "14.0.1.2.0",
     "category": "Uncategorized",
     "website": "https://github.com/OCA/server-tools",
     "author": "Daniel Reis, Odoo Community Association (OCA), ADHOC SA",
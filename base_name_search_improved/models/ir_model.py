@@ -55,15 +55,73 @@ def _get_name_search_domain(self):
     return []
 
 
-def _extend_name_results(self, domain, results, limit, name_get_uid):
-    result_count = len(results)
-    if result_count < limit:
-        domain += [("id", "not in", results)]
-        rec_ids = self._search(
-            domain, limit=limit - result_count, access_rights_uid=name_get_uid
+def _get_name_search_domains(self, name, operator, base_domain):
+    """Domains of the smart name search strategies, by decreasing priority"""
+    all_names = _get_rec_names(self.sudo())
+    # Try regular search on each additional search field
+    domains = [base_domain + [(rec_name, operator, name)] for rec_name in all_names[1:]]
+    # Try ordered word search on each of the search fields
+    domains += [
+        base_domain + [(rec_name, operator, name.replace(" ", "%"))]
+        for rec_name in all_names
+    ]
+    # Try unordered word search on each of the search fields
+    # we only perform this search if we have at least one
+    # separator character
+    if " " in name:
+        domain = []
+        for word in name.split():
+            word_domain = []
+            for rec_name in all_names:
+                word_domain = (word_domain and ["|"] + word_domain or word_domain) + [
+                    (rec_name, operator, word)
+                ]
+            domain = (domain and ["&"] + domain or domain) + word_domain
+        domains.append(base_domain + domain)
+    return domains
+
+
+def _ranked_name_search(self, domains, exclude_ids, limit, name_get_uid):
+    """Return the ids of the records matching the first of ``domains``, in
+    the order of the model, then those matching the second one, and so on,
+    within one query. Each domain is only searched for its first ``limit``
+    records: the records beyond can not be in the result.
+    """
+    model = self.with_user(name_get_uid) if name_get_uid else self
+    model.check_access_rights("read")
+    table = self._table
+    subqueries = []
+    params = []
+    for rank, domain in enumerate(domains):
+        if exclude_ids:
+            domain = [("id", "not in", exclude_ids)] + domain
+        self._flush_search(domain)
+        query = self._where_calc(domain)
+        self._apply_ir_rules(query, "read")
+        query.order = self._generate_order_by(None, query).replace("ORDER BY ", "")
+        query.limit = limit
+        query_str, query_params = query.select(
+            '"%s".id' % table,
+            "%d AS rank" % rank,
+            "row_number() OVER (ORDER BY %s) AS seq" % query.order,
         )
-        results.extend(rec_ids)
-    return results
+        subqueries.append("(%s)" % query_str)
+        params += query_params
+    # each record is ranked by the first strategy matching it
+    self.env.cr.execute(
+        """
+        SELECT id FROM (
+            SELECT DISTINCT ON (id) id, rank, seq
+            FROM (%s) AS matches
+            ORDER BY id, rank
+        ) AS ranked
+        ORDER BY rank, seq
+        LIMIT %%s
+        """
+        % " UNION ALL ".join(subqueries),
+        params + [limit],
+    )
+    return [row[0] for row in self.env.cr.fetchall()]
 
 
 def patch_name_search():
@@ -71,54 +129,46 @@ def patch_name_search():
     def _name_search(
         self, name="", args=None, operator="ilike", limit=100, name_get_uid=None
     ):
-        # Perform standard name search
-        res = _name_search.origin(
-            self,
-            name=name,
-            args=args,
-            operator=operator,
-            limit=limit,
-            name_get_uid=name_get_uid,
-        )
-        if name and _get_use_smart_name_search(self.sudo()) and operator in ALLOWED_OPS:
-            limit = limit or 0
-
-            # we add domain
-            args = args or [] + _get_name_search_domain(self.sudo())
-
-            # Support a list of fields to search on
-            all_names = _get_rec_names(self.sudo())
-            base_domain = args or []
-            # Try regular search on each additional search field
-            for rec_name in all_names[1:]:
-                domain = [(rec_name, operator, name)]
-                res = _extend_name_results(
-                    self, base_domain + domain, res, limit, name_get_uid
-                )
-            # Try ordered word search on each of the search fields
-            for rec_name in all_names:
-                domain = [(rec_name, operator, name.replace(" ", "%"))]
-                res = _extend_name_results(
-                    self, base_domain + domain, res, limit, name_get_uid
-                )
-            # Try unordered word search on each of the search fields
-            # we only perform this search if we have at least one
-            # separator character
-            # also, if have raise the limit we skeep this iteration
-            if " " in name and len(res) < limit:
-                domain = []
-                for word in name.split():
-                    word_domain = []
-                    for rec_name in all_names:
-                        word_domain = (
-                            word_domain and ["|"] + word_domain or word_domain
-                        ) + [(rec_name, operator, word)]
-                    domain = (domain and ["&"] + domain or domain) + word_domain
-                res = _extend_name_results(
-                    self, base_domain + domain, res, limit, name_get_uid
+        if not (
+            name
+            and limit
+            and _get_use_smart_name_search(self.sudo())
+            and operator in ALLOWED_OPS
+        ):
+            return _name_search.origin(
+                self,
+                name=name,
+                args=args,
+                operator=operator,
+                limit=limit,
+                name_get_uid=name_get_uid,
+            )
+        domains = []
+        res = []
+        if _name_search.origin is models.BaseModel._name_search and self._rec_name:
+            # the standard name search is the first strategy of the query
+            domains.append(list(args or []) + [(self._rec_name, operator, name)])
+        else:
+            # Perform standard name search
+            res = list(
+                _name_search.origin(
+                    self,
+                    name=name,
+                    args=args,
+                    operator=operator,
+                    limit=limit,
+                    name_get_uid=name_get_uid,
                 )
-
-        return res
+            )
+            if len(res) >= limit:
+                return res
+
+        # we add domain
+        args = args or [] + _get_name_search_domain(self.sudo())
+        domains += _get_name_search_domains(self, name, operator, args or [])
+        return res + _ranked_name_search(
+            self, domains, res, limit - len(res), name_get_uid
+        )
 
     return _name_search
 
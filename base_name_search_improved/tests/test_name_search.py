@@ -69,3 +69,22 @@ class NameSearchCase(TransactionCase):
         gambulputty = self.partner3.id
         self.assertEqual(len(res), 1)
         self.assertEqual(res[0][0], gambulputty)
+
+    def test_SingleQuery(self):
+        """All the strategies are searched within one query"""
+        model_industry = self.env.ref("base.model_res_partner_industry")
+        model_industry.name_search_ids = self.env.ref(
+            "base.field_res_partner_industry__full_name"
+        )
+        model_industry.use_smart_name_search = True
+        Industry = self.env["res.partner.industry"]
+        industry1 = Industry.create({"name": "Abc Zqx Wyv"})
+        industry2 = Industry.create({"name": "Wyv Abc", "full_name": "Zqx"})
+        industry3 = Industry.create({"name": "Zqx Abc Wyv"})
+        self.assertEqual(
+            Industry._name_search("Zqx Wyv"),
+            [industry1.id, industry3.id, industry2.id],
+        )
+        with self.assertQueryCount(1):
+            res = Industry._name_search("Zqx Wyv", limit=2)
+        self.assertEqual(res, [industry1.id, industry3.id])
@@ -4,7 +4,7 @@
 {
     "name": "Excel Import/Export/Report",
     "summary": "Base module for developing Excel import/export/report",
-    "version": "14.0.1.1.0",
+    "version": "14.0.1.3.4",
     "author": "Ecosoft,Odoo Community Association (OCA)",
     "license": "AGPL-3",
     "website": "https://github.com/OCA/server-tools",
@@ -2,26 +2,195 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 
 import base64
+import functools
+import hashlib
 import logging
+import mimetypes
+import multiprocessing
 import os
+import pickle
+import shutil
+import tempfile
 import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import date, datetime as dt
 from io import BytesIO
 
+from psycopg2 import OperationalError
+from werkzeug.exceptions import HTTPException
+
+import odoo
 from odoo import _, api, fields, models
-from odoo.exceptions import ValidationError
+from odoo.exceptions import RedirectWarning, UserError, ValidationError
+from odoo.http import AuthenticationError
+from odoo.service import server
 from odoo.tools.float_utils import float_compare
-from odoo.tools.safe_eval import safe_eval
+from odoo.tools.safe_eval import (
+    _BUILTINS,
+    _SAFE_OPCODES,
+    check_values,
+    test_expr,
+    unsafe_eval,
+)
 
 from . import common as co
 
 _logger = logging.getLogger(__name__)
 try:
     from openpyxl import load_workbook
+    from openpyxl.utils import column_index_from_string, coordinate_to_tuple
     from openpyxl.utils.exceptions import IllegalCharacterError
 except ImportError:
     _logger.debug('Cannot import "openpyxl". Please make sure it is installed.')
 
+DEFAULT_EVAL_COND = 'value or ""'
+# Size of the exported files kept in memory before being spooled to disk
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+# Size of the chunks read when copying exported files into the filestore
+COPY_CHUNK_SIZE = 1024 * 1024
+# Maximum number of processes forked to render the files of a batch export
+MAX_EXPORT_WORKERS = 4
+# Exceptions raised as is by safe_eval, which raises the others as ValueError
+SAFE_EVAL_RAISED = (
+    UserError,
+    RedirectWarning,
+    HTTPException,
+    AuthenticationError,
+    OperationalError,
+    ZeroDivisionError,
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_expr(expr):
+    return test_expr(expr.strip(), _SAFE_OPCODES, mode="eval")
+
+
+def _safe_eval(expr, eval_context):
+    """Evaluate the python expression ``expr``.
+
+    This deliberately mirrors ``safe_eval(expr, eval_context)``, with the same
+    checks of the context and the same exceptions, but each expression is
+    checked and compiled once instead of once per cell.
+    """
+    if expr == DEFAULT_EVAL_COND:
+        return eval_context["value"] or ""
+    check_values(eval_context)
+    eval_context = dict(eval_context, __builtins__=_BUILTINS)
+    try:
+        return unsafe_eval(_compile_expr(expr), eval_context)
+    except SAFE_EVAL_RAISED:
+        raise
+    except Exception as e:
+        raise ValueError('%s: "%s" while evaluating\n%r' % (type(e), e, expr))
+
+
+class CellRecorder(object):
+    """Cell of a ``WorksheetRecorder``, records the value set on it"""
+
+    def __init__(self, sheet, row, column):
+        self.sheet = sheet
+        self.row = row
+        self.column = column
+
+    def _set_value(self, value):
+        self.sheet.operations.append(("value", self.row, self.column, value))
+
+    value = property(fset=_set_value)
+
+    def fill_style(self, field_style):
+        self.sheet.operations.append(("style", self.row, self.column, field_style))
+
+
+class WorksheetRecorder(object):
+    """Stand-in of an openpyxl worksheet, records the operations done by
+    ``xlsx.export`` to replay them later on the template with
+    ``render_workbook()``, in a worker process.
+    """
+
+    def __init__(self):
+        self.operations = []
+
+    def __getitem__(self, coordinate):
+        return CellRecorder(self, *coordinate_to_tuple(coordinate.upper()))
+
+    def __setitem__(self, coordinate, value):
+        self[coordinate].value = value
+
+    def cell(self, row, column):
+        return CellRecorder(self, row, column)
+
+    def insert_rows(self, idx, amount=1):
+        self.operations.append(("insert_rows", idx, amount))
+
+
+class WorkbookRecorder(object):
+    """Stand-in of an openpyxl workbook, see ``WorksheetRecorder``"""
+
+    def __init__(self, sheetnames):
+        self.sheetnames = list(sheetnames)
+        self.worksheets = [WorksheetRecorder() for __ in self.sheetnames]
+
+    def get_operations(self):
+        return [sheet.operations for sheet in self.worksheets]
+
+
+def parse_template(template_data):
+    """Parse the template once for all the exported files, which are filled
+    in copies returned by ``copy_template()``. openpyxl workbooks can not be
+    copied with ``copy.deepcopy()``, which empties their lists of styles, so
+    the parsed template is pickled: loading it is much faster than parsing it.
+    """
+    return pickle.dumps(load_workbook(BytesIO(template_data)), pickle.HIGHEST_PROTOCOL)
+
+
+def copy_template(parsed_template):
+    """Return a new workbook from the template parsed by
+    ``parse_template()``
+    """
+    return pickle.loads(parsed_template)
+
+
+def render_workbook(parsed_template, operations, styles, csv_options, directory):
+    """Replay the ``operations`` recorded by a ``WorkbookRecorder`` on a copy
+    of the template parsed by ``parse_template()``, and save the result as a
+    new file in ``directory``. Return the path of that file.
+    """
+    wb = copy_template(parsed_template)
+    for st, sheet_operations in zip(wb.worksheets, operations):
+        for operation in sheet_operations:
+            if operation[0] == "insert_rows":
+                st.insert_rows(operation[1], operation[2])
+                continue
+            cell = st.cell(row=operation[1], column=operation[2])
+            if operation[0] == "value":
+                cell.value = operation[3]
+            else:
+                co.fill_cell_style(cell, operation[3], styles)
+    fd, path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, "wb") as out_file:
+        wb.save(out_file)
+    if csv_options:
+        with open(path, "rb") as excel_file:
+            content = co.csv_from_excel(excel_file.read(), *csv_options)
+        with open(path, "wb") as out_file:
+            out_file.write(content)
+    return path
+
+
+# Parsed template of the worker processes, set by _init_worker()
+_worker_template = None
+
+
+def _init_worker(parsed_template):
+    global _worker_template
+    _worker_template = parsed_template
+
+
+def _render_in_worker(operations, styles, csv_options, directory):
+    """``render_workbook()`` with the template of the worker process"""
+    return render_workbook(_worker_template, operations, styles, csv_options, directory)
+
 
 class XLSXExport(models.AbstractModel):
     _name = "xlsx.export"
@@ -80,7 +249,7 @@ class XLSXExport(models.AbstractModel):
                 eval_cond = field_cond_dict[field[0]]
                 eval_context = self.get_eval_context(line._name, line, value)
                 if eval_cond:
-                    value = safe_eval(eval_cond, eval_context)
+                    value = _safe_eval(eval_cond, eval_context)
                 # style w/Cond takes priority
                 style_cond = style_cond_dict[field[0]]
                 style = self._eval_style_cond(line._name, line, value, style_cond)
@@ -103,7 +272,7 @@ class XLSXExport(models.AbstractModel):
             style_cond = style_cond.replace("#{%s}" % style, str(i))
         if not styles:
             return False
-        res = safe_eval(style_cond, eval_context)
+        res = _safe_eval(style_cond, eval_context)
         if res is None or res is False:
             return res
         return styles[res]
@@ -113,6 +282,7 @@ class XLSXExport(models.AbstractModel):
         """Fill data from record with style in data_dict to workbook"""
         if not record or not data_dict:
             return
+        styles = self.env["xlsx.styles"].get_openpyxl_styles()
         try:
             for sheet_name in data_dict:
                 ws = data_dict[sheet_name]
@@ -126,8 +296,8 @@ class XLSXExport(models.AbstractModel):
                 if not st:
                     raise ValidationError(_("Sheet %s not found") % sheet_name)
                 # Fill data, header and rows
-                self._fill_head(ws, st, record)
-                self._fill_lines(ws, st, record)
+                self._fill_head(ws, st, record, styles=styles)
+                self._fill_lines(ws, st, record, styles=styles)
         except KeyError as e:
             raise ValidationError(_("Key Error\n%s") % e)
         except IllegalCharacterError as e:
@@ -154,7 +324,17 @@ class XLSXExport(models.AbstractModel):
         return line_copy
 
     @api.model
-    def _fill_head(self, ws, st, record):
+    def _fill_cell_style(self, cell, field_style, styles):
+        if isinstance(cell, CellRecorder):
+            # Styles are applied when the recorded workbook is rendered
+            cell.fill_style(field_style)
+            return
+        co.fill_cell_style(cell, field_style, styles)
+
+    @api.model
+    def _fill_head(self, ws, st, record, styles=None):
+        if styles is None:
+            styles = self.env["xlsx.styles"].get_openpyxl_styles()
         for rc, field in ws.get("_HEAD_", {}).items():
             tmp_field, eval_cond = co.get_field_condition(field)
             eval_cond = eval_cond or 'value or ""'
@@ -164,16 +344,17 @@ class XLSXExport(models.AbstractModel):
             # Eval
             eval_context = self.get_eval_context(record._name, record, value)
             if eval_cond:
-                value = safe_eval(eval_cond, eval_context)
+                value = _safe_eval(eval_cond, eval_context)
             if value is not None:
                 st[rc] = value
-            fc = not style_cond and True or safe_eval(style_cond, eval_context)
+            fc = not style_cond and True or _safe_eval(style_cond, eval_context)
             if field_style and fc:  # has style and pass style_cond
-                styles = self.env["xlsx.styles"].get_openpyxl_styles()
-                co.fill_cell_style(st[rc], field_style, styles)
+                self._fill_cell_style(st[rc], field_style, styles)
 
     @api.model
-    def _fill_lines(self, ws, st, record):
+    def _fill_lines(self, ws, st, record, styles=None):
+        if styles is None:
+            styles = self.env["xlsx.styles"].get_openpyxl_styles()
         line_fields = list(ws)
         if "_HEAD_" in line_fields:
             line_fields.remove("_HEAD_")
@@ -187,6 +368,7 @@ class XLSXExport(models.AbstractModel):
             rows_inserted = False  # flag to insert row
             for rc, field in ws.get(line_field, {}).items():
                 col, row = co.split_row_col(rc)  # starting point
+                col_idx = column_index_from_string(col.upper())
                 # Case continue, start from the last data row
                 if is_cont and not cont_set:  # only once per line_field
                     cont_set = cont_row + 1
@@ -204,86 +386,254 @@ class XLSXExport(models.AbstractModel):
                 # --
                 for (row_val, style) in vals[field]:
                     new_row = row + i
-                    new_rc = "{}{}".format(col, new_row)
+                    cell = st.cell(row=new_row, column=col_idx)
                     row_val = co.adjust_cell_formula(row_val, i)
                     if row_val not in ("None", None):
-                        st[new_rc] = co.str_to_number(row_val)
+                        cell.value = co.str_to_number(row_val)
                     if style:
-                        styles = self.env["xlsx.styles"].get_openpyxl_styles()
-                        co.fill_cell_style(st[new_rc], style, styles)
+                        self._fill_cell_style(cell, style, styles)
                     i += 1
+                if i:
+                    new_rc = "{}{}".format(col, new_row)
                 # Add footer line if at least one field have sum
                 f = func.get(field, False)
                 if f and new_row > 0:
                     new_row += 1
                     f_rc = "{}{}".format(col, new_row)
                     st[f_rc] = "={}({}:{})".format(f, rc, new_rc)
-                    styles = self.env["xlsx.styles"].get_openpyxl_styles()
-                    co.fill_cell_style(st[f_rc], style, styles)
+                    self._fill_cell_style(st[f_rc], style, styles)
                 cont_row = cont_row < new_row and new_row or cont_row
         return
 
+    @api.model
+    def _get_out_name(self, template, record):
+        """Return the name of the file exported for ``record``"""
+        out_name = template.name
+        if record and "name" in record and record.name:
+            out_name = record.name.replace(" ", "").replace("/", "")
+        else:
+            fname = out_name.replace(" ", "").replace("/", "")
+            ts = fields.Datetime.context_timestamp(self, dt.now())
+            out_name = "{}_{}".format(fname, ts.strftime("%Y%m%d_%H%M%S"))
+        if not out_name or len(out_name) == 0:
+            out_name = "noname"
+        out_ext = template.to_csv and template.csv_extension or "xlsx"
+        return "{}.{}".format(out_name, out_ext)
+
+    @api.model
+    def _export_record(self, template, parsed_template, export_dict, record):
+        """Fill a copy of the template parsed by ``parse_template()`` with the
+        data of ``record``. Return the file, spooled to disk if large and to
+        be closed by the caller, and its name.
+        """
+        wb = copy_template(parsed_template)
+        self._fill_workbook_data(wb, record, export_dict)
+        content = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        wb.save(content)
+        # CSV (convert only on 1st sheet)
+        if template.to_csv:
+            content.seek(0)
+            out_file = co.csv_from_excel(
+                content.read(), template.csv_delimiter, template.csv_quote
+            )
+            content.close()
+            content = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            content.write(out_file)
+        content.seek(0)  # Set index to 0, and start reading
+        return (content, self._get_out_name(template, record))
+
+    @api.model
+    def _get_export_dict(self, template):
+        """Return the __EXPORT__ instructions of ``template``, if any"""
+        data_dict = co.literal_eval(template.instruction.strip())
+        return data_dict.get("__EXPORT__", False)
+
     @api.model
     def export_xlsx(self, template, res_model, res_ids):
         if template.res_model != res_model:
             raise ValidationError(_("Template's model mismatch"))
-        data_dict = co.literal_eval(template.instruction.strip())
-        export_dict = data_dict.get("__EXPORT__", False)
+        export_dict = self._get_export_dict(template)
         out_name = template.name
         if not export_dict:  # If there is not __EXPORT__ formula, just export
             out_name = template.fname
             out_file = template.datas
             return (out_file, out_name)
-        # Prepare temp file (from now, only xlsx file works for openpyxl)
-        decoded_data = base64.decodestring(template.datas)
-        ConfParam = self.env["ir.config_parameter"].sudo()
-        ptemp = ConfParam.get_param("path_temp_file") or "/tmp"
-        stamp = dt.utcnow().strftime("%H%M%S%f")[:-3]
-        ftemp = "{}/temp{}.xlsx".format(ptemp, stamp)
-        # Start working with workbook
+        # Template parsed once for all the records
+        parsed_template = parse_template(base64.b64decode(template.datas))
         records = res_model and self.env[res_model].browse(res_ids) or False
-        outputs = []
-        for record in records:
-            f = open(ftemp, "wb")
-            f.write(decoded_data)
-            f.seek(0)
-            f.close()
-            # Workbook created, temp file removed
-            wb = load_workbook(ftemp)
-            os.remove(ftemp)
-            self._fill_workbook_data(wb, record, export_dict)
-            # Return file as .xlsx
-            content = BytesIO()
-            wb.save(content)
-            content.seek(0)  # Set index to 0, and start reading
-            out_file = content.read()
-            if record and "name" in record and record.name:
-                out_name = record.name.replace(" ", "").replace("/", "")
-            else:
-                fname = out_name.replace(" ", "").replace("/", "")
-                ts = fields.Datetime.context_timestamp(self, dt.now())
-                out_name = "{}_{}".format(fname, ts.strftime("%Y%m%d_%H%M%S"))
-            if not out_name or len(out_name) == 0:
-                out_name = "noname"
-            out_ext = "xlsx"
-            # CSV (convert only on 1st sheet)
-            if template.to_csv:
-                delimiter = template.csv_delimiter
-                out_file = co.csv_from_excel(out_file, delimiter, template.csv_quote)
-                out_ext = template.csv_extension
-            outputs.append((out_file, "{}.{}".format(out_name, out_ext)))
+        outputs = (
+            self._export_record(template, parsed_template, export_dict, record)
+            for record in records
+        )
         # If outputs > 1 files, zip it
-        if len(outputs) > 1:
-            zip_buffer = BytesIO()
-            with zipfile.ZipFile(
-                zip_buffer, "a", zipfile.ZIP_DEFLATED, False
-            ) as zip_file:
-                for data, file_name in outputs:
-                    zip_file.writestr(file_name, data)
-            zip_buffer.seek(0)
-            out_file = base64.encodebytes(zip_buffer.read())
+        if len(records) > 1:
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as zip_buffer:
+                with zipfile.ZipFile(
+                    zip_buffer, "w", zipfile.ZIP_DEFLATED, False
+                ) as zip_file:
+                    # each file is copied into the zip file and closed before
+                    # the next one is rendered
+                    for content, file_name in outputs:
+                        with content, zip_file.open(file_name, "w") as zip_member:
+                            shutil.copyfileobj(content, zip_member, COPY_CHUNK_SIZE)
+                zip_buffer.seek(0)
+                out_file = base64.encodebytes(zip_buffer.read())
             out_name = "files.zip"
             return (out_file, out_name)
         else:
-            (out_file, out_name) = outputs[0]
-            return (base64.encodebytes(out_file), out_name)
+            (content, out_name) = next(outputs)
+            with content:
+                return (base64.encodebytes(content.read()), out_name)
+
+    @api.model
+    def _get_export_workers(self):
+        ICP = self.env["ir.config_parameter"].sudo()
+        return int(ICP.get_param("excel_import_export.export_workers", 1)) or 1
+
+    @api.model
+    def _can_fork_workers(self):
+        """Forking is only safe in the workers of the multi-process server
+        (workers > 0), which process one request at a time. The processes
+        forked from a multi-threaded or evented server could inherit locks
+        held by its other threads (logging, database connections...), and
+        wait for them forever.
+        """
+        return not odoo.evented and isinstance(server.server, server.PreforkServer)
+
+    @api.model
+    def _create_attachment_from_file(self, path, name):
+        """Create an attachment with the content of the file at ``path``,
+        copied by chunks into the filestore instead of being loaded in memory.
+        """
+        Attachment = self.env["ir.attachment"]
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if Attachment._storage() == "db":
+            with open(path, "rb") as content:
+                return Attachment.create(
+                    {"name": name, "raw": content.read(), "mimetype": mimetype}
+                )
+        # ir.attachment only stores contents given in memory: the file is
+        # copied into the filestore as _file_write() does, under the name
+        # given by its checksum and marked for the garbage collection in case
+        # the transaction is rolled back
+        sha = hashlib.sha1()
+        with open(path, "rb") as content:
+            for chunk in iter(functools.partial(content.read, COPY_CHUNK_SIZE), b""):
+                sha.update(chunk)
+        checksum = sha.hexdigest()
+        fname, full_path = Attachment._get_path(None, checksum)
+        if not os.path.exists(full_path):
+            shutil.copyfile(path, full_path)
+            Attachment._mark_for_gc(fname)
+        attachment = Attachment.create(
+            {"name": name, "store_fname": fname, "mimetype": mimetype}
+        )
+        # create() drops file_size and checksum, which it only computes from
+        # the contents given in memory
+        self.env.cr.execute(
+            "UPDATE ir_attachment SET file_size = %s, checksum = %s WHERE id = %s",
+            (os.path.getsize(path), checksum, attachment.id),
+        )
+        attachment.invalidate_cache(["file_size", "checksum"])
+        return attachment
+
+    @api.model
+    def _record_workbook(self, sheetnames, export_dict, record):
+        """Return the operations filling the template with ``record``"""
+        wb = WorkbookRecorder(sheetnames)
+        self._fill_workbook_data(wb, record, export_dict)
+        return wb.get_operations()
+
+    @api.model
+    def _render_records(self, template, records, workers, directory):
+        """Render the file of each record in ``directory``, and yield its path
+        and name as soon as it is ready.
+        """
+        export_dict = self._get_export_dict(template)
+        # Template parsed once, copied for each record
+        parsed_template = parse_template(base64.b64decode(template.datas))
+        sheetnames = copy_template(parsed_template).sheetnames
+        styles = self.env["xlsx.styles"].get_openpyxl_styles()
+        csv_options = template.to_csv and (template.csv_delimiter, template.csv_quote)
+        if workers == 1:
+            for record in records:
+                operations = self._record_workbook(sheetnames, export_dict, record)
+                path = render_workbook(
+                    parsed_template, operations, styles, csv_options, directory
+                )
+                yield path, self._get_out_name(template, record)
+            return
+        # Forked, as the addons can not be imported by spawned processes
+        context = multiprocessing.get_context("fork")
+        # The parsed template is given once to each process
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(parsed_template,),
+        ) as executor:
+            pending = {}
+            for record in records:
+                operations = self._record_workbook(sheetnames, export_dict, record)
+                future = executor.submit(
+                    _render_in_worker,
+                    operations,
+                    styles,
+                    csv_options,
+                    directory,
+                )
+                pending[future] = self._get_out_name(template, record)
+                # Bound the number of workbooks waiting in memory
+                while len(pending) >= workers * 2:
+                    done, __ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield self._get_result(future), pending.pop(future)
+            for future in list(pending):
+                yield self._get_result(future), pending.pop(future)
+
+    @api.model
+    def export_xlsx_batch(self, template, res_model, res_ids, workers=None):
+        """Export one file per record of ``res_ids`` into a zip file, stored
+        as an attachment which is returned.
+
+        The data of the records is read in this process, and the workbooks are
+        rendered by a pool of ``workers`` processes (set by the system
+        parameter ``excel_import_export.export_workers``, at most
+        ``MAX_EXPORT_WORKERS``). With 1 worker, the default, or outside of the
+        workers of the multi-process server, they are rendered in this
+        process. Each file is added to the zip file on disk when it is ready.
+        """
+        if template.res_model != res_model:
+            raise ValidationError(_("Template's model mismatch"))
+        records = self.env[res_model].browse(res_ids)
+        workers = workers or self._get_export_workers()
+        workers = min(workers, MAX_EXPORT_WORKERS, len(records)) or 1
+        if workers > 1 and not self._can_fork_workers():
+            _logger.warning(
+                "Files rendered in the server process instead of %s processes, "
+                "which require the multi-process server (workers > 0)",
+                workers,
+            )
+            workers = 1
+        with tempfile.TemporaryDirectory() as directory:
+            zip_path = os.path.join(directory, "files.zip")
+            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+                for path, file_name in self._render_records(
+                    template, records, workers, directory
+                ):
+                    zip_file.write(path, file_name)
+                    os.unlink(path)
+            return self._create_attachment_from_file(zip_path, "files.zip")
+
+    @api.model
+    def _get_result(self, future):
+        try:
+            return future.result()
+        except IllegalCharacterError as e:
+            raise ValidationError(
+                _(
+                    "IllegalCharacterError\n"
+                    "Some exporting data contain special character\n%s"
+                )
+                % e
+            )
@@ -50,9 +50,20 @@ class ExportXLSXWizard(models.TransientModel):
         defaults["res_model"] = res_model
         return defaults
 
+    def unlink(self):
+        self.env["ir.attachment"].sudo().search(
+            [("res_model", "=", self._name), ("res_id", "in", self.ids)]
+        ).unlink()
+        return super().unlink()
+
     def action_export(self):
         self.ensure_one()
         Export = self.env["xlsx.export"]
+        # Without __EXPORT__ instructions, the template itself is exported
+        if len(self.res_ids.split(",")) > 1 and Export._get_export_dict(
+            self.template_id
+        ):
+            return self._action_export_batch()
         out_file, out_name = Export.export_xlsx(
             self.template_id, self.res_model, safe_eval(self.res_ids)
         )
@@ -65,3 +76,18 @@ class ExportXLSXWizard(models.TransientModel):
             "views": [(False, "form")],
             "target": "new",
         }
+
+    def _action_export_batch(self):
+        """Export the records into a zip file rendered in parallel, and
+        download it
+        """
+        attachment = self.env["xlsx.export"].export_xlsx_batch(
+            self.template_id, self.res_model, safe_eval(self.res_ids)
+        )
+        attachment.write({"res_model": self._name, "res_id": self.id})
+        self.write({"state": "get", "name": attachment.name})
+        return {
+            "type": "ir.actions.act_url",
+            "url": "/web/content/%s?download=true" % attachment.id,
+            "target": "self",
+        }
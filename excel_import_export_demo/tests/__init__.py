@@ -3,3 +3,4 @@
 from . import test_xlsx_template
 from . import test_xlsx_import_export
 from . import test_xlsx_report
+from . import test_benchmark
@@ -0,0 +1,73 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+import logging
+import time
+
+from odoo.tests.common import tagged
+
+from .test_common import TestExcelImportExport
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("-standard", "excel_import_export_benchmark")
+class TestXLSXExportBenchmark(TestExcelImportExport):
+    """Time the export of orders with many lines, and of many orders.
+
+    Not run by default, run with ``--test-tags excel_import_export_benchmark``.
+    """
+
+    nb_lines = 10000
+    nb_orders = 500
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        cls.setUpPrepSaleOrder()
+        cls.template = cls.env.ref("excel_import_export_demo.sale_order_xlsx_template")
+        product_line = {
+            "name": cls.product_order.name,
+            "product_id": cls.product_order.id,
+            "product_uom_qty": 2,
+            "product_uom": cls.product_order.uom_id.id,
+            "price_unit": cls.product_order.list_price,
+            "tax_id": False,
+        }
+        cls.big_order = cls.env["sale.order"].create(
+            {
+                "partner_id": cls.partner.id,
+                "order_line": [(0, 0, product_line)] * cls.nb_lines,
+            }
+        )
+        cls.orders = cls.env["sale.order"].create(
+            [
+                {
+                    "partner_id": cls.partner.id,
+                    "order_line": [(0, 0, product_line), (0, 0, product_line)],
+                }
+                for __ in range(cls.nb_orders)
+            ]
+        )
+
+    def _export(self, records):
+        start = time.time()
+        out_file, out_name = self.env["xlsx.export"].export_xlsx(
+            self.template, "sale.order", records.ids
+        )
+        self.assertTrue(out_file)
+        return time.time() - start, out_name
+
+    def test_benchmark_lines(self):
+        duration, out_name = self._export(self.big_order)
+        self.assertTrue(out_name.endswith(".xlsx"))
+        _logger.info("Export of 1 order with %s lines: %.2fs", self.nb_lines, duration)
+
+    def test_benchmark_records(self):
+        duration, out_name = self._export(self.orders)
+        self.assertEqual(out_name, "files.zip")
+        _logger.info(
+            "Export of %s orders with 2 lines: %.2fs (%.1fms per order)",
+            self.nb_orders,
+            duration,
+            duration * 1000 / self.nb_orders,
+        )
@@ -1,5 +1,14 @@
 # Copyright 2019 Ecosoft Co., Ltd (http://ecosoft.co.th/)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+import base64
+import hashlib
+import tempfile
+import zipfile
+from io import BytesIO
+from unittest import mock
+
+from openpyxl import load_workbook
+
 from odoo.tests.common import Form
 
 from .test_common import TestExcelImportExport
@@ -76,3 +85,121 @@ class TestXLSXImportExport(TestExcelImportExport):
         template.add_import_action()
         self.assertTrue(template.import_action_id)
         self.assertTrue(template.export_action_id)
+
+    def _get_cells(self, content):
+        """Return the values and styles of the cells of an exported file"""
+        wb = load_workbook(BytesIO(content))
+        return [
+            (
+                ws.title,
+                cell.coordinate,
+                cell.value,
+                repr(cell.font),
+                repr(cell.fill),
+                repr(cell.border),
+                repr(cell.alignment),
+                cell.number_format,
+            )
+            for ws in wb.worksheets
+            for row in ws.iter_rows()
+            for cell in row
+        ]
+
+    def test_xlsx_export_batch(self):
+        """Test Export Excel of many Sales Orders into a zip attachment"""
+        self.setUpManySaleOrder()
+        orders = self.env["sale.order"].search([("partner_id", "=", self.partner.id)])
+        template = self.env.ref("excel_import_export_demo.sale_order_xlsx_template")
+        Export = self.env["xlsx.export"]
+        out_file, out_name = Export.export_xlsx(template, "sale.order", orders.ids)
+        self.assertEqual(out_name, "files.zip")
+        with zipfile.ZipFile(BytesIO(base64.b64decode(out_file))) as zip_file:
+            file_names = zip_file.namelist()
+        self.assertEqual(len(file_names), len(orders))
+        # Files of the orders exported one by one
+        expected = {}
+        for order in orders:
+            out_file, out_name = Export.export_xlsx(template, "sale.order", order.ids)
+            expected[out_name] = self._get_cells(base64.b64decode(out_file))
+        self.assertEqual(sorted(expected), sorted(file_names))
+        # Rendered in this process, then by a pool of processes: the tests run
+        # in the multi-threaded server, which does not fork them otherwise
+        for workers in (1, 2):
+            with mock.patch.object(
+                type(Export), "_can_fork_workers", return_value=True
+            ):
+                attachment = Export.export_xlsx_batch(
+                    template, "sale.order", orders.ids, workers=workers
+                )
+            self.assertEqual(attachment.name, "files.zip")
+            self.assertTrue(attachment.file_size)
+            with zipfile.ZipFile(BytesIO(attachment.raw)) as zip_file:
+                self.assertEqual(sorted(zip_file.namelist()), sorted(file_names))
+                self.assertIsNone(zip_file.testzip())
+                for file_name in file_names:
+                    self.assertEqual(
+                        self._get_cells(zip_file.read(file_name)),
+                        expected[file_name],
+                        "%s rendered by %s worker(s)" % (file_name, workers),
+                    )
+        # No processes forked from the multi-threaded server
+        with mock.patch(
+            "odoo.addons.excel_import_export.models.xlsx_export.ProcessPoolExecutor",
+            side_effect=AssertionError,
+        ), self.assertLogs(
+            "odoo.addons.excel_import_export.models.xlsx_export", "WARNING"
+        ):
+            attachment = Export.export_xlsx_batch(
+                template, "sale.order", orders.ids, workers=2
+            )
+        with zipfile.ZipFile(BytesIO(attachment.raw)) as zip_file:
+            self.assertEqual(sorted(zip_file.namelist()), sorted(file_names))
+        # From the wizard
+        ctx = {
+            "active_model": "sale.order",
+            "active_ids": orders.ids,
+            "template_domain": [
+                ("res_model", "=", "sale.order"),
+                ("fname", "=", "sale_order.xlsx"),
+                ("gname", "=", False),
+            ],
+        }
+        export_wizard = Form(self.env["export.xlsx.wizard"].with_context(ctx)).save()
+        action = export_wizard.action_export()
+        self.assertEqual(action["type"], "ir.actions.act_url")
+        attachment = self.env["ir.attachment"].search(
+            [("res_model", "=", export_wizard._name), ("res_id", "=", export_wizard.id)]
+        )
+        self.assertEqual(attachment.name, "files.zip")
+        export_wizard.unlink()
+        self.assertFalse(attachment.exists())
+        # Without __EXPORT__ instructions, the template itself is exported
+        export_wizard = Form(self.env["export.xlsx.wizard"].with_context(ctx)).save()
+        with mock.patch.object(type(Export), "_get_export_dict", return_value=False):
+            action = export_wizard.action_export()
+        self.assertEqual(action["type"], "ir.actions.act_window")
+        self.assertEqual(export_wizard.name, template.fname)
+        self.assertEqual(export_wizard.data, template.datas)
+
+    def test_create_attachment_from_file(self):
+        """Test the attachments of batch exports, in both storage modes"""
+        Export = self.env["xlsx.export"]
+        params = self.env["ir.config_parameter"].sudo()
+        location = params.get_param("ir_attachment.location")
+        self.addCleanup(params.set_param, "ir_attachment.location", location)
+        content = b"batch export content\n" * 1000
+        with tempfile.NamedTemporaryFile(suffix=".zip") as zip_file:
+            zip_file.write(content)
+            zip_file.flush()
+            for storage in ("file", "db"):
+                params.set_param("ir_attachment.location", storage)
+                attachment = Export._create_attachment_from_file(
+                    zip_file.name, "files.zip"
+                )
+                self.assertEqual(attachment.name, "files.zip")
+                self.assertEqual(attachment.raw, content)
+                self.assertEqual(attachment.file_size, len(content))
+                self.assertEqual(attachment.checksum, hashlib.sha1(content).hexdigest())
+                self.assertEqual(attachment.mimetype, "application/zip")
+                self.assertEqual(bool(attachment.store_fname), storage == "file")
+                self.assertEqual(bool(attachment.db_datas), storage == "db")
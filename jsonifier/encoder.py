@@ -0,0 +1,61 @@
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl.html).
+"""Encoding of the jsonified data.
+
+``dumps`` and ``loads`` use orjson, a C-accelerated JSON library, when it is
+installed, and the standard ``json`` module otherwise. Another encoder can be
+plugged with ``set_encoder``.
+"""
+
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    _logger.debug("Cannot import orjson, using json")
+    orjson = None
+
+
+def _std_dumps(value, sort_keys=False, indent=None):
+    return json.dumps(value, sort_keys=sort_keys, indent=indent)
+
+
+def _orjson_dumps(value, sort_keys=False, indent=None):
+    if indent not in (None, 2):
+        return _std_dumps(value, sort_keys=sort_keys, indent=indent)
+    option = orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    try:
+        return orjson.dumps(value, option=option).decode()
+    except TypeError:
+        # e.g. integers out of the 64 bits range
+        return _std_dumps(value, sort_keys=sort_keys, indent=indent)
+
+
+_default_dumps = _orjson_dumps if orjson else _std_dumps
+_default_loads = orjson.loads if orjson else json.loads
+_encoder = {"dumps": _default_dumps, "loads": _default_loads}
+
+
+def set_encoder(dumps=None, loads=None):
+    """Plug the functions used to encode and decode the jsonified data.
+    ``dumps`` takes the ``sort_keys`` and ``indent`` arguments of
+    ``json.dumps``. Without arguments, restore the default ones.
+    """
+    _encoder["dumps"] = dumps or _default_dumps
+    _encoder["loads"] = loads or _default_loads
+
+
+def dumps(value, sort_keys=False, indent=None):
+    """Serialize ``value`` to a JSON ``str``."""
+    return _encoder["dumps"](value, sort_keys=sort_keys, indent=indent)
+
+
+def loads(data):
+    """Deserialize the JSON ``str`` or ``bytes`` ``data``."""
+    return _encoder["loads"](data)
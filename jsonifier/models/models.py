@@ -5,18 +5,37 @@
 # Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl.html).
 
+import functools
 import logging
+import operator
+
+import pytz
 
 from odoo import api, fields, models, tools
 from odoo.exceptions import UserError
-from odoo.tools.misc import format_duration
+from odoo.tools.misc import format_duration, split_every
 from odoo.tools.translate import _
 
+from .. import encoder
 from ..exceptions import SwallableException
 from .utils import convert_simple_to_full_parser
 
 _logger = logging.getLogger(__name__)
 
+# Methods jsonifying each record, only called by ``_jsonify_record()``: the
+# compiled plans are not used for the models overriding one of them
+JSONIFY_RECORD_METHODS = (
+    "_function_value",
+    "_jsonify_record",
+    "_jsonify_record_handle_function",
+    "_jsonify_record_handle_subparser",
+    "_jsonify_record_handle_resolver",
+)
+
+
+def _call_function(function, field_name, record):
+    return function(record, field_name)
+
 
 class Base(models.AbstractModel):
 
@@ -42,7 +61,11 @@ class Base(models.AbstractModel):
 
     @api.model
     def _jsonify_value(self, field, value):
-        """Override this function to support new field types."""
+        """Override this function to support new field types.
+
+        When jsonifying recordsets, dates and datetimes are converted by
+        ``_jsonify_values()`` instead, unless this function is overridden.
+        """
         if value is False and field.type != "boolean":
             value = None
         elif field.type == "date":
@@ -61,6 +84,52 @@ class Base(models.AbstractModel):
             value = [v.display_name for v in value]
         return value
 
+    @api.model
+    def _jsonify_values(self, field, values):
+        """Convert the ``values`` of ``field`` for several records at once.
+
+        Dates and datetimes are converted here, the timezone being looked up
+        once for all the values; other values by ``_jsonify_value()``.
+        """
+        if self._jsonify_overridden(("_jsonify_value",)):
+            return [self._jsonify_value(field, value) for value in values]
+        if field.type == "date":
+            return [
+                fields.Date.to_date(value).isoformat() if value else None
+                for value in values
+            ]
+        if field.type == "datetime":
+            tz = None
+            if self.env.context.get("jsonifier__date_user_tz"):
+                tz = pytz.utc
+                tz_name = self.env.context.get("tz") or self.env.user.tz
+                try:
+                    tz = pytz.timezone(tz_name) if tz_name else tz
+                except pytz.UnknownTimeZoneError:
+                    _logger.debug("failed to compute context/client-specific timestamp")
+            result = []
+            for value in values:
+                if not value:
+                    result.append(None)
+                    continue
+                value = fields.Datetime.to_datetime(value)
+                if tz:
+                    # as fields.Datetime.context_timestamp()
+                    value = pytz.utc.localize(value, is_dst=False).astimezone(tz)
+                result.append(value.isoformat())
+            return result
+        return [self._jsonify_value(field, value) for value in values]
+
+    @api.model
+    def _jsonify_overridden(self, method_names):
+        """Return whether one of the methods of this module named
+        ``method_names`` is overridden on this model.
+        """
+        cls = type(self)
+        return any(
+            getattr(cls, name) is not getattr(Base, name) for name in method_names
+        )
+
     @api.model
     def _add_json_key(self, values, json_key, value):
         """To manage defaults, you can use a specific resolver."""
@@ -168,6 +237,131 @@ class Base(models.AbstractModel):
             value, json_key = value["_value"], value["_json_key"]
         return value, json_key
 
+    @api.model
+    def _jsonify_compile(self, parser):
+        """Compile the list of field parsers ``parser`` into a plan for the
+        records of this model, run by ``_jsonify_run()``.
+
+        The validation of the parser, the lookups of the fields and functions
+        and the dispatching done by ``_jsonify_record()`` for each field of
+        each record are done once here. The plan is a list of
+        ``(kind, json_key, field_name, arg)`` tuples.
+        """
+        strict = self.env.context.get("jsonify_record_strict", False)
+        plan = []
+        for parser_field in parser:
+            field_dict, subparser = self.__parse_field(parser_field)
+            try:
+                self._jsonify_record_validate_field(self, field_dict, strict)
+            except SwallableException:
+                continue
+            field_name = field_dict["name"]
+            json_key = field_dict.get("target", field_name)
+            function = field_dict.get("function")
+            if function:
+                call = None
+                if isinstance(function, str) and function in dir(self):
+                    call = operator.methodcaller(function, field_name)
+                elif callable(function):
+                    call = functools.partial(_call_function, function, field_name)
+                plan.append(("function", json_key, field_name, (call, function)))
+            elif subparser:
+                field = self._fields[field_name]
+                if not (field.relational or field.type == "reference"):
+                    if strict or tools.config["test_enable"]:
+                        self._jsonify_bad_parser_error(field_name)
+                    _logger.error(
+                        "%(model)s.%(fname)s not relational",
+                        {"model": self._name, "fname": field_name},
+                    )
+                    continue
+                # compiled for each model met, to support reference fields
+                plan.append(("subparser", json_key, field_name, (subparser, {})))
+            else:
+                field = self._fields[field_name]
+                resolver = field_dict.get("resolver")
+                if resolver:
+                    plan.append(("resolver", json_key, field_name, (resolver, field)))
+                else:
+                    plan.append(("value", json_key, field_name, field))
+        return plan
+
+    def _jsonify_run(self, plan, results):
+        """Run the compiled ``plan`` over the records, field by field, and
+        add their values to the ``results`` dicts (one per record).
+
+        The records related to all of them through a field with a subparser
+        are jsonified at once, so that each level is read in one batch.
+        ``self`` may contain the same record several times.
+        """
+        strict = self.env.context.get("jsonify_record_strict", False)
+        for kind, json_key, field_name, arg in plan:
+            if kind == "value":
+                column = self._jsonify_values(arg, [rec[field_name] for rec in self])
+                for value, values in zip(column, results):
+                    self._add_json_key(values, json_key, value)
+            elif kind == "resolver":
+                resolver, field = arg
+                for value, values in zip(resolver.resolve(field, self), results):
+                    key = json_key
+                    if (
+                        isinstance(value, dict)
+                        and "_json_key" in value
+                        and "_value" in value
+                    ):
+                        value, key = value["_value"], value["_json_key"]
+                    self._add_json_key(values, key, value)
+            elif kind == "function":
+                call, function = arg
+                for rec, values in zip(self, results):
+                    try:
+                        if not call:
+                            self._jsonify_bad_parser_error(field_name)
+                        value = call(rec)
+                    except UserError:
+                        if strict:
+                            raise
+                        if not tools.config["test_enable"]:
+                            _logger.error(
+                                "%(model)s.%(func)s not available",
+                                {"model": self._name, "func": str(function)},
+                            )
+                            continue
+                        value = None
+                    self._add_json_key(values, json_key, value)
+            else:
+                self._jsonify_run_subparser(field_name, json_key, *arg, results)
+
+    def _jsonify_run_subparser(self, field_name, json_key, subparser, plans, results):
+        field = self._fields[field_name]
+        related = [rec[field_name] or None for rec in self]
+        ids_by_model = {}
+        for subrecords in related:
+            if subrecords is not None:
+                ids_by_model.setdefault(subrecords._name, []).extend(subrecords._ids)
+        sub_results = {}
+        for model, ids in ids_by_model.items():
+            subrecords = self.env[model].browse(ids)
+            if subrecords._jsonify_overridden(JSONIFY_RECORD_METHODS):
+                sub_results[model] = [
+                    subrecords._jsonify_record(subparser, rec, {}) for rec in subrecords
+                ]
+                sub_results[model].reverse()
+                continue
+            if model not in plans:
+                plans[model] = subrecords._jsonify_compile(subparser)
+            sub_results[model] = [{} for __ in ids]
+            subrecords._jsonify_run(plans[model], sub_results[model])
+            sub_results[model].reverse()
+        for subrecords, values in zip(related, results):
+            value = []
+            if subrecords is not None:
+                model_results = sub_results[subrecords._name]
+                value = [model_results.pop() for __ in subrecords._ids]
+            if field.type in ("many2one", "reference"):
+                value = value[0] if value else None
+            self._add_json_key(values, json_key, value)
+
     def jsonify(self, parser, one=False):
         """Convert the record according to the given parser.
 
@@ -213,13 +407,45 @@ class Base(models.AbstractModel):
         for lang in parsers:
             translate = lang or parser.get("language_agnostic")
             records = records.with_context(lang=lang) if translate else records
-            for record, json in zip(records, results):
-                self._jsonify_record(parsers[lang], record, json)
+            if records._jsonify_overridden(JSONIFY_RECORD_METHODS):
+                # keep calling the overrides of the record by record methods
+                for record, json in zip(records, results):
+                    self._jsonify_record(parsers[lang], record, json)
+            elif records:
+                plan = records._jsonify_compile(parsers[lang])
+                records._jsonify_run(plan, results)
 
         if resolver:
             results = resolver.resolve(results, self)
         return results[0] if one else results
 
+    def jsonify_iter(self, parser, chunk_size=None):
+        """Generate the result of ``jsonify()`` record by record.
+
+        The records are jsonified by chunks of ``chunk_size`` records
+        (``PREFETCH_MAX`` by default), and the cache is cleared after each
+        chunk, so that the memory used does not depend on the number of
+        records.
+        """
+        chunk_size = chunk_size or models.PREFETCH_MAX
+        # pending updates would be lost when clearing the cache
+        self.flush()
+        for ids in split_every(chunk_size, self.ids):
+            yield from self.browse(ids).jsonify(parser)
+            self.invalidate_cache()
+
+    def jsonify_ndjson(self, parser, stream, chunk_size=None):
+        """Write the result of ``jsonify()`` to the binary file-like object
+        ``stream`` as newline delimited JSON (one record per line), without
+        building it in memory. Return the number of records written.
+        """
+        count = 0
+        for values in self.jsonify_iter(parser, chunk_size=chunk_size):
+            stream.write(encoder.dumps(values).encode())
+            stream.write(b"\n")
+            count += 1
+        return count
+
     # HELPERS
 
     def _jsonify_m2o_to_id(self, fname):
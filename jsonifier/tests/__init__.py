@@ -1,3 +1,4 @@
 from . import test_get_parser
 from . import test_helpers
 from . import test_ir_exports_line
+from . import test_benchmark
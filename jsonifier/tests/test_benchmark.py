@@ -0,0 +1,66 @@
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import logging
+import time
+
+from odoo.tests.common import SavepointCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("-standard", "jsonifier_benchmark")
+class TestJsonifyBenchmark(SavepointCase):
+    """Compare the compiled parsers to the jsonification of each record.
+
+    Not run by default, run with ``--test-tags jsonifier_benchmark``.
+    """
+
+    nb_partners = 100000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        country = cls.env.ref("base.fr")
+        category = cls.env["res.partner.category"].create({"name": "Benchmark"})
+        cls.partners = cls.env["res.partner"].create(
+            [
+                {
+                    "name": "Partner %s" % index,
+                    "country_id": country.id,
+                    "category_id": [(6, 0, category.ids)],
+                    "child_ids": [
+                        (0, 0, {"name": "Contact %s.1" % index, "type": "invoice"}),
+                        (0, 0, {"name": "Contact %s.2" % index, "type": "delivery"}),
+                    ],
+                }
+                for index in range(cls.nb_partners)
+            ]
+        )
+        cls.parser = cls.env.ref("jsonifier.ir_exp_partner").get_json_parser()
+
+    def _jsonify(self, jsonify):
+        self.env["base"].invalidate_cache()
+        records = self.partners.with_context(jsonifier__date_user_tz=True)
+        start = time.time()
+        result = jsonify(records)
+        return result, time.time() - start
+
+    def test_benchmark_compiled_parser(self):
+        fields_parser = self.parser["fields"]
+        expected, interpreted_time = self._jsonify(
+            lambda records: [
+                records._jsonify_record(fields_parser, rec, {}) for rec in records
+            ]
+        )
+        result, compiled_time = self._jsonify(
+            lambda records: records.jsonify(self.parser)
+        )
+        _logger.info(
+            "Jsonify %s partners with their contacts: %.2fs interpreted, "
+            "%.2fs compiled",
+            len(self.partners),
+            interpreted_time,
+            compiled_time,
+        )
+        self.assertEqual(result, expected)
@@ -3,6 +3,9 @@
 # Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import io
+import json
+
 import mock
 
 from odoo import fields, tools
@@ -362,3 +365,79 @@ class TestParser(SavepointCase):
             mocked_logger.assert_called()
 
         tools.config["test_enable"] = True
+
+    def test_compiled_parser_multi_records(self):
+        """Jsonifying records at once gives the same result as jsonifying
+        each of them with ``_jsonify_record()``, including records met several
+        times at some level.
+        """
+        other = self.partner.copy(
+            {"name": "Camptocamp", "category_id": self.partner.category_id.ids}
+        )
+        partners = self.partner + other + self.partner.child_ids + self.partner
+        parser = self.env.ref("jsonifier.ir_exp_partner").get_json_parser()
+        records = partners.with_context(jsonifier__date_user_tz=True)
+        expected = [
+            records._jsonify_record(parser["fields"], rec, {}) for rec in records
+        ]
+        self.assertEqual(partners.jsonify(parser), expected)
+        self.assertEqual(
+            partners.jsonify([("category_id", ["name"]), ("parent_id", ["name"])]),
+            [
+                {"category_id": [{"name": "Inovator"}], "parent_id": None},
+                {"category_id": [{"name": "Inovator"}], "parent_id": None},
+                {"category_id": [], "parent_id": {"name": "Akretion"}},
+                {"category_id": [{"name": "Inovator"}], "parent_id": None},
+            ],
+        )
+
+    def test_jsonify_iter(self):
+        partners = self.partner + self.partner.child_ids
+        parser = self.env.ref("jsonifier.ir_exp_partner").get_json_parser()
+        expected = partners.jsonify(parser)
+        self.assertEqual(list(partners.jsonify_iter(parser, chunk_size=1)), expected)
+        stream = io.BytesIO()
+        self.assertEqual(partners.jsonify_ndjson(parser, stream, chunk_size=1), 2)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_jsonify_overrides(self):
+        """The overrides of the methods jsonifying each record or value are
+        still called.
+        """
+        partners = self.partner + self.partner.child_ids
+        partner_class = type(self.env["res.partner"])
+        origin_value = partner_class._jsonify_value
+
+        def _jsonify_value(self, field, value):
+            if field.type == "date" and value:
+                return value.strftime("%d/%m/%Y")
+            return origin_value(self, field, value)
+
+        with mock.patch.object(partner_class, "_jsonify_value", _jsonify_value):
+            self.assertEqual(
+                partners.jsonify(["name", "date"]),
+                [
+                    {"name": "Akretion", "date": "31/10/2019"},
+                    {"name": "Sebatien Beau", "date": None},
+                ],
+            )
+        category_class = type(self.env["res.partner.category"])
+        origin_record = category_class._jsonify_record
+
+        def _jsonify_record(self, parser, rec, root):
+            root["overridden"] = True
+            return origin_record(self, parser, rec, root)
+
+        with mock.patch.object(category_class, "_jsonify_record", _jsonify_record):
+            self.assertEqual(
+                partners.jsonify([("category_id", ["name"])]),
+                [
+                    {"category_id": [{"overridden": True, "name": "Inovator"}]},
+                    {"category_id": []},
+                ],
+            )
+            self.assertEqual(
+                self.partner.category_id.jsonify(["name"]),
+                [{"overridden": True, "name": "Inovator"}],
+            )
@@ -6,7 +6,7 @@
 {
     "name": "JSONify Stored",
     "summary": "Pre-compute and store JSON data on any model",
-    "version": "14.0.1.0.0",
+    "version": "14.0.1.2.1",
     "category": "Uncategorized",
     "website": "https://github.com/OCA/server-tools",
     "author": "Camptocamp, " "Odoo Community Association (OCA)",
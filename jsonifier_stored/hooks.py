@@ -12,6 +12,8 @@ from psycopg2 import sql
 
 def add_jsonifier_column(cr, table_name):
     query = sql.SQL(
-        "ALTER TABLE {table_name} " "ADD COLUMN IF NOT EXISTS jsonified_data TEXT;"
+        "ALTER TABLE {table_name} "
+        "ADD COLUMN IF NOT EXISTS jsonified_data TEXT, "
+        "ADD COLUMN IF NOT EXISTS jsonified_data_outdated BOOLEAN;"
     ).format(table_name=sql.Identifier(table_name))
     cr.execute(query)
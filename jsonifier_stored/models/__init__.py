@@ -1 +1,3 @@
+from . import base
+from . import ir_exports
 from . import jsonifier_stored_mixin
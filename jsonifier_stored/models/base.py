@@ -0,0 +1,100 @@
+# Copyright 2022 Camptocamp SA (http://www.camptocamp.com).
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+from odoo import api, models
+
+
+def _make_create():
+    @api.model_create_multi
+    def create(self, vals_list, **kwargs):
+        records = create.origin(self, vals_list, **kwargs)
+        self._jsonify_set_dependents_outdated(records._jsonify_get_dependents())
+        return records
+
+    return create
+
+
+def _make_write():
+    def write(self, vals, **kwargs):
+        dependents = self._jsonify_get_dependents(vals)
+        result = write.origin(self, vals, **kwargs)
+        if dependents is not None:
+            # the records reached after the write, through changed relations
+            self._jsonify_set_dependents_outdated(
+                dependents, self._jsonify_get_dependents(vals)
+            )
+        return result
+
+    return write
+
+
+def _make_unlink():
+    def unlink(self, **kwargs):
+        dependents = self._jsonify_get_dependents()
+        result = unlink.origin(self, **kwargs)
+        self._jsonify_set_dependents_outdated(dependents)
+        return result
+
+    return unlink
+
+
+class Base(models.AbstractModel):
+    """Flag the stored JSON data outdated by the changes of the records
+    they depend on, to be recomputed by
+    ``jsonifier.stored.mixin.cron_update_outdated_json_data``.
+
+    Only the models the stored JSON data depend on are patched, by
+    ``_jsonify_patch_methods()``.
+    """
+
+    _inherit = "base"
+
+    @api.model
+    def _jsonify_patch_methods(self):
+        """Patch the ``create()``, ``write()`` and ``unlink()`` methods of
+        this model to flag the JSON data depending on its records outdated.
+        Return whether the methods were patched (only once per registry).
+        """
+        if vars(type(self)).get("_jsonify_stored_patched"):
+            return False
+        self._patch_method("create", _make_create())
+        self._patch_method("write", _make_write())
+        self._patch_method("unlink", _make_unlink())
+        type(self)._jsonify_stored_patched = True
+        return True
+
+    def _jsonify_get_dependents(self, field_names=None):
+        """Return the records whose stored JSON data depend on ``field_names``
+        of the current records (on the records themselves if ``None``), as
+        ``{stored_model: ids}``, or ``None`` if no stored JSON data depend on
+        them.
+        """
+        dependencies = self.env["jsonifier.stored.mixin"]._jsonify_get_dependencies()
+        if not self or self._name not in dependencies:
+            return None
+        dependents = None
+        for stored_model, path, dep_field_names in dependencies[self._name]:
+            if field_names is None:
+                if not path:
+                    # the data of new records are computed on creation
+                    continue
+            elif dep_field_names.isdisjoint(field_names):
+                continue
+            dependents = dependents or {}
+            if path:
+                records = (
+                    self.env[stored_model]
+                    .sudo()
+                    .with_context(active_test=False)
+                    .search([(path, "in", self.ids)])
+                )
+                ids = records.ids
+            else:
+                ids = self.ids
+            dependents.setdefault(stored_model, set()).update(ids)
+        return dependents
+
+    def _jsonify_set_dependents_outdated(self, *dependents_list):
+        for dependents in dependents_list:
+            for stored_model, ids in (dependents or {}).items():
+                self.env[stored_model].browse(ids)._jsonify_set_outdated()
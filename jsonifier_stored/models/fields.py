@@ -0,0 +1,17 @@
+# Copyright 2022 Camptocamp SA (http://www.camptocamp.com).
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+from odoo.addons.base_sparse_field.models.fields import Serialized
+from odoo.addons.jsonifier import encoder
+
+
+class JsonifiedData(Serialized):
+    """Serialized field encoded and decoded by the encoder of jsonifier."""
+
+    def convert_to_cache(self, value, record, validate=True):
+        if isinstance(value, (dict, list)):
+            return encoder.dumps(value)
+        return value or None
+
+    def convert_to_record(self, value, record):
+        return encoder.loads(value or "{}")
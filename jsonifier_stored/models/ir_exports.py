@@ -0,0 +1,48 @@
+# Copyright 2022 Camptocamp SA (http://www.camptocamp.com).
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+from odoo import api, models
+
+
+class IrExportsMixin(models.AbstractModel):
+    """Reset the dependencies of the stored JSON data on exporters changes."""
+
+    _name = "jsonifier.stored.exports.mixin"
+    _description = "JSONifier stored exporters mixin"
+
+    def _jsonify_clear_dependencies(self):
+        stored_mixin = self.env["jsonifier.stored.mixin"]
+        stored_mixin.clear_caches()
+        if stored_mixin._jsonify_patch_dependencies():
+            # reload the registry of the other workers to patch them there
+            self.pool.registry_invalidated = True
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._jsonify_clear_dependencies()
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        self._jsonify_clear_dependencies()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self._jsonify_clear_dependencies()
+        return result
+
+
+class IrExports(models.Model):
+    _name = "ir.exports"
+    _inherit = ["ir.exports", "jsonifier.stored.exports.mixin"]
+
+    def _register_hook(self):
+        super()._register_hook()
+        self.env["jsonifier.stored.mixin"]._jsonify_patch_dependencies()
+
+
+class IrExportsLine(models.Model):
+    _name = "ir.exports.line"
+    _inherit = ["ir.exports.line", "jsonifier.stored.exports.mixin"]
@@ -3,15 +3,16 @@
 # @author Matthieu Méquignon <matthieu.mequignon@camptocamp.com>
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
-import json
 import logging
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from itertools import groupby
 
-from odoo import api, fields, models
+from odoo import api, fields, models, tools
 from odoo.tools.misc import get_lang, split_every
 
-from odoo.addons.base_sparse_field.models.fields import Serialized
+from odoo.addons.jsonifier import encoder
+
+from .fields import JsonifiedData
 
 GrouperAndSorter = namedtuple("GrouperAndSorter", "exporter_id lang")
 
@@ -29,7 +30,8 @@ class JsonifyStoredMixin(models.AbstractModel):
     jsonified_display = fields.Text(
         compute="_compute_jsonified_display",
     )
-    jsonified_data = Serialized(compute="_compute_jsonified_data", store=True)
+    jsonified_data = JsonifiedData(compute="_compute_jsonified_data", store=True)
+    jsonified_data_outdated = fields.Boolean(index=True, copy=False)
 
     def _compute_ir_export_id(self):
         for record in self:
@@ -41,7 +43,7 @@ class JsonifyStoredMixin(models.AbstractModel):
 
     def _compute_jsonified_display(self):
         for record in self:
-            record.jsonified_display = json.dumps(
+            record.jsonified_display = encoder.dumps(
                 record.jsonified_data, sort_keys=True, indent=4
             )
 
@@ -51,18 +53,28 @@ class JsonifyStoredMixin(models.AbstractModel):
         Optimized to always group by lang and parser
         even when large mixed recordsets are updated.
         """
+        for records, parser in self._jsonify_groups():
+            if not parser:
+                records.jsonified_data = False
+                continue
+            self._update_jsonified_data(records, parser)
+
+    def _jsonify_groups(self):
+        """Yield the records grouped by exporter and lang, in the context of
+        their lang, with the parser of their exporter (``None`` if they have
+        none).
+        """
         default_lang = self._get_default_lang()
         for grouper, group in self._compute_jsonified_data_groupby():
             records = self.browse([r.id for r in group])
             exporter = grouper.exporter_id
             if not exporter:
-                records.jsonified_data = False
                 _logger.error("%s have no exporter", str(records._name))
+                yield records, None
                 continue
             lang_code = (grouper.lang or default_lang).code
             # `get_json_parser` is cached
-            parser = exporter.get_json_parser()
-            self._update_jsonified_data(records.with_context(lang=lang_code), parser)
+            yield records.with_context(lang=lang_code), exporter.get_json_parser()
 
     def _compute_jsonified_data_groupby(self):
         _grouper_and_sorter = self._jsonify_data_grouper_and_sorter
@@ -97,6 +109,150 @@ class JsonifyStoredMixin(models.AbstractModel):
         # Hook to override data
         return self.jsonify(parser)
 
+    def _refresh_jsonified_data(self):
+        """Recompute the JSON data of the records, only writing the data
+        which changed, and clear their outdated flag.
+
+        Return the number of records rewritten and skipped.
+        """
+        self._jsonify_set_outdated(False)
+        rewritten = skipped = 0
+        for records, parser in self._jsonify_groups():
+            if not parser:
+                continue
+            for record, data in zip(records, records._get_jsonified_data(parser)):
+                if record.jsonified_data == data:
+                    skipped += 1
+                    continue
+                record.jsonified_data = data
+                rewritten += 1
+        return rewritten, skipped
+
+    def _jsonify_set_outdated(self, outdated=True):
+        """Set the outdated flag of the records, without going through
+        ``write()``.
+        """
+        if not self:
+            return
+        self.env.cr.execute(
+            'UPDATE "%s" SET jsonified_data_outdated = %%s '
+            "WHERE id IN %%s AND jsonified_data_outdated IS DISTINCT FROM %%s"
+            % self._table,
+            (outdated, tuple(self.ids), outdated),
+        )
+        self.invalidate_cache(["jsonified_data_outdated"], self.ids)
+
+    @api.model
+    @tools.ormcache()
+    def _jsonify_get_dependencies(self):
+        """Return the fields the stored JSON data depend on, from the parsers
+        of the exporters of the models inheriting from this mixin, as
+        ``{model: ((stored_model, path, field_names), ...)}``: a write on
+        ``field_names`` of a ``model`` record outdates the ``stored_model``
+        records reaching it through ``path`` (``""`` for the record itself).
+        """
+        dependencies = defaultdict(lambda: defaultdict(set))
+
+        def add_dependencies(stored_model, model, parser, path):
+            for parser_field in parser:
+                field_dict, subparser = (
+                    parser_field
+                    if isinstance(parser_field, tuple)
+                    else (parser_field, None)
+                )
+                field = model._fields.get(field_dict["name"])
+                if not field:
+                    continue
+                dependencies[model._name][stored_model, path].add(field.name)
+                if not field.relational:
+                    continue
+                comodel = self.env[field.comodel_name]
+                subpath = "%s.%s" % (path, field.name) if path else field.name
+                if field.type == "one2many":
+                    # records added to or removed from the relation
+                    dependencies[comodel._name][stored_model, subpath].add(
+                        field.inverse_name
+                    )
+                if subparser:
+                    add_dependencies(stored_model, comodel, subparser, subpath)
+                elif comodel._rec_name:
+                    # exported as its display name
+                    dependencies[comodel._name][stored_model, subpath].add(
+                        comodel._rec_name
+                    )
+
+        for model_name in self._inherit_children:
+            if model_name not in self.env:
+                continue
+            exporters = (
+                self.env["ir.exports"].sudo().search([("resource", "=", model_name)])
+            )
+            for exporter in exporters:
+                parser = exporter.get_json_parser()
+                parsers = (
+                    [parser["fields"]]
+                    if "fields" in parser
+                    else parser["langs"].values()
+                )
+                for fields_parser in parsers:
+                    add_dependencies(
+                        model_name, self.env[model_name], fields_parser, ""
+                    )
+        return {
+            model: tuple(
+                (stored_model, path, frozenset(field_names))
+                for (stored_model, path), field_names in paths.items()
+            )
+            for model, paths in dependencies.items()
+        }
+
+    @api.model
+    def _jsonify_patch_dependencies(self):
+        """Patch the models the stored JSON data depend on (see
+        ``base._jsonify_patch_methods()``). Return whether a model was patched.
+        """
+        patched = False
+        for model_name in self._jsonify_get_dependencies():
+            if model_name in self.env:
+                patched |= self.env[model_name]._jsonify_patch_methods()
+        return patched
+
+    @api.model
+    def cron_update_outdated_json_data(self, chunk_size=500, job_params=None):
+        """Generate jobs to recompute the JSON data outdated by the changes
+        of the data they depend on, for all models inheriting from this mixin.
+        """
+        for model_name in self._inherit_children:
+            model = self.env[model_name]
+            records = model.with_context(active_test=False).search(
+                [("jsonified_data_outdated", "=", True)]
+            )
+            if not records:
+                continue
+            _logger.info(
+                "cron_update_outdated_json_data: %s outdated %s records",
+                len(records),
+                model_name,
+            )
+            params = dict(job_params or {})
+            params.setdefault("description", f"Refresh JSON data for: {model_name}")
+            params = model._jobify_json_data_compute_job_params(**params)
+            for ids_chunk in split_every(chunk_size, records.ids):
+                self.with_delay(**params).jsonify_refresh_data_for(
+                    model_name, ids_chunk
+                )
+
+    @api.model
+    def jsonify_refresh_data_for(self, model_name, ids):
+        records = self.env[model_name].browse(ids).exists()
+        rewritten, skipped = records._refresh_jsonified_data()
+        message = "%s records rewritten, %s unchanged records skipped" % (
+            rewritten,
+            skipped,
+        )
+        _logger.info("jsonify_refresh_data_for %s: %s", model_name, message)
+        return message
+
     @api.model
     def cron_update_json_data_for(
         self,
@@ -1,3 +1,5 @@
 from . import test_single_lang
 from . import test_multi_lang
 from . import test_cron
+from . import test_refresh
+from . import test_benchmark
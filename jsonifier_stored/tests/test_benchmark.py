@@ -0,0 +1,59 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+import json
+import logging
+import time
+
+from odoo.tests.common import tagged
+
+from odoo.addons.jsonifier import encoder
+
+from .common import TestJsonifyStoredCase
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("-standard", "jsonifier_benchmark")
+class TestBenchmark(TestJsonifyStoredCase):
+    """Throughput of the computation of the stored JSON data, with the
+    standard JSON encoder and the default one (orjson when installed).
+
+    Not run by default, run with ``--test-tags jsonifier_benchmark``.
+    """
+
+    nb_records = 20000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.records = cls.fake_model.create(
+            [
+                {"name": "Fake %s" % index, "description": "Fake descr %s" % index}
+                for index in range(cls.nb_records)
+            ]
+        )
+
+    def _compute_throughput(self):
+        self.records.invalidate_cache()
+        start = time.time()
+        self.records._compute_jsonified_data()
+        self.records.flush()
+        return len(self.records) / (time.time() - start)
+
+    def test_benchmark_encoders(self):
+        encoder.set_encoder(lambda value, **kw: json.dumps(value, **kw), json.loads)
+        try:
+            std_throughput = self._compute_throughput()
+        finally:
+            encoder.set_encoder()
+        default_throughput = self._compute_throughput()
+        _logger.info(
+            "Stored JSON data computed per second: %.0f with json, "
+            "%.0f with the default encoder",
+            std_throughput,
+            default_throughput,
+        )
+        self.assertEqual(
+            self.records[0].jsonified_data,
+            {"id": self.records[0].id, "name": "Fake 0", "description": "Fake descr 0"},
+        )
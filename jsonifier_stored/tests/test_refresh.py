@@ -0,0 +1,66 @@
+# Copyright 2022 Camptocamp SA (http://www.camptocamp.com).
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from .common import (
+    RecordCapturer,
+    TestJsonifyStoredCase,
+    perform_jobs,
+    setup_multi_lang_data,
+)
+
+
+class TestRefresh(TestJsonifyStoredCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        setup_multi_lang_data(cls)
+        cls.records = cls.all_records_multilang
+        cls.records._compute_jsonified_data()
+        cls.records._jsonify_set_outdated(False)
+
+    def _outdated(self):
+        return self.records.filtered("jsonified_data_outdated")
+
+    def test_patched_models(self):
+        """Only the models the stored JSON data depend on are patched"""
+        self.assertTrue(vars(type(self.title)).get("_jsonify_stored_patched"))
+        self.assertTrue(vars(type(self.records)).get("_jsonify_stored_patched"))
+        self.assertFalse(
+            vars(type(self.env["res.country"])).get("_jsonify_stored_patched")
+        )
+
+    def test_write_record(self):
+        self.rec_en_US_1.description = "Changed"
+        self.assertEqual(self._outdated(), self.rec_en_US_1)
+        self.assertEqual(self._outdated()._refresh_jsonified_data(), (1, 0))
+        self.assertEqual(self.rec_en_US_1.jsonified_data["description"], "Changed")
+        self.assertFalse(self._outdated())
+
+    def test_write_related_record(self):
+        self.title.name = "New Title"
+        self.assertEqual(self._outdated(), self.records)
+        # only the english name of the title changed
+        self.assertEqual(self.records._refresh_jsonified_data(), (5, 10))
+        self.assertEqual(self.rec_en_US_1.jsonified_data["title"], "New Title")
+        self.assertEqual(self.rec_fr_FR_1.jsonified_data["title"], "Title FR")
+        self.assertFalse(self._outdated())
+
+    def test_write_unrelated_record(self):
+        other_title = self.env["res.partner.title"].create({"name": "Other"})
+        other_title.name = "Changed"
+        self.assertFalse(self._outdated())
+        self.rec_en_US_1.title_id = other_title
+        self.assertEqual(self._outdated(), self.rec_en_US_1)
+
+    def test_cron(self):
+        self.title.name = "New Title"
+        with RecordCapturer(self.env["queue.job"], []) as capt:
+            self.jstored_mixin_model.cron_update_outdated_json_data()
+            jobs = capt.records
+            self.assertEqual(len(jobs), 1)
+            self.assertEqual(
+                jobs.name, f"Refresh JSON data for: {self.fake_model_multilang._name}"
+            )
+            perform_jobs(jobs)
+        self.assertFalse(self._outdated())
+        self.assertEqual(self.rec_en_US_1.jsonified_data["title"], "New Title")
@@ -1,10 +1,22 @@
 # Copyright 2018 ACSONE SA/NV.
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl).
 
+import functools
 import hashlib
+import json
+import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from fnmatch import fnmatch
 
+_logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+# files modified this recently may be modified again without any change of
+# their modification time: the digest of their addon is not cached
+RACY_DELAY = 2
+
 
 def _fnmatch(filename, patterns):
     for pattern in patterns:
@@ -32,13 +44,80 @@ def _walk(top, exclude_patterns, keep_langs):
             yield filepath
 
 
-def addon_hash(top, exclude_patterns, keep_langs):
-    """Compute a sha1 digest of file contents."""
+def _signature(top, filepaths):
+    """Return a digest of the names, sizes, modification times and inodes
+    of the files, and the most recent modification time.
+    """
+    m = hashlib.sha1()
+    last_mtime = 0
+    for filepath in filepaths:
+        stat = os.stat(os.path.join(top, filepath))
+        m.update(filepath.encode("utf-8"))
+        m.update(b"%d:%d:%d" % (stat.st_size, stat.st_mtime_ns, stat.st_ino))
+        last_mtime = max(last_mtime, stat.st_mtime)
+    return m.hexdigest(), last_mtime
+
+
+def addon_hash(top, exclude_patterns, keep_langs, cache=None):
+    """Compute a sha1 digest of file contents.
+
+    When a ``cache`` dict is given, the digest of the addon is looked up
+    there first, and reused as long as the names, sizes, modification times
+    and inodes of its files did not change: the files of unchanged addons are
+    not read again.
+    """
+    filepaths = list(_walk(top, exclude_patterns, keep_langs))
+    if cache is not None:
+        start = time.time()
+        signature, last_mtime = _signature(top, filepaths)
+        cached = cache.get(top)
+        if cached and cached[0] == signature:
+            return cached[1]
     m = hashlib.sha1()
-    for filepath in _walk(top, exclude_patterns, keep_langs):
+    for filepath in filepaths:
         # hash filename so empty files influence the hash
         m.update(filepath.encode("utf-8"))
         # hash file content
         with open(os.path.join(top, filepath), "rb") as f:
-            m.update(f.read())
-    return m.hexdigest()
+            for chunk in iter(functools.partial(f.read, CHUNK_SIZE), b""):
+                m.update(chunk)
+    digest = m.hexdigest()
+    if cache is not None:
+        if last_mtime < start - RACY_DELAY:
+            cache[top] = [signature, digest]
+        else:
+            cache.pop(top, None)
+    return digest
+
+
+def addon_hashes(tops, exclude_patterns, keep_langs, cache=None, max_workers=None):
+    """Compute the digests of several addons in parallel, as ``{top: digest}``
+    (see ``addon_hash``).
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        digests = executor.map(
+            lambda top: addon_hash(top, exclude_patterns, keep_langs, cache=cache),
+            tops,
+        )
+        return dict(zip(tops, digests))
+
+
+def load_cache(path):
+    """Load the cache of addon digests stored at ``path``."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path, cache):
+    """Store the cache of addon digests at ``path``."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = "%s.%s.tmp" % (path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        _logger.warning("Unable to save the addon checksums cache", exc_info=True)
@@ -9,7 +9,7 @@ import os
 from odoo import api, exceptions, models, tools
 from odoo.modules.module import get_module_path
 
-from ..addon_hash import addon_hash
+from ..addon_hash import addon_hashes, load_cache, save_cache
 
 PARAM_INSTALLED_CHECKSUMS = "module_auto_update.installed_checksums"
 PARAM_EXCLUDE_PATTERNS = "module_auto_update.exclude_patterns"
@@ -51,7 +51,21 @@ class Module(models.Model):
 
     def _get_checksum_dir(self):
         self.ensure_one()
+        return self._get_checksums_dir()[self.name]
 
+    @api.model
+    def _get_checksums_cache_path(self):
+        return os.path.join(
+            tools.config["data_dir"], "module_auto_update", "addon_checksums.json"
+        )
+
+    def _get_checksums_dir(self):
+        """Return the checksums of the modules, as ``{name: checksum}``.
+
+        The addons are hashed in parallel, and the checksums of those whose
+        files did not change since the previous call are read from a cache
+        stored in the data directory.
+        """
         exclude_patterns = self.env["ir.config_parameter"].get_param(
             PARAM_EXCLUDE_PATTERNS,
             DEFAULT_EXCLUDE_PATTERNS,
@@ -59,17 +73,26 @@ class Module(models.Model):
         exclude_patterns = [p.strip() for p in exclude_patterns.split(",")]
         keep_langs = self.env["res.lang"].search([]).mapped("code")
 
-        module_path = get_module_path(self.name)
-        if module_path and os.path.isdir(module_path):
-            checksum_dir = addon_hash(
-                module_path,
-                exclude_patterns,
-                keep_langs,
-            )
-        else:
-            checksum_dir = False
+        module_paths = {}
+        for module in self:
+            module_path = get_module_path(module.name)
+            if module_path and os.path.isdir(module_path):
+                module_paths[module.name] = module_path
+
+        cache_path = self._get_checksums_cache_path()
+        cache = load_cache(cache_path)
+        checksums = addon_hashes(
+            list(module_paths.values()),
+            exclude_patterns,
+            keep_langs,
+            cache=cache,
+        )
+        save_cache(cache_path, cache)
 
-        return checksum_dir
+        return {
+            module.name: checksums.get(module_paths.get(module.name), False)
+            for module in self
+        }
 
     @api.model
     def _get_saved_checksums(self):
@@ -84,11 +107,8 @@ class Module(models.Model):
 
     @api.model
     def _save_installed_checksums(self):
-        checksums = {}
         installed_modules = self.search([("state", "=", "installed")])
-        for module in installed_modules:
-            checksums[module.name] = module._get_checksum_dir()
-        self._save_checksums(checksums)
+        self._save_checksums(installed_modules._get_checksums_dir())
 
     @api.model
     def _get_modules_partially_installed(self):
@@ -98,8 +118,9 @@ class Module(models.Model):
     def _get_modules_with_changed_checksum(self):
         saved_checksums = self._get_saved_checksums()
         installed_modules = self.search([("state", "=", "installed")])
+        checksums = installed_modules._get_checksums_dir()
         return installed_modules.filtered(
-            lambda r: r._get_checksum_dir() != saved_checksums.get(r.name),
+            lambda r: checksums[r.name] != saved_checksums.get(r.name),
         )
 
     @api.model
@@ -2,8 +2,12 @@
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl).
 
 import os
+import shutil
+import tempfile
 import unittest
 
+import mock
+
 from .. import addon_hash
 from ..models.module import DEFAULT_EXCLUDE_PATTERNS
 
@@ -74,3 +78,50 @@ class TestAddonHash(unittest.TestCase):
             keep_langs=["fr_FR", "nl"],
         )
         self.assertEqual(checksum, "fecb89486c8a29d1f760cbd01c1950f6e8421b14")
+
+    def _copy_sample_dir(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        sample_dir = os.path.join(tmp_dir, "sample_module")
+        shutil.copytree(self.sample_dir, sample_dir)
+        # not modified recently, so that the digest can be cached
+        for dirpath, __, filenames in os.walk(sample_dir):
+            for filename in filenames:
+                os.utime(os.path.join(dirpath, filename), (1e9, 1e9))
+        return sample_dir
+
+    def test_cache(self):
+        sample_dir = self._copy_sample_dir()
+        params = {
+            "exclude_patterns": ["*.pyc", "*.pyo", "*.pot", "static/*"],
+            "keep_langs": ["fr_FR", "nl"],
+        }
+        cache = {}
+        checksum = addon_hash.addon_hash(sample_dir, cache=cache, **params)
+        self.assertEqual(checksum, "fecb89486c8a29d1f760cbd01c1950f6e8421b14")
+        self.assertEqual(cache[sample_dir][1], checksum)
+        # unchanged files are not read again
+        with mock.patch.object(
+            addon_hash, "open", side_effect=AssertionError, create=True
+        ):
+            self.assertEqual(
+                addon_hash.addon_hash(sample_dir, cache=cache, **params), checksum
+            )
+        stuff_path = os.path.join(sample_dir, "models", "stuff.py")
+        with open(stuff_path, "a") as f:
+            f.write("# changed\n")
+        os.utime(stuff_path, (1e9 + 1, 1e9 + 1))
+        self.assertNotEqual(
+            addon_hash.addon_hash(sample_dir, cache=cache, **params), checksum
+        )
+
+    def test_addon_hashes(self):
+        sample_dir = self._copy_sample_dir()
+        params = {"exclude_patterns": ["*.pyc"], "keep_langs": []}
+        self.assertEqual(
+            addon_hash.addon_hashes([self.sample_dir, sample_dir], **params),
+            {
+                self.sample_dir: addon_hash.addon_hash(self.sample_dir, **params),
+                sample_dir: addon_hash.addon_hash(self.sample_dir, **params),
+            },
+        )
@@ -1,6 +1,6 @@
 {
     "name": "Store sessions in DB",
-    "version": "14.0.1.0.1",
+    "version": "14.0.1.3.0",
     "author": "Odoo SA,ACSONE SA/NV,Odoo Community Association (OCA)",
     "license": "LGPL-3",
     "website": "https://github.com/OCA/server-tools",
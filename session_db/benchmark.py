@@ -0,0 +1,70 @@
+# Copyright (c) ACSONE SA 2022
+"""Measure the session operations per second of ``PGSessionStore``.
+
+Usage::
+
+    SESSION_DB_URI=sessions python -m odoo.addons.session_db.benchmark \
+        --threads 1,2,4,8,16 --duration 5
+"""
+import argparse
+import os
+import threading
+import time
+import uuid
+
+from odoo import http
+
+from .pg_session_store import PGSessionStore
+
+
+def _worker(store, deadline, counts, index):
+    sid = uuid.uuid4().hex
+    session = store.session_class({"login": "admin", "uid": index}, sid, True)
+    operations = 0
+    while time.time() < deadline:
+        store.save(session)
+        store.get(sid)
+        operations += 2
+    store.delete(session)
+    counts[index] = operations
+
+
+def run(store, nb_threads, duration):
+    """Return the session operations (``get`` and ``save``) per second
+    done by ``nb_threads`` threads sharing ``store`` during ``duration``
+    seconds.
+    """
+    counts = [0] * nb_threads
+    deadline = time.time() + duration
+    threads = [
+        threading.Thread(target=_worker, args=(store, deadline, counts, index))
+        for index in range(nb_threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default=os.environ.get("SESSION_DB_URI"))
+    parser.add_argument("--threads", default="1,2,4,8,16")
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument(
+        "--pool-size", type=int, default=int(os.environ.get("SESSION_DB_POOL_SIZE", 8))
+    )
+    args = parser.parse_args()
+    if not args.uri:
+        parser.error("--uri or the SESSION_DB_URI environment variable is required")
+    store = PGSessionStore(
+        args.uri, session_class=http.OpenERPSession, pool_size=args.pool_size
+    )
+    print("%8s %12s" % ("threads", "ops/s"))
+    for nb_threads in [int(n) for n in args.threads.split(",")]:
+        print("%8d %12.0f" % (nb_threads, run(store, nb_threads, args.duration)))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,43 +2,135 @@
 # @author Nicolas Seinlet
 # Copyright (c) ACSONE SA 2022
 # @author Stéphane Bidoul
+import base64
+import hashlib
 import json
 import logging
 import os
+import queue
 import random
+import threading
 import time
+import zlib
+from contextlib import contextmanager
 
 import psycopg2
+import psycopg2.extensions
 import werkzeug.contrib.sessions
 
 import odoo
 from odoo import http
+from odoo.tools import config
 from odoo.tools.func import lazy_property
 
 _logger = logging.getLogger(__name__)
 
-lock = None
-if odoo.evented:
-    import gevent.lock
+# Prefix of the payloads stored compressed, which can not be mistaken for a
+# JSON object
+COMPRESSED_PREFIX = "z:"
 
-    lock = gevent.lock.RLock()
-elif odoo.tools.config["workers"] == 0:
-    import threading
+# Statements prepared on each connection of the pool: name -> (types, query)
+PREPARED_STATEMENTS = {
+    "http_session_get": (
+        "varchar",
+        """
+            SELECT payload,
+                   extract(epoch FROM now() at time zone 'UTC' - write_date)::float
+            FROM http_sessions WHERE sid = $1
+        """,
+    ),
+    "http_session_save": (
+        "varchar, text",
+        """
+            INSERT INTO http_sessions(sid, write_date, payload)
+                VALUES ($1, now() at time zone 'UTC', $2)
+            ON CONFLICT (sid)
+            DO UPDATE SET payload = $2,
+                          write_date = now() at time zone 'UTC'
+        """,
+    ),
+    "http_session_touch": (
+        "varchar",
+        """
+            UPDATE http_sessions SET write_date = now() at time zone 'UTC'
+            WHERE sid = $1
+        """,
+    ),
+    "http_session_delete": (
+        "varchar",
+        "DELETE FROM http_sessions WHERE sid = $1",
+    ),
+}
 
-    lock = threading.RLock()
 
+def payload_digest(payload):
+    return hashlib.blake2b(payload.encode(), digest_size=16).digest()
 
-def with_lock(func):
-    def wrapper(*args, **kwargs):
-        try:
-            if lock is not None:
-                lock.acquire()
-            return func(*args, **kwargs)
-        finally:
-            if lock is not None:
-                lock.release()
 
-    return wrapper
+class SessionConnection(psycopg2.extensions.connection):
+    prepared = False
+
+
+class ConnectionPool(object):
+    """Bounded pool of autocommit connections to the sessions database.
+
+    Each thread (or greenlet, with the evented server) borrows its own
+    connection for the duration of one operation, and waits for one to be
+    available if ``size`` connections are already in use.
+    """
+
+    def __init__(self, uri, size):
+        self._connection_info = odoo.sql_db.connection_info_for(uri)[1]
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        cnx = psycopg2.connect(
+            connection_factory=SessionConnection, **self._connection_info
+        )
+        cnx.autocommit = True
+        return cnx
+
+    @contextmanager
+    def cursor(self, prepare=True):
+        with self._slots:
+            try:
+                cnx = self._idle.get_nowait()
+            except queue.Empty:
+                cnx = self._connect()
+            broken = False
+            try:
+                with cnx.cursor() as cr:
+                    if prepare and not cnx.prepared:
+                        for name, (types, query) in PREPARED_STATEMENTS.items():
+                            cr.execute("PREPARE %s(%s) AS %s" % (name, types, query))
+                        cnx.prepared = True
+                    yield cr
+            except (psycopg2.InterfaceError, psycopg2.OperationalError):
+                # the connection is lost, do not give it back to the pool
+                broken = True
+                raise
+            finally:
+                self._release(cnx, broken or (prepare and not cnx.prepared))
+
+    def _release(self, cnx, broken):
+        """Give ``cnx`` back to the pool, or close it if it is not usable"""
+        if not broken and not cnx.closed:
+            try:
+                cnx.rollback()
+            except psycopg2.Error:
+                _logger.info("Session in DB connection discarded", exc_info=True)
+            else:
+                self._idle.put(cnx)
+                return
+        cnx.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
 
 
 def with_cursor(func):
@@ -47,92 +139,138 @@ def with_cursor(func):
         while True:
             tries += 1
             try:
-                return func(self, *args, **kwargs)
+                with self._pool.cursor() as cr:
+                    return func(self, cr, *args, **kwargs)
             except (psycopg2.InterfaceError, psycopg2.OperationalError) as e:
                 _logger.info("Session in DB connection Retry %s/5" % tries)
                 if tries > 4:
                     raise e
-                self._open_connection()
 
     return wrapper
 
 
 class PGSessionStore(werkzeug.contrib.sessions.SessionStore):
-    def __init__(self, uri, session_class=None):
+    """Store the sessions in the ``http_sessions`` table of a database.
+
+    Sessions are only written when their payload changed since they were
+    read; the write date of unchanged sessions, which determines their
+    expiry, is refreshed at most every ``touch_delay`` seconds. Payloads
+    larger than ``compress_threshold`` bytes are stored compressed (0
+    disables the compression).
+    """
+
+    def __init__(
+        self,
+        uri,
+        session_class=None,
+        pool_size=8,
+        touch_delay=3600,
+        compress_threshold=0,
+    ):
         super().__init__(session_class)
         self._uri = uri
-        self._cr = None
-        self._open_connection()
+        self._touch_delay = touch_delay
+        self._compress_threshold = compress_threshold
+        self._pool = ConnectionPool(uri, pool_size)
         self._setup_db()
 
     def __del__(self):
-        if self._cr is not None:
-            self._cr.close()
+        self._pool.close()
 
-    @with_lock
-    def _open_connection(self):
-        # return cursor to the pool
-        if self._cr is not None:
-            try:
-                self._cr.close()
-            except Exception:
-                pass
-            self._cr = None
-        cnx = odoo.sql_db.db_connect(self._uri, allow_uri=True)
-        self._cr = cnx.cursor()
-        self._cr.autocommit(True)
-
-    @with_lock
-    @with_cursor
     def _setup_db(self):
-        self._cr.execute(
-            """
-                CREATE TABLE IF NOT EXISTS http_sessions (
-                    sid varchar PRIMARY KEY,
-                    write_date timestamp without time zone NOT NULL,
-                    payload text NOT NULL
-                )
-            """
-        )
+        with self._pool.cursor(prepare=False) as cr:
+            cr.execute(
+                """
+                    CREATE TABLE IF NOT EXISTS http_sessions (
+                        sid varchar PRIMARY KEY,
+                        write_date timestamp without time zone NOT NULL,
+                        payload text NOT NULL
+                    )
+                """
+            )
+            cr.execute(
+                """
+                    CREATE INDEX IF NOT EXISTS http_sessions_write_date_index
+                    ON http_sessions (write_date)
+                """
+            )
+
+    def _dumps(self, session):
+        payload = json.dumps(dict(session), separators=(",", ":"))
+        if self._compress_threshold and len(payload) > self._compress_threshold:
+            compressed = zlib.compress(payload.encode())
+            payload = COMPRESSED_PREFIX + base64.b64encode(compressed).decode()
+        return payload
+
+    def _loads(self, payload):
+        if payload.startswith(COMPRESSED_PREFIX):
+            compressed = base64.b64decode(payload[len(COMPRESSED_PREFIX) :])
+            payload = zlib.decompress(compressed).decode()
+        return json.loads(payload)
+
+    @staticmethod
+    def _set_state(session, payload, write_time):
+        # not through the attributes of the session, which OpenERPSession
+        # stores in the session itself
+        vars(session)["_session_db_state"] = (payload_digest(payload), write_time)
 
-    @with_lock
     @with_cursor
-    def save(self, session):
-        payload = json.dumps(dict(session))
-        self._cr.execute(
-            """
-                INSERT INTO http_sessions(sid, write_date, payload)
-                    VALUES (%(sid)s, now() at time zone 'UTC', %(payload)s)
-                ON CONFLICT (sid)
-                DO UPDATE SET payload = %(payload)s,
-                              write_date = now() at time zone 'UTC'
-            """,
-            dict(sid=session.sid, payload=payload),
-        )
+    def save(self, cr, session):
+        payload = self._dumps(session)
+        digest, write_time = vars(session).get("_session_db_state", (None, 0))
+        changed = digest != payload_digest(payload)
+        if not changed:
+            if time.time() - write_time < self._touch_delay:
+                return
+            cr.execute("EXECUTE http_session_touch(%s)", (session.sid,))
+        if changed or not cr.rowcount:
+            # changed, or garbage collected in the meantime
+            cr.execute("EXECUTE http_session_save(%s, %s)", (session.sid, payload))
+        self._set_state(session, payload, time.time())
 
-    @with_lock
     @with_cursor
-    def delete(self, session):
-        self._cr.execute("DELETE FROM http_sessions WHERE sid=%s", (session.sid,))
+    def delete(self, cr, session):
+        cr.execute("EXECUTE http_session_delete(%s)", (session.sid,))
 
-    @with_lock
     @with_cursor
-    def get(self, sid):
-        self._cr.execute("SELECT payload FROM http_sessions WHERE sid=%s", (sid,))
+    def get(self, cr, sid):
+        cr.execute("EXECUTE http_session_get(%s)", (sid,))
         try:
-            data = json.loads(self._cr.fetchone()[0])
+            payload, age = cr.fetchone()
+            data = self._loads(payload)
         except Exception:
             return self.new()
 
-        return self.session_class(data, sid, False)
+        session = self.session_class(data, sid, False)
+        self._set_state(session, payload, time.time() - age)
+        return session
 
-    @with_lock
     @with_cursor
-    def gc(self):
-        self._cr.execute(
-            "DELETE FROM http_sessions "
-            "WHERE now() at time zone 'UTC' - write_date > '7 days'"
-        )
+    def gc(self, cr, session_expiry_delay=60 * 60 * 24 * 7, batch_size=10000):
+        """Delete the sessions not written for ``session_expiry_delay``
+        seconds, by batches of ``batch_size`` sessions so that the table is
+        never locked for long. Return the number of deleted sessions.
+        """
+        start = time.time()
+        count = 0
+        while True:
+            cr.execute(
+                """
+                    DELETE FROM http_sessions WHERE sid IN (
+                        SELECT sid FROM http_sessions
+                        WHERE write_date < now() at time zone 'UTC'
+                                           - %s * interval '1 second'
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                """,
+                (int(session_expiry_delay), batch_size),
+            )
+            count += cr.rowcount
+            if cr.rowcount < batch_size:
+                break
+        _logger.info("%s expired sessions deleted in %.3fs", count, time.time() - start)
+        return count
 
 
 def session_gc(session_store):
@@ -140,6 +278,9 @@ def session_gc(session_store):
     Global cleaning of sessions using either the standard way (delete session files),
     Or the DB way.
     """
+    if "base_deterministic_session_gc" in config.get("server_wide_modules"):
+        # sessions are cleaned up by a cron
+        return
     if random.random() < 0.001:
         # we keep session one week
         if hasattr(session_store, "gc"):
@@ -163,7 +304,13 @@ def session_store(self):
     session_db_uri = os.environ.get("SESSION_DB_URI")
     if session_db_uri:
         _logger.debug("HTTP sessions stored in: db")
-        return PGSessionStore(session_db_uri, session_class=http.OpenERPSession)
+        return PGSessionStore(
+            session_db_uri,
+            session_class=http.OpenERPSession,
+            pool_size=int(os.environ.get("SESSION_DB_POOL_SIZE", 8)),
+            touch_delay=int(os.environ.get("SESSION_DB_TOUCH_DELAY", 3600)),
+            compress_threshold=int(os.environ.get("SESSION_DB_COMPRESS_THRESHOLD", 0)),
+        )
     return _original_session_store.__get__(self, self.__class__)
 
 
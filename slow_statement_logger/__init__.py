@@ -6,10 +6,15 @@ import os
 import time
 
 import psycopg2
+from psycopg2 import sql
 
-from odoo import sql_db
+from odoo import http, sql_db
 from odoo.tools import config
 
+from . import controllers
+from .budget import current_budget, track_sql_budget
+from .stats import statement_stats
+
 _logger = logging.getLogger(__name__)
 
 # TODO Odoo option? server_environment?
@@ -17,15 +22,39 @@ LOG_MIN_DURATION_STATEMENT = int(config.get("log_min_duration_statement", "-1"))
 ENV_VAR = "ODOO_LOG_MIN_DURATION_STATEMENT"
 if ENV_VAR in os.environ:
     LOG_MIN_DURATION_STATEMENT = int(os.environ.get(ENV_VAR, "-1"))
+# seconds between two summaries of the slow statements, 0 to disable them
+LOG_STATEMENT_SUMMARY_INTERVAL = int(
+    os.environ.get(
+        "ODOO_LOG_STATEMENT_SUMMARY_INTERVAL",
+        config.get("log_statement_summary_interval", "600"),
+    )
+)
+
+# maximum number of statements and duration (ms) of the statements of each
+# HTTP request or cron job, 0 for no limit
+SQL_BUDGET_STATEMENTS = int(
+    os.environ.get(
+        "ODOO_SQL_BUDGET_STATEMENTS", config.get("sql_budget_statements", "0")
+    )
+)
+SQL_BUDGET_DURATION = int(
+    os.environ.get("ODOO_SQL_BUDGET_DURATION", config.get("sql_budget_duration", "0"))
+)
+SQL_BUDGET_TOP = int(
+    os.environ.get("ODOO_SQL_BUDGET_TOP", config.get("sql_budget_top", "5"))
+)
 
 
 class SlowStatementLoggingCursor(sql_db.Cursor):
     def execute(self, query, params=None, log_exceptions=None):
-        if LOG_MIN_DURATION_STATEMENT >= 0:
+        budget = current_budget()
+        if LOG_MIN_DURATION_STATEMENT >= 0 or budget is not None:
             start = time.perf_counter()
             res = super().execute(query, params, log_exceptions)
             duration = (time.perf_counter() - start) * 1000.0
-            if duration >= LOG_MIN_DURATION_STATEMENT:
+            if budget is not None:
+                budget.add(self, duration)
+            if 0 <= LOG_MIN_DURATION_STATEMENT <= duration:
                 # same logging technique as Odoo in sql_log mode
                 encoding = psycopg2.extensions.encodings[self.connection.encoding]
                 _logger.debug(
@@ -33,9 +62,42 @@ class SlowStatementLoggingCursor(sql_db.Cursor):
                     duration,
                     self._obj.mogrify(query, params).decode(encoding, "replace"),
                 )
+                if isinstance(query, sql.Composable):
+                    query = query.as_string(self._obj)
+                statement_stats.add(query, duration, self._obj.rowcount)
+                if LOG_STATEMENT_SUMMARY_INTERVAL > 0:
+                    statement_stats.log_summary(LOG_STATEMENT_SUMMARY_INTERVAL)
             return res
         else:
             return super().execute(query, params, log_exceptions)
 
 
 sql_db.Cursor = SlowStatementLoggingCursor
+
+if SQL_BUDGET_STATEMENTS > 0 or SQL_BUDGET_DURATION > 0:
+    from odoo.addons.base.models.ir_cron import ir_cron
+
+    _logger.debug("Tracking the SQL budget of requests and cron jobs")
+    _original_dispatch = http.Root.dispatch
+    _original_callback = ir_cron._callback
+
+    def dispatch(self, environ, start_response):
+        with track_sql_budget(
+            "%s %s" % (environ.get("REQUEST_METHOD"), environ.get("PATH_INFO")),
+            max_statements=SQL_BUDGET_STATEMENTS,
+            max_duration=SQL_BUDGET_DURATION,
+            top=SQL_BUDGET_TOP,
+        ):
+            return _original_dispatch(self, environ, start_response)
+
+    def _callback(self, cron_name, server_action_id, job_id):
+        with track_sql_budget(
+            "cron %s" % cron_name,
+            max_statements=SQL_BUDGET_STATEMENTS,
+            max_duration=SQL_BUDGET_DURATION,
+            top=SQL_BUDGET_TOP,
+        ):
+            return _original_callback(self, cron_name, server_action_id, job_id)
+
+    http.Root.dispatch = dispatch
+    ir_cron._callback = _callback
@@ -1,7 +1,7 @@
 {
     "name": "Slow SQL Statement Logger",
     "summary": "Log slow SQL statements",
-    "version": "14.0.1.0.1",
+    "version": "14.0.1.2.1",
     "author": "ACSONE SA/NV, Odoo Community Association (OCA)",
     "license": "AGPL-3",
     "website": "https://github.com/OCA/server-tools",
@@ -0,0 +1,105 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""SQL statements issued while processing a request, a cron job..."""
+
+import heapq
+import logging
+import os
+import threading
+import traceback
+from contextlib import contextmanager
+
+_logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+# frames of these files are not call sites of the statements
+IGNORED_FILES = (
+    os.path.join(os.path.dirname(__file__), "__init__.py"),
+    os.path.join(os.path.dirname(__file__), "budget.py"),
+    os.path.join("odoo", "sql_db.py"),
+)
+STACK_DEPTH = 8
+
+
+class SqlBudget:
+    """Number and duration (in ms) of the statements of ``name``, with the
+    ``top`` slowest ones and the stack of their call site.
+    """
+
+    def __init__(self, name, top=5):
+        self.name = name
+        self.top = top
+        self.count = 0
+        self.duration = 0.0
+        self._slowest = []
+
+    def add(self, cursor, duration):
+        self.count += 1
+        self.duration += duration
+        if len(self._slowest) >= self.top and duration <= self._slowest[0][0]:
+            return
+        query = cursor._obj.query or b""
+        stack = [
+            frame
+            for frame in traceback.extract_stack()
+            if not frame.filename.endswith(IGNORED_FILES)
+        ][-STACK_DEPTH:]
+        item = (duration, self.count, query[:1000].decode("utf-8", "replace"), stack)
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, item)
+        else:
+            heapq.heapreplace(self._slowest, item)
+
+    def slowest(self):
+        """Return the slowest statements as ``(duration, query, stack)``,
+        the slowest first.
+        """
+        return [
+            (duration, query, stack)
+            for duration, __, query, stack in sorted(self._slowest, reverse=True)
+        ]
+
+    def check(self, max_statements=0, max_duration=0):
+        """Log a warning if more than ``max_statements`` statements or
+        ``max_duration`` ms were spent (0 for no limit).
+        """
+        if not (
+            (max_statements and self.count > max_statements)
+            or (max_duration and self.duration > max_duration)
+        ):
+            return False
+        details = []
+        for duration, query, stack in self.slowest():
+            details.append(
+                "%.3f ms  statement: %s\n%s"
+                % (duration, query, "".join(traceback.format_list(stack)))
+            )
+        _logger.warning(
+            "%s: %s statements in %.3f ms exceed the SQL budget, slowest ones:\n%s",
+            self.name,
+            self.count,
+            self.duration,
+            "\n".join(details),
+        )
+        return True
+
+
+def current_budget():
+    """Return the budget tracking the statements of the current thread,
+    if any.
+    """
+    return getattr(_local, "budget", None)
+
+
+@contextmanager
+def track_sql_budget(name, max_statements=0, max_duration=0, top=5):
+    """Track the statements executed in the block, and log a warning at its
+    end if they exceed ``max_statements`` statements or ``max_duration`` ms.
+    """
+    previous = current_budget()
+    budget = _local.budget = SqlBudget(name, top=top)
+    try:
+        yield budget
+    finally:
+        _local.budget = previous
+        budget.check(max_statements=max_statements, max_duration=max_duration)
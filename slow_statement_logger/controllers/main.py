@@ -0,0 +1,29 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import json
+
+from werkzeug.exceptions import Forbidden
+
+from odoo import http
+from odoo.http import request
+
+from ..stats import statement_stats
+
+
+class SlowStatementLogger(http.Controller):
+    @http.route("/slow_statement_logger/report", auth="user")
+    def report(self, limit=50, reset=False):
+        """Statistics of the slow statements of the worker serving the
+        request, as JSON.
+        """
+        if not request.env.user._is_admin():
+            raise Forbidden()
+        report = {
+            "since": statement_stats.since,
+            "statements": statement_stats.report(limit=int(limit)),
+        }
+        if str(reset).lower() in ("1", "true"):
+            statement_stats.reset()
+        return request.make_response(
+            json.dumps(report, indent=2),
+            headers=[("Content-Type", "application/json")],
+        )
@@ -0,0 +1,144 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""In-process statistics of the slow statements, aggregated by fingerprint."""
+
+import logging
+import math
+import random
+import re
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+# (pattern, replacement) applied in order to normalize a statement
+FINGERPRINT_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%\(\w+\)s|%s"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    # lists of values: IN (?, ?, ?), VALUES (?, ?), (?, ?)
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    (re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+"), "(?)"),
+    (re.compile(r"\s+"), " "),
+]
+# statements not aggregated with their own fingerprint once there are that many
+MAX_FINGERPRINTS = 1000
+OTHER_FINGERPRINT = "<other statements>"
+# durations kept by fingerprint to estimate the percentiles
+MAX_SAMPLES = 256
+
+
+def fingerprint(query):
+    """Return ``query`` with its literals and parameters replaced by ``?``,
+    so that the executions of a statement with different values have the
+    same fingerprint.
+    """
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        query = pattern.sub(replacement, query)
+    return query.strip()
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of the sorted ``samples``."""
+    if not samples:
+        return 0.0
+    return samples[max(int(math.ceil(percent / 100.0 * len(samples))) - 1, 0)]
+
+
+class StatementStats:
+    """Count, durations (in ms) and rows of the statements of this process,
+    by fingerprint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._last_summary = self.since = time.time()
+
+    def add(self, query, duration, rows):
+        key = fingerprint(query)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= MAX_FINGERPRINTS:
+                    key = OTHER_FINGERPRINT
+                stats = self._stats.setdefault(
+                    key,
+                    {"count": 0, "total": 0.0, "max": 0.0, "rows": 0, "samples": []},
+                )
+            stats["count"] += 1
+            stats["total"] += duration
+            stats["max"] = max(stats["max"], duration)
+            stats["rows"] += max(rows, 0)
+            # reservoir sampling: each duration has the same chance to be kept
+            samples = stats["samples"]
+            if len(samples) < MAX_SAMPLES:
+                samples.append(duration)
+            else:
+                index = random.randrange(stats["count"])
+                if index < MAX_SAMPLES:
+                    samples[index] = duration
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self.since = time.time()
+
+    def report(self, limit=None):
+        """Return the statistics by fingerprint, the statements costing the
+        most time overall first.
+        """
+        with self._lock:
+            items = [
+                (key, dict(stats, samples=sorted(stats["samples"])))
+                for key, stats in self._stats.items()
+            ]
+        items.sort(key=lambda item: item[1]["total"], reverse=True)
+        return [
+            {
+                "fingerprint": key,
+                "count": stats["count"],
+                "total": stats["total"],
+                "mean": stats["total"] / stats["count"],
+                "p50": percentile(stats["samples"], 50),
+                "p95": percentile(stats["samples"], 95),
+                "max": stats["max"],
+                "rows": stats["rows"],
+            }
+            for key, stats in items[:limit]
+        ]
+
+    def log_summary(self, interval, limit=20):
+        """Log the report of the statements costing the most time, if the
+        last summary was logged more than ``interval`` seconds ago.
+        """
+        now = time.time()
+        if now - self._last_summary < interval:
+            return
+        with self._lock:
+            if now - self._last_summary < interval:
+                return
+            self._last_summary = now
+        report = self.report(limit=limit)
+        if not report:
+            return
+        lines = [
+            "%(count)8d %(total)12.1f %(mean)9.1f %(p50)9.1f %(p95)9.1f %(max)9.1f "
+            "%(rows)10d  %(fingerprint).300s" % line
+            for line in report
+        ]
+        _logger.info(
+            "slow statements since %s (ms):\n%8s %12s %9s %9s %9s %9s %10s  %s\n%s",
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.since)),
+            "count",
+            "total",
+            "mean",
+            "p50",
+            "p95",
+            "max",
+            "rows",
+            "statement",
+            "\n".join(lines),
+        )
+
+
+statement_stats = StatementStats()
@@ -0,0 +1,2 @@
+from . import test_budget
+from . import test_stats
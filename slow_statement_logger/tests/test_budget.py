@@ -0,0 +1,64 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+from types import SimpleNamespace
+
+from odoo.tests.common import BaseCase
+
+from ..budget import SqlBudget, current_budget, track_sql_budget
+
+LOGGER = "odoo.addons.slow_statement_logger.budget"
+
+
+def _cursor(query):
+    return SimpleNamespace(_obj=SimpleNamespace(query=query.encode()))
+
+
+class TestSqlBudget(BaseCase):
+    def test_max_statements(self):
+        budget = SqlBudget("test")
+        for index in range(3):
+            budget.add(_cursor("SELECT %s" % index), 1.0)
+        self.assertFalse(budget.check(max_statements=3))
+        budget.add(_cursor("SELECT 3"), 1.0)
+        with self.assertLogs(LOGGER, "WARNING") as logs:
+            self.assertTrue(budget.check(max_statements=3))
+        self.assertIn("test: 4 statements in 4.000 ms", logs.output[0])
+        self.assertFalse(budget.check())
+
+    def test_max_duration(self):
+        budget = SqlBudget("test")
+        budget.add(_cursor("SELECT 1"), 5.0)
+        budget.add(_cursor("SELECT 2"), 5.0)
+        self.assertFalse(budget.check(max_duration=10))
+        budget.add(_cursor("SELECT 3"), 0.5)
+        with self.assertLogs(LOGGER, "WARNING"):
+            self.assertTrue(budget.check(max_duration=10))
+
+    def test_slowest(self):
+        budget = SqlBudget("test", top=3)
+        for duration in (3.0, 1.0, 5.0, 2.0, 4.0):
+            budget.add(_cursor("SELECT %s" % duration), duration)
+        slowest = budget.slowest()
+        self.assertEqual([duration for duration, __, __ in slowest], [5.0, 4.0, 3.0])
+        self.assertEqual(
+            [query for __, query, __ in slowest],
+            ["SELECT 5.0", "SELECT 4.0", "SELECT 3.0"],
+        )
+        # the call sites of the statements are kept
+        self.assertTrue(all(stack for __, __, stack in slowest))
+        self.assertEqual(budget.count, 5)
+        self.assertEqual(budget.duration, 15.0)
+
+    def test_nested(self):
+        previous = current_budget()
+        with track_sql_budget("outer") as outer:
+            self.assertIs(current_budget(), outer)
+            with self.assertLogs(LOGGER, "WARNING") as logs:
+                with track_sql_budget("inner", max_statements=1) as inner:
+                    self.assertIs(current_budget(), inner)
+                    inner.add(_cursor("SELECT 1"), 1.0)
+                    inner.add(_cursor("SELECT 2"), 1.0)
+            self.assertIn("inner: 2 statements", logs.output[0])
+            # the outer budget is tracked again after the inner one
+            self.assertIs(current_budget(), outer)
+            self.assertEqual(outer.count, 0)
+        self.assertIs(current_budget(), previous)
@@ -0,0 +1,98 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+from unittest import mock
+
+from odoo.tests.common import BaseCase
+
+from .. import stats
+from ..stats import MAX_SAMPLES, OTHER_FINGERPRINT, StatementStats, fingerprint
+
+
+class TestStatementStats(BaseCase):
+    def test_fingerprint_literals(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE name = 'O''Brien' AND id = 42"),
+            "SELECT * FROM t WHERE name = ? AND id = ?",
+        )
+        self.assertEqual(
+            fingerprint("SELECT 1.5 FROM table1 WHERE id = %(id)s"),
+            "SELECT ? FROM table1 WHERE id = ?",
+        )
+        self.assertEqual(fingerprint("SELECT  a\n  FROM t "), "SELECT a FROM t")
+
+    def test_fingerprint_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT id FROM t WHERE id IN (1, 2, 3)"),
+            "SELECT id FROM t WHERE id IN (?)",
+        )
+        self.assertEqual(
+            fingerprint("SELECT id FROM t WHERE id IN (%s, %s)"),
+            "SELECT id FROM t WHERE id IN (?)",
+        )
+        self.assertEqual(
+            fingerprint("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y'), (3, 'z')"),
+            "INSERT INTO t (a, b) VALUES (?)",
+        )
+        self.assertEqual(
+            fingerprint("INSERT INTO t (a, b) VALUES (%(a)s, %(b)s)"),
+            "INSERT INTO t (a, b) VALUES (?)",
+        )
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(stats.percentile(samples, 50), 50)
+        self.assertEqual(stats.percentile(samples, 95), 95)
+        self.assertEqual(stats.percentile(samples, 100), 100)
+        self.assertEqual(stats.percentile([7.0], 95), 7.0)
+        self.assertEqual(stats.percentile([], 50), 0.0)
+
+    def test_report(self):
+        statement_stats = StatementStats()
+        for duration in range(1, 101):
+            statement_stats.add("SELECT * FROM t WHERE id = %s" % duration, duration, 1)
+        statement_stats.add("SELECT 1", 10000.0, -1)
+        report = statement_stats.report()
+        # the statements costing the most time overall first
+        self.assertEqual(
+            [line["fingerprint"] for line in report],
+            ["SELECT ?", "SELECT * FROM t WHERE id = ?"],
+        )
+        self.assertEqual(report[0]["rows"], 0)
+        line = report[1]
+        self.assertEqual(line["count"], 100)
+        self.assertEqual(line["total"], 5050)
+        self.assertEqual(line["mean"], 50.5)
+        self.assertEqual(line["p50"], 50)
+        self.assertEqual(line["p95"], 95)
+        self.assertEqual(line["max"], 100)
+        self.assertEqual(line["rows"], 100)
+        self.assertEqual(len(statement_stats.report(limit=1)), 1)
+        statement_stats.reset()
+        self.assertEqual(statement_stats.report(), [])
+
+    def test_reservoir(self):
+        statement_stats = StatementStats()
+        nb_statements = MAX_SAMPLES * 4
+        for duration in range(nb_statements):
+            statement_stats.add("SELECT 1", float(duration), 1)
+        samples = statement_stats._stats["SELECT ?"]["samples"]
+        self.assertEqual(len(samples), MAX_SAMPLES)
+        self.assertTrue(all(0 <= sample < nb_statements for sample in samples))
+        line = statement_stats.report()[0]
+        self.assertEqual(line["count"], nb_statements)
+        self.assertEqual(line["max"], nb_statements - 1)
+        self.assertLessEqual(line["p50"], line["p95"])
+        self.assertLessEqual(line["p95"], line["max"])
+
+    def test_max_fingerprints(self):
+        statement_stats = StatementStats()
+        with mock.patch.object(stats, "MAX_FINGERPRINTS", 2):
+            for table in ("a", "b", "c", "d"):
+                statement_stats.add("SELECT * FROM %s" % table, 1.0, 1)
+            statement_stats.add("SELECT * FROM a", 1.0, 1)
+        counts = {
+            line["fingerprint"]: line["count"] for line in statement_stats.report()
+        }
+        self.assertEqual(
+            counts,
+            {"SELECT * FROM a": 2, "SELECT * FROM b": 1, OTHER_FINGERPRINT: 2},
+        )
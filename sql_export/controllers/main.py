@@ -0,0 +1,23 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo import http
+from odoo.http import content_disposition, request
+
+
+class SqlExportController(http.Controller):
+    @http.route("/sql_export/download/<int:wizard_id>", type="http", auth="user")
+    def download(self, wizard_id, **kwargs):
+        """Send the file of an export to the browser chunk by chunk, as it is
+        read from the temporary file filled by the query.
+        """
+        wizard = request.env["sql.file.wizard"].browse(wizard_id).exists()
+        if not wizard:
+            raise request.not_found()
+        file_name, chunks = wizard.stream_sql()
+        return request.make_response(
+            chunks,
+            headers=[
+                ("Content-Type", "application/octet-stream"),
+                ("Content-Disposition", content_disposition(file_name)),
+            ],
+        )
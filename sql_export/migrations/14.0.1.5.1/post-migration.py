@@ -0,0 +1,16 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    # the cached results were readable by all the users of the exports
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["ir.attachment"].search(
+        [
+            ("res_model", "=", "sql.export"),
+            ("res_field", "=", False),
+            ("name", "=like", "sql_export_cache_%"),
+        ]
+    ).unlink()
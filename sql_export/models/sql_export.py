@@ -1,7 +1,42 @@
 # Copyright (C) 2015 Akretion (<http://www.akretion.com>)
 # @author: Florian da Costa
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
-from odoo import fields, models
+import codecs
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Size of the chunks of the exported files sent to the browser
+STREAM_CHUNK_SIZE = 64 * 1024
+# Prefix of the names of the attachments storing cached results
+CACHE_PREFIX = "sql_export_cache_"
+# Set as the field of the attachments storing cached results: like those of
+# binary fields, only system users can access them besides this module
+CACHE_FIELD = "sql_export_cache"
+PARAM_CACHE_MAX_SIZE = "sql_export.cache_max_size"
+DEFAULT_CACHE_MAX_SIZE = 512
+
+
+def _iter_file(output, encoding):
+    """Iterate on the chunks of the file object @output, converted from
+    utf-8 to @encoding, and close it.
+    """
+    try:
+        if encoding == "utf-8":
+            yield from iter(lambda: output.read(STREAM_CHUNK_SIZE), b"")
+            return
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        encoder = codecs.getincrementalencoder(encoding)(errors="replace")
+        for chunk in iter(lambda: output.read(STREAM_CHUNK_SIZE), b""):
+            yield encoder.encode(decoder.decode(chunk))
+        yield encoder.encode(decoder.decode(b"", final=True), final=True)
+    finally:
+        output.close()
 
 
 class SqlExport(models.Model):
@@ -63,6 +98,32 @@ class SqlExport(models.Model):
         default="utf-8",
     )
 
+    stream_download = fields.Boolean(
+        help="If checked, the exported file is directly sent to the browser "
+        "chunk by chunk instead of being stored in the database first, so that "
+        "large exports do not need to fit in memory.",
+    )
+
+    use_cache = fields.Boolean(
+        string="Cache Results",
+        help="If checked, the files of the export are kept for the duration "
+        "set in Cache Duration, and are reused when the export is run again "
+        "by the same user and company, with the same parameters.",
+    )
+
+    cache_ttl = fields.Integer(
+        string="Cache Duration (minutes)",
+        default=60,
+    )
+
+    cache_hit_count = fields.Integer(
+        string="Cache Hits", readonly=True, copy=False, default=0
+    )
+
+    cache_miss_count = fields.Integer(
+        string="Cache Misses", readonly=True, copy=False, default=0
+    )
+
     def export_sql_query(self):
         self.ensure_one()
         wiz = self.env["sql.file.wizard"].create({"sql_export_id": self.id})
@@ -85,6 +146,138 @@ class SqlExport(models.Model):
         if self.file_format == "csv":
             return "csv"
 
+    def unlink(self):
+        # not removed with the exports, as attachments of a field
+        self.sudo()._get_cache_attachments().unlink()
+        return super().unlink()
+
+    def button_refresh_cache(self):
+        """Drop the cached files of the exports, so that their query is
+        executed again on their next run.
+        """
+        self._get_cache_attachments().unlink()
+
+    def _get_data_from_query(self, variable_dict):
+        """Return the file of the export, encoded in base64, from the cache
+        if it is enabled and holds a file for @variable_dict.
+        """
+        self.ensure_one()
+        method_name = "%s_get_data_from_query" % self.file_format
+        if not self.use_cache:
+            return getattr(self, method_name)(variable_dict)
+        cache_name = "%s%s" % (CACHE_PREFIX, self._get_cache_key(variable_dict))
+        attachment = self._get_cache_attachments().filtered(
+            lambda a: a.name == cache_name
+        )[:1]
+        if attachment:
+            self._increment_cache_count("cache_hit_count")
+            return attachment.datas
+        data = getattr(self, method_name)(variable_dict)
+        self._increment_cache_count("cache_miss_count")
+        self.env["ir.attachment"].sudo().create(
+            {
+                "name": cache_name,
+                "datas": data,
+                "res_model": self._name,
+                "res_id": self.id,
+                "res_field": CACHE_FIELD,
+            }
+        )
+        self._evict_cache()
+        return data
+
+    def _get_cache_key(self, variable_dict):
+        """Return the key of the cached files of the export run with
+        @variable_dict. Any change of the export invalidates them.
+        """
+        self.ensure_one()
+        payload = json.dumps(
+            [
+                self.query,
+                fields.Datetime.to_string(self.write_date),
+                sorted(variable_dict.items()),
+                self.env.company.id,
+                self.env.user.id,
+            ],
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _get_cache_attachments(self, expired=False):
+        """Return the attachments storing the files of the exports which
+        are still valid, or the @expired ones.
+        """
+        attachments = (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_id", "in", self.ids),
+                    ("res_field", "=", CACHE_FIELD),
+                    ("name", "=like", CACHE_PREFIX + "%"),
+                ]
+            )
+        )
+        now = fields.Datetime.now()
+        exports = {export.id: export for export in self.sudo()}
+        return attachments.filtered(
+            lambda a: expired
+            == (
+                a.create_date + timedelta(minutes=exports[a.res_id].cache_ttl) <= now
+                or not exports[a.res_id].use_cache
+            )
+        )
+
+    def _increment_cache_count(self, field_name):
+        # without write access on the export, nor update of its write_date
+        # which would invalidate its cache
+        self.env.cr.execute(
+            'UPDATE "{0}" SET "{1}" = "{1}" + 1 WHERE id = %s'.format(
+                self._table, field_name
+            ),
+            (self.id,),
+        )
+        self.invalidate_cache([field_name], self.ids)
+
+    @api.model
+    def _evict_cache(self):
+        """Drop the oldest cached files beyond the size (in megabytes) set
+        in the system parameter sql_export.cache_max_size.
+        """
+        max_size = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(PARAM_CACHE_MAX_SIZE, DEFAULT_CACHE_MAX_SIZE)
+        )
+        attachments = (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_field", "=", CACHE_FIELD),
+                    ("name", "=like", CACHE_PREFIX + "%"),
+                ],
+                order="create_date desc, id desc",
+            )
+        )
+        total_size = 0
+        to_evict = attachments.browse()
+        for attachment in attachments:
+            total_size += attachment.file_size
+            if total_size > max_size * 1024 * 1024:
+                to_evict |= attachment
+        if to_evict:
+            _logger.info("Evicting %s cached SQL exports", len(to_evict))
+            to_evict.unlink()
+
+    @api.autovacuum
+    def _gc_cache(self):
+        """Drop the expired cached files."""
+        exports = self.search([])
+        exports._get_cache_attachments(expired=True).unlink()
+
     def csv_get_data_from_query(self, variable_dict):
         self.ensure_one()
         # Execute Request
@@ -94,3 +287,17 @@ class SqlExport(models.Model):
         if self.encoding:
             res = res.decode(self.encoding)
         return res
+
+    def csv_stream_data_from_query(self, variable_dict):
+        """Return an iterator on the chunks of the CSV file of the query, in
+        the encoding of the export.
+        """
+        self.ensure_one()
+        output = self._execute_sql_request(
+            params=variable_dict, mode="stdout_file", copy_options=self.copy_options
+        )
+        try:
+            encoding = codecs.lookup(self.encoding or "utf-8").name
+        except LookupError:
+            encoding = "utf-8"
+        return _iter_file(output, encoding)
@@ -5,7 +5,7 @@
 import base64
 
 from odoo import fields
-from odoo.exceptions import UserError
+from odoo.exceptions import AccessError, UserError
 from odoo.tests.common import TransactionCase, tagged
 from odoo.tools import config
 
@@ -29,6 +29,93 @@ class TestExportSqlQuery(TransactionCase):
         self.assertEqual(export.split(";")[0], "name")
         self.assertTrue(len(export.split(";")) > 6)
 
+    def test_sql_query_stream(self):
+        self.sql_report_demo.write({"stream_download": True, "encoding": "latin1"})
+        wizard = self.wizard_obj.create(
+            {
+                "sql_export_id": self.sql_report_demo.id,
+            }
+        )
+        action = wizard.export_sql()
+        self.assertEqual(action["url"], "/sql_export/download/%s" % wizard.id)
+        self.assertFalse(wizard.binary_file)
+        file_name, chunks = wizard.stream_sql()
+        self.assertTrue(file_name.endswith(".csv"))
+        export = b"".join(chunks).decode("latin1")
+        self.assertEqual(export.split(";")[0], "name")
+        self.assertTrue(len(export.split(";")) > 6)
+
+    def test_sql_query_cache(self):
+        self.sql_report_demo.write({"use_cache": True, "cache_ttl": 10})
+
+        def export():
+            wizard = self.wizard_obj.create(
+                {
+                    "sql_export_id": self.sql_report_demo.id,
+                }
+            )
+            wizard.export_sql()
+            return base64.b64decode(wizard.binary_file)
+
+        data = export()
+        self.assertEqual(self.sql_report_demo.cache_miss_count, 1)
+        self.assertEqual(self.sql_report_demo.cache_hit_count, 0)
+        # the cached file is not readable by the other users of the export
+        attachment = self.sql_report_demo._get_cache_attachments()
+        user = self.env.ref("base.user_demo")
+        self.assertFalse(
+            self.env["ir.attachment"]
+            .with_user(user)
+            .search([("res_model", "=", "sql.export")])
+            & attachment
+        )
+        with self.assertRaises(AccessError):
+            attachment.with_user(user).read(["datas"])
+        # the cached file is returned even if the data changed
+        self.env["res.partner"].create({"name": "test"})
+        self.assertEqual(export(), data)
+        self.assertEqual(self.sql_report_demo.cache_miss_count, 1)
+        self.assertEqual(self.sql_report_demo.cache_hit_count, 1)
+        self.sql_report_demo.button_refresh_cache()
+        self.assertNotEqual(export(), data)
+        self.assertEqual(self.sql_report_demo.cache_miss_count, 2)
+        # the cache is bounded in size
+        self.env["ir.config_parameter"].set_param("sql_export.cache_max_size", 0)
+        export()
+        self.assertFalse(self.sql_report_demo._get_cache_attachments())
+
+    def test_sql_query_materialized_view(self):
+        sql_export = self.sql_export_obj.create(
+            {
+                "name": "test_materialized_view",
+                "query": "SELECT id, name FROM res_partner",
+                "use_materialized_view": True,
+                "materialized_view_unique_columns": "id",
+            }
+        )
+        sql_export.button_validate_sql_expression()
+        self.assertTrue(sql_export._materialized_view_exists())
+        self.assertTrue(sql_export._materialized_view_has_unique_index())
+        self.assertTrue(sql_export.materialized_view_refresh_date)
+        partner_count = len(sql_export._execute_sql_request(mode="fetchall"))
+        # the result is read from the view until its next refresh
+        self.env["res.partner"].create({"name": "test"})
+        res_sql = sql_export._execute_sql_request(mode="fetchall")
+        self.assertEqual(len(res_sql), partner_count)
+        sql_export.write({"materialized_view_refresh_date": "2000-01-01"})
+        self.sql_export_obj.cron_refresh_materialized_views()
+        res_sql = sql_export._execute_sql_request(mode="fetchall")
+        self.assertEqual(len(res_sql), partner_count + 1)
+        sql_export.button_set_draft()
+        self.assertFalse(sql_export._materialized_view_exists())
+
+    def test_iter_sql_request(self):
+        rows = self.sql_report_demo._execute_sql_request(mode="fetchall", header=True)
+        self.assertEqual(
+            list(self.sql_report_demo._iter_sql_request(header=True, chunk_size=2)),
+            [list(rows[0])] + rows[1:],
+        )
+
     def test_prohibited_queries(self):
         prohibited_queries = [
             "upDaTe res_partner SET name = 'test' WHERE id = 1",
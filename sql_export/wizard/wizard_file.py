@@ -7,7 +7,8 @@ from datetime import datetime
 
 from lxml import etree
 
-from odoo import api, fields, models
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
 
 
@@ -53,14 +54,11 @@ class SqlFileWizard(models.TransientModel):
                 res["arch"] = etree.tostring(eview, pretty_print=True)
         return res
 
-    def export_sql(self):
+    def _get_variable_dict(self):
+        """Return the values of the parameters of the query."""
         self.ensure_one()
         sql_export = self.sql_export_id
-
-        # Manage Params
         variable_dict = {}
-        now_tz = fields.Datetime.context_timestamp(sql_export, datetime.now())
-        date = now_tz.strftime(DEFAULT_SERVER_DATETIME_FORMAT)
         if sql_export.field_ids:
             for field in sql_export.field_ids:
                 if field.ttype == "many2one":
@@ -75,19 +73,44 @@ class SqlFileWizard(models.TransientModel):
         if "%(user_id)s" in sql_export.query:
             user_id = self.env.user.id
             variable_dict["user_id"] = user_id
+        return variable_dict
 
-        # Call different method depending on file_type since the logic will be
-        # different
-        method_name = "%s_get_data_from_query" % sql_export.file_format
-        data = getattr(sql_export, method_name)(variable_dict)
+    def _get_file_name(self):
+        self.ensure_one()
+        sql_export = self.sql_export_id
+        now_tz = fields.Datetime.context_timestamp(sql_export, datetime.now())
+        date = now_tz.strftime(DEFAULT_SERVER_DATETIME_FORMAT)
         extension = sql_export._get_file_extension()
-        self.write(
-            {
-                "binary_file": data,
-                "file_name": "%(name)s_%(date)s.%(extension)s"
-                % {"name": sql_export.name, "date": date, "extension": extension},
+        return "%(name)s_%(date)s.%(extension)s" % {
+            "name": sql_export.name,
+            "date": date,
+            "extension": extension,
+        }
+
+    def _get_stream_method(self):
+        """Return the method streaming the file of the export, if the export
+        is to be streamed and its format supports it.
+        """
+        self.ensure_one()
+        sql_export = self.sql_export_id
+        if not sql_export.stream_download:
+            return False
+        method_name = "%s_stream_data_from_query" % sql_export.file_format
+        return getattr(sql_export, method_name, False)
+
+    def export_sql(self):
+        self.ensure_one()
+        sql_export = self.sql_export_id
+
+        if self._get_stream_method():
+            return {
+                "type": "ir.actions.act_url",
+                "url": "/sql_export/download/%s" % self.id,
+                "target": "self",
             }
-        )
+
+        data = sql_export._get_data_from_query(self._get_variable_dict())
+        self.write({"binary_file": data, "file_name": self._get_file_name()})
         return {
             "view_mode": "form",
             "res_model": "sql.file.wizard",
@@ -97,3 +120,13 @@ class SqlFileWizard(models.TransientModel):
             "context": self.env.context,
             "nodestroy": True,
         }
+
+    def stream_sql(self):
+        """Return the file name of the export, and an iterator on the chunks
+        of its file.
+        """
+        self.ensure_one()
+        stream_method = self._get_stream_method()
+        if not stream_method:
+            raise UserError(_("This export can not be streamed."))
+        return self._get_file_name(), stream_method(self._get_variable_dict())
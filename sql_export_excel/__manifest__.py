@@ -3,7 +3,7 @@
 
 {
     "name": "SQL Export Excel",
-    "version": "14.0.1.1.0",
+    "version": "14.0.1.2.0",
     "author": "Akretion,Odoo Community Association (OCA)",
     "website": "https://github.com/OCA/server-tools",
     "license": "AGPL-3",
@@ -80,9 +80,8 @@ class SqlExport(models.Model):
 
     def excel_get_data_from_query(self, variable_dict):
         self.ensure_one()
-        res = self._execute_sql_request(
-            params=variable_dict, mode="fetchall", header=self.header
-        )
+        # rows fetched by chunks from a server-side cursor
+        rows = self._iter_sql_request(params=variable_dict, header=self.header)
         # Case we insert data in an existing excel file.
         if self.attachment_id:
             datas = self.attachment_id.datas
@@ -102,18 +101,18 @@ class SqlExport(models.Model):
                 )
             row_position = self.row_position or 1
             col_position = self.col_position or 1
-        # Case of excel file creation
+            for index, row in enumerate(rows, row_position):
+                for col, val in enumerate(row, col_position):
+                    ws.cell(row=index, column=col).value = val
+        # Case of excel file creation, the rows being written to the file
+        # as they are fetched
         else:
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            row_position = 1
-            col_position = 1
-        for index, row in enumerate(res, row_position):
-            for col, val in enumerate(row, col_position):
-                ws.cell(row=index, column=col).value = val
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet()
+            for row in rows:
+                ws.append(row)
         output = BytesIO()
         wb.save(output)
-        output.getvalue()
         output_datas = base64.b64encode(output.getvalue())
         output.close()
         return output_datas
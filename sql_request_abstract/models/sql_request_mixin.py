@@ -6,11 +6,14 @@
 import base64
 import logging
 import re
+import time
 import uuid
+from datetime import timedelta
 from io import BytesIO
+from tempfile import SpooledTemporaryFile
 
 from psycopg2 import ProgrammingError
-from psycopg2.sql import SQL
+from psycopg2.sql import SQL, Identifier
 
 from odoo import _, api, fields, models, tools
 from odoo.exceptions import UserError, ValidationError
@@ -19,6 +22,11 @@ from ..sql_db import get_external_cursor
 
 logger = logging.getLogger(__name__)
 
+# Size of the COPY output kept in memory before being spooled to a file
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+# Number of rows fetched at once from server-side cursors
+STREAM_CHUNK_SIZE = 2000
+
 
 class SQLRequestMixin(models.AbstractModel):
     _name = "sql.request.mixin"
@@ -103,6 +111,43 @@ class SQLRequestMixin(models.AbstractModel):
         )
     )
 
+    use_materialized_view = fields.Boolean(
+        help="If checked, the result of the query is stored in a materialized "
+        "view, refreshed on schedule, and read from it instead of executing "
+        "the query. Not available for queries with parameters.",
+    )
+    materialized_view_unique_columns = fields.Char(
+        help="Comma-separated columns of the query identifying its rows. If "
+        "set, a unique index is created on the materialized view, which can "
+        "then be refreshed without locking its readers.",
+    )
+    materialized_view_refresh_interval = fields.Integer(
+        string="Refresh Interval (minutes)",
+        default=60,
+        help="Leave 0 to refresh the materialized view manually only.",
+    )
+    materialized_view_refresh_date = fields.Datetime(
+        string="Last Refresh", readonly=True, copy=False
+    )
+    materialized_view_refresh_duration = fields.Float(
+        string="Last Refresh Duration (s)", readonly=True, copy=False
+    )
+
+    @api.constrains("use_materialized_view", "use_external_database", "query")
+    def check_materialized_view(self):
+        for item in self.filtered("use_materialized_view"):
+            if item.use_external_database:
+                raise ValidationError(
+                    _(
+                        "Materialized views can not be used with an external "
+                        "database."
+                    )
+                )
+            if "%(" in item.query:
+                raise ValidationError(
+                    _("Materialized views can not be used with parameters.")
+                )
+
     @api.constrains("use_external_database")
     def check_external_config(self):
         external_db_records = self.filtered(lambda rec: rec.use_external_database)
@@ -127,10 +172,20 @@ class SQLRequestMixin(models.AbstractModel):
             if item._check_execution_enabled:
                 item._check_execution()
             item.state = "sql_valid"
+            if item.use_materialized_view:
+                item.refresh_materialized_view()
 
     def button_set_draft(self):
+        self._drop_materialized_view()
         self.write({"state": "draft"})
 
+    def button_refresh_materialized_view(self):
+        self.refresh_materialized_view()
+
+    def unlink(self):
+        self._drop_materialized_view()
+        return super().unlink()
+
     # API Section
     def _execute_sql_request(
         self,
@@ -157,6 +212,13 @@ class SQLRequestMixin(models.AbstractModel):
                 result of 'cr.fetchall()'.
             * 'fetchone' : execute the select request, and return the
                 result of 'cr.fetchone()'
+            * 'stdout': execute the request with COPY, and return its
+                output encoded in base64.
+            * 'stdout_file': execute the request with COPY, and return its
+                output as a file object, positioned at its start and to be
+                closed by the caller. The output is written in a temporary
+                file once larger than SPOOL_MAX_SIZE, so it can be streamed
+                without being held in memory.
         :param rollback: (boolean) mention if a rollback should be played after
             the execution of the query. Please keep this feature enabled
             for security reason, except if necessary.
@@ -165,7 +227,7 @@ class SQLRequestMixin(models.AbstractModel):
             (Ignored if @mode not in ('view', 'materialized_view'))
         :param copy_options: (str) mentions extra options for
             "COPY request STDOUT WITH xxx" request.
-            (Ignored if @mode != 'stdout')
+            (Ignored if @mode not in ('stdout', 'stdout_file'))
         :param header: (boolean) if true, the header of the query will be
             returned as first element of the list if the mode is fetchall.
             (Ignored if @mode != fetchall)
@@ -186,26 +248,30 @@ class SQLRequestMixin(models.AbstractModel):
         if mode in ("view", "materialized_view"):
             rollback = False
 
-        query = self.env.cr.mogrify(self.query, params).decode("utf-8")
+        if mode in ("fetchone", "fetchall", "stdout", "stdout_file"):
+            query = self._get_query_to_execute(params)
+        else:
+            query = self.env.cr.mogrify(self.query, params).decode("utf-8")
 
         if mode in ("fetchone", "fetchall"):
             pass
-        elif mode == "stdout":
+        elif mode in ("stdout", "stdout_file"):
             query = SQL("COPY ({0}) TO STDOUT WITH {1}").format(
                 SQL(query), SQL(copy_options)
             )
-        elif mode in "view":
-            query = SQL("CREATE VIEW {0} AS ({1});").format(SQL(query), SQL(view_name))
-        elif mode in "materialized_view":
+        elif mode == "view":
+            query = SQL("CREATE VIEW {0} AS ({1});").format(SQL(view_name), SQL(query))
+        elif mode == "materialized_view":
             self._check_materialized_view_available()
             query = SQL("CREATE MATERIALIZED VIEW {0} AS ({1});").format(
-                SQL(query), SQL(view_name)
+                SQL(view_name), SQL(query)
             )
         else:
             raise UserError(_("Unimplemented mode : '%s'" % mode))
 
         query_cr = self._get_cr_for_query()
 
+        rollback_name = False
         if rollback:
             rollback_name = self._create_savepoint(query_cr)
         try:
@@ -214,6 +280,8 @@ class SQLRequestMixin(models.AbstractModel):
                 query_cr.copy_expert(query, output)
                 res = base64.b64encode(output.getvalue())
                 output.close()
+            elif mode == "stdout_file":
+                res = self._copy_to_file(query_cr, query)
             else:
                 query_cr.execute(query)
                 if mode == "fetchall":
@@ -224,11 +292,207 @@ class SQLRequestMixin(models.AbstractModel):
                 elif mode == "fetchone":
                     res = query_cr.fetchone()
         finally:
-            self._rollback_savepoint(rollback_name, query_cr)
+            self._release_cursor(rollback_name, query_cr)
 
         return res
 
+    def _iter_sql_request(self, params=None, header=False, chunk_size=None):
+        """Execute a SQL request on the current database, and iterate on the
+        rows of its result.
+
+        The rows are fetched by chunks of @chunk_size rows from a server-side
+        cursor, so that large results are never held in memory. A rollback is
+        always played once the iteration is over.
+
+        :param params: (dict) of keys / values that will be replaced in
+            the sql query, before executing it.
+        :param header: (boolean) if true, the header of the query is
+            yielded first.
+        :param chunk_size: (int) number of rows fetched at once.
+            Defaults to STREAM_CHUNK_SIZE.
+        """
+        self.ensure_one()
+        if self.state == "draft":
+            raise UserError(_("It is not allowed to execute a not checked request."))
+        query = self._get_query_to_execute(params)
+        chunk_size = chunk_size or STREAM_CHUNK_SIZE
+
+        query_cr = self._get_cr_for_query()
+        rollback_name = self._create_savepoint(query_cr)
+        # pylint: disable=protected-access
+        stream_cr = query_cr._cnx.cursor(name="%s_stream" % rollback_name)
+        stream_cr.itersize = chunk_size
+        try:
+            stream_cr.execute(query)
+            rows = stream_cr.fetchmany(chunk_size)
+            if header:
+                yield [desc[0] for desc in stream_cr.description]
+            while rows:
+                yield from rows
+                rows = stream_cr.fetchmany(chunk_size)
+        finally:
+            # the server-side cursor does not survive the rollback
+            stream_cr.close()
+            self._rollback_savepoint(rollback_name, query_cr)
+
+    def refresh_materialized_view(self):
+        """Refresh the materialized views of the requests, creating them if
+        needed, and record the date and duration of the refresh.
+        """
+        for item in self.filtered("use_materialized_view"):
+            if item.state == "draft":
+                raise UserError(
+                    _("It is not allowed to execute a not checked request.")
+                )
+            view_name = item._get_materialized_view_name()
+            start = time.time()
+            if not item._materialized_view_exists():
+                item._create_materialized_view()
+            elif item._materialized_view_has_unique_index():
+                self.env.cr.execute(
+                    SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY {0}").format(
+                        Identifier(view_name)
+                    )
+                )
+            else:
+                self.env.cr.execute(
+                    SQL("REFRESH MATERIALIZED VIEW {0}").format(Identifier(view_name))
+                )
+            duration = time.time() - start
+            logger.info("Materialized view %s refreshed in %.3fs", view_name, duration)
+            # not through write(): the write date of the request is unchanged,
+            # as the results cached with it are still valid
+            self.env.cr.execute(
+                SQL(
+                    "UPDATE {0} SET materialized_view_refresh_date = %s, "
+                    "materialized_view_refresh_duration = %s WHERE id = %s"
+                ).format(Identifier(item._table)),
+                (fields.Datetime.now(), duration, item.id),
+            )
+            item.invalidate_cache(
+                [
+                    "materialized_view_refresh_date",
+                    "materialized_view_refresh_duration",
+                ],
+                item.ids,
+            )
+
+    @api.model
+    def cron_refresh_materialized_views(self):
+        """Refresh the materialized views which are due, for all the models
+        inheriting this one.
+        """
+        now = fields.Datetime.now()
+        for model_name in self._inherit_children:
+            model = self.env[model_name]
+            if model._abstract:
+                continue
+            items = model.search(
+                [
+                    ("use_materialized_view", "=", True),
+                    ("state", "=", "sql_valid"),
+                    ("materialized_view_refresh_interval", ">", 0),
+                ]
+            )
+            for item in items:
+                last_refresh = item.materialized_view_refresh_date
+                interval = timedelta(minutes=item.materialized_view_refresh_interval)
+                if last_refresh and last_refresh + interval > now:
+                    continue
+                try:
+                    with self.env.cr.savepoint():
+                        item.refresh_materialized_view()
+                except Exception:
+                    logger.exception(
+                        "Unable to refresh the materialized view of %s", item
+                    )
+
     # Private Section
+    def _get_query_to_execute(self, params):
+        """Return the query reading the result of the request, from its
+        materialized view if it has one.
+        """
+        self.ensure_one()
+        if self.use_materialized_view and self._materialized_view_exists():
+            return 'SELECT * FROM "%s"' % self._get_materialized_view_name()
+        return self.env.cr.mogrify(self.query, params).decode("utf-8")
+
+    def _get_materialized_view_name(self):
+        self.ensure_one()
+        return "%s_%s_mv" % (self._table, self.id)
+
+    def _materialized_view_exists(self):
+        self.ensure_one()
+        self.env.cr.execute(
+            "SELECT 1 FROM pg_matviews WHERE matviewname = %s",
+            (self._get_materialized_view_name(),),
+        )
+        return bool(self.env.cr.fetchone())
+
+    def _materialized_view_has_unique_index(self):
+        """Return whether the materialized view can be refreshed
+        concurrently, which requires a unique index on plain columns.
+        """
+        self.ensure_one()
+        self.env.cr.execute(
+            """
+            SELECT 1
+            FROM pg_index
+            WHERE indrelid = %s::regclass
+              AND indisunique AND indpred IS NULL AND indexprs IS NULL
+            """,
+            ('"%s"' % self._get_materialized_view_name(),),
+        )
+        return bool(self.env.cr.fetchone())
+
+    def _create_materialized_view(self):
+        self.ensure_one()
+        view_name = self._get_materialized_view_name()
+        self._execute_sql_request(
+            mode="materialized_view", view_name='"%s"' % view_name
+        )
+        if self.materialized_view_unique_columns:
+            columns = [
+                column.strip()
+                for column in self.materialized_view_unique_columns.split(",")
+            ]
+            self.env.cr.execute(
+                SQL("CREATE UNIQUE INDEX {0} ON {1} ({2})").format(
+                    Identifier("%s_unique" % view_name),
+                    Identifier(view_name),
+                    SQL(", ").join(Identifier(column) for column in columns),
+                )
+            )
+
+    def _drop_materialized_view(self):
+        for item in self:
+            self.env.cr.execute(
+                SQL("DROP MATERIALIZED VIEW IF EXISTS {0}").format(
+                    Identifier(item._get_materialized_view_name())
+                )
+            )
+        self.sudo().write({"materialized_view_refresh_date": False})
+
+    @api.model
+    def _copy_to_file(self, cr, query):
+        output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        try:
+            cr.copy_expert(query, output)
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        return output
+
+    @api.model
+    def _release_cursor(self, rollback_name, cr):
+        if rollback_name:
+            self._rollback_savepoint(rollback_name, cr)
+        elif self.env.cr != cr:
+            # close external database cursor, keeping its changes
+            cr.commit()
+            cr.close()
+
     def _get_cr_for_query(self):
         self.ensure_one()
         if self.use_external_database: